@@ -0,0 +1,13 @@
+"""
+'api' app configuration.
+"""
+from django.apps import AppConfig
+
+class ApiConfig(AppConfig):
+    """
+    Configuration for the 'api' app.
+
+    This app exposes the inventory lists and items as a JSON API.
+    """
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'api'
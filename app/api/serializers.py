@@ -0,0 +1,125 @@
+"""
+Conversion of inventory objects to JSON-compatible dicts.
+
+Every resource has a set of fields clients can select with `?fields=a,b`.
+Only the model fields needed by the selected ones are loaded.
+"""
+from decimal import Decimal
+
+CENTS = Decimal('0.01')
+
+# Fields of a List and the default selection
+LIST_FIELDS = ('id', 'name', 'description', 'image', 'total_global_cost', 'item_count', 'out_of_stock_count')
+LIST_DEFAULT_FIELDS = ('id', 'name', 'description', 'image')
+LIST_TOTAL_FIELDS = ('total_global_cost', 'item_count', 'out_of_stock_count')
+# Fields stored under another name
+LIST_MODEL_FIELDS = {'total_global_cost': 'total_cost_to_complete'}
+
+# Fields of an Item and the default selection
+ITEM_FIELDS = (
+    'id', 'list', 'name', 'description', 'amount', 'amount_to_buy', 'reorder_threshold', 'price',
+    'cost_to_complete',
+)
+ITEM_DEFAULT_FIELDS = ITEM_FIELDS
+
+class InvalidFields(ValueError):
+    """Raised when `?fields=` selects unknown fields."""
+
+def selected_fields(request, available, default):
+    """
+    Returns the fields selected by the `fields` query parameter.
+    """
+    value = request.GET.get('fields')
+    if not value:
+        return default
+
+    fields = tuple(field.strip() for field in value.split(',') if field.strip())
+    unknown = set(fields) - set(available)
+    if unknown:
+        raise InvalidFields(', '.join(sorted(unknown)))
+    return fields
+
+def db_fields(fields, computed=(), renamed=None):
+    """
+    Returns the model fields to load (`QuerySet.only`) to serialize `fields`.
+    """
+    renamed = renamed or {}
+    return [renamed.get(field, field) for field in fields if field not in computed]
+
+def money(value):
+    """
+    Formats an amount of money with two decimals.
+    """
+    return str(Decimal(value).quantize(CENTS))
+
+def serialize_list(list_obj, fields):
+    """
+    Returns the selected fields of a List as a dict.
+    """
+    data = {}
+    for field in fields:
+        if field == 'image':
+            data[field] = list_obj.image.url if list_obj.image else None
+        elif field == 'total_global_cost':
+            data[field] = money(list_obj.total_cost_to_complete)
+        else:
+            data[field] = getattr(list_obj, field)
+    return data
+
+def serialize_item(item, fields):
+    """
+    Returns the selected fields of an Item as a dict.
+    """
+    data = {}
+    for field in fields:
+        if field == 'list':
+            data[field] = item.list_id
+        elif field == 'cost_to_complete':
+            # Items that were just saved aren't annotated
+            cost = getattr(item, 'cost_to_complete', None)
+            data[field] = money(item.total_cost() if cost is None else cost)
+        elif field == 'price':
+            data[field] = money(item.price)
+        else:
+            data[field] = getattr(item, field)
+    return data
+
+def serialize_shopping_list(data):
+    """
+    Returns the result of `inventory.shopping.shopping_list` with formatted
+    amounts of money.
+    """
+    money_fields = ('price', 'cost_to_complete')
+    return {
+        'lists': [
+            {
+                'id': group['id'],
+                'name': group['name'],
+                'subtotal': money(group['subtotal']),
+                'count': group['count'],
+                'items': [
+                    {field: money(value) if field in money_fields else value for field, value in item.items()}
+                    for item in group['items']
+                ],
+            }
+            for group in data['lists']
+        ],
+        'total': money(data['total']),
+    }
+
+def serialize_job(job, user):
+    """
+    Returns the status of a background job as a dict. Errors are only shown
+    to staff, they may tell about the server.
+    """
+    return {
+        'id': job.pk,
+        'task': job.task,
+        'status': job.status,
+        'attempts': job.attempts,
+        'max_attempts': job.max_attempts,
+        'created_at': job.created_at,
+        'finished_at': job.finished_at,
+        'result': job.result,
+        'error': job.error if user.is_staff else None,
+    }
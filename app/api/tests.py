@@ -0,0 +1,113 @@
+"""
+Test cases for the 'api' app.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from inventory.models import Item, List
+from server.testing import TEST_CACHES
+
+@override_settings(CACHES=TEST_CACHES)
+class ApiTests(TestCase):
+    """
+    Resources are served as JSON, paginated with cursors, and only with the
+    methods of each endpoint.
+    """
+    def setUp(self):
+        self.list = List.objects.create(name='Bakery', description='Bread and cakes')
+        self.item = Item.objects.create(
+            list=self.list, name='Flour', description='Wheat', amount=1, amount_to_buy=3,
+            reorder_threshold=1, price=Decimal('2.50'),
+        )
+        self.client.force_login(get_user_model().objects.create_user('user'))
+
+    def test_authentication_required(self):
+        """
+        Anonymous requests get a JSON 401, not the login page.
+        """
+        self.client.logout()
+        response = self.client.get('/api/lists/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json(), {'error': 'Authentication required'})
+
+    def test_list(self):
+        """
+        Lists have their default fields, or the ones selected.
+        """
+        self.assertEqual(self.client.get('/api/lists/').json(), {
+            'results': [{
+                'id': self.list.pk, 'name': 'Bakery', 'description': 'Bread and cakes',
+                'image': None,
+            }],
+            'next_cursor': None,
+        })
+        response = self.client.get(
+            f'/api/lists/{self.list.pk}/', {'fields': 'id,total_global_cost,item_count'},
+        )
+        self.assertEqual(
+            response.json(), {'id': self.list.pk, 'total_global_cost': '5.00', 'item_count': 1},
+        )
+        response = self.client.get('/api/lists/', {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/lists/0/').json(), {'error': 'Not found'})
+
+    def test_item(self):
+        """
+        Items have every field, with amounts of money as strings.
+        """
+        expected = {
+            'id': self.item.pk, 'list': self.list.pk, 'name': 'Flour', 'description': 'Wheat',
+            'amount': 1, 'amount_to_buy': 3, 'reorder_threshold': 1, 'price': '2.50',
+            'cost_to_complete': '5.00',
+        }
+        self.assertEqual(self.client.get(f'/api/items/{self.item.pk}/').json(), expected)
+        response = self.client.get(f'/api/lists/{self.list.pk}/items/')
+        self.assertEqual(response.json(), {'results': [expected], 'next_cursor': None})
+
+    def test_pagination(self):
+        """
+        Following the cursors gives every object once, in order.
+        """
+        for amount in (4, 0, 2, 2):
+            Item.objects.create(list=self.list, name=f'Item {amount}', amount=amount)
+        for index in range(4):
+            List.objects.create(name=f'List {index}')
+
+        for url, ordering in (
+            (f'/api/lists/{self.list.pk}/items/', ('amount', 'pk')),
+            ('/api/lists/', ('pk',)),
+        ):
+            model = Item if 'items' in url else List
+            ids, cursor, pages = [], None, 0
+            while True:
+                params = {'limit': 2, 'fields': 'id'}
+                if cursor:
+                    params['cursor'] = cursor
+                page = self.client.get(url, params).json()
+                ids += [result['id'] for result in page['results']]
+                cursor, pages = page['next_cursor'], pages + 1
+                if not cursor:
+                    break
+            with self.subTest(url=url):
+                self.assertEqual(pages, 3)
+                expected = model.objects.order_by(*ordering).values_list('pk', flat=True)
+                self.assertEqual(ids, list(expected))
+
+    def test_methods(self):
+        """
+        Other methods are a JSON 405 listing the allowed ones.
+        """
+        for method, url, allowed in (
+            ('put', '/api/lists/', 'GET, HEAD, POST'),
+            ('post', f'/api/lists/{self.list.pk}/', 'GET, HEAD, PATCH, DELETE'),
+            ('delete', f'/api/lists/{self.list.pk}/totals/', 'GET, HEAD'),
+            ('post', f'/api/items/{self.item.pk}/', 'GET, HEAD, PATCH, DELETE'),
+            ('get', '/api/items/adjust/', 'POST'),
+        ):
+            with self.subTest(method=method, url=url):
+                response = getattr(self.client, method)(url)
+                self.assertEqual(response.status_code, 405)
+                self.assertEqual(response['Allow'], allowed)
+                self.assertEqual(response.json(), {'error': 'Method not allowed'})
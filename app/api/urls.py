@@ -0,0 +1,34 @@
+"""
+URL configuration for the 'api' app.
+
+Routes:
+    - 'lists/': Lists collection (GET, POST).
+    - 'lists/<pk>/': One list (GET, PATCH, DELETE).
+    - 'lists/<pk>/totals/': Totals of a list (GET).
+    - 'lists/<pk>/items/': Items of a list (GET, POST).
+    - 'lists/<pk>/history/': Daily stock movements of a list (GET).
+    - 'items/': Bulk update of items (PATCH).
+    - 'items/adjust/': Stock deltas (POST).
+    - 'items/low-stock/': Items at or below their reorder threshold (GET).
+    - 'items/<pk>/': One item (GET, PATCH, DELETE).
+    - 'items/<pk>/history/': Daily stock movements of an item (GET).
+    - 'shopping-list/': Items to buy across all lists (GET).
+    - 'jobs/<pk>/': Status of a background job (GET).
+"""
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('lists/', views.lists, name='api_lists'),
+    path('lists/<int:pk>/', views.list_detail, name='api_list_detail'),
+    path('lists/<int:pk>/totals/', views.list_totals, name='api_list_totals'),
+    path('lists/<int:pk>/items/', views.list_items, name='api_list_items'),
+    path('lists/<int:pk>/history/', views.list_history, name='api_list_history'),
+    path('items/', views.items, name='api_items'),
+    path('items/adjust/', views.adjust_items, name='api_adjust_items'),
+    path('items/low-stock/', views.low_stock_items, name='api_low_stock_items'),
+    path('items/<int:pk>/', views.item_detail, name='api_item_detail'),
+    path('items/<int:pk>/history/', views.item_history, name='api_item_history'),
+    path('shopping-list/', views.shopping_list, name='api_shopping_list'),
+    path('jobs/<int:pk>/', views.job_detail, name='api_job_detail'),
+]
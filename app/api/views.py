@@ -0,0 +1,433 @@
+"""
+Views for the 'api' app.
+
+JSON endpoints for inventory lists and items. Collections are paginated with
+cursors (`?cursor=`, `?limit=`), fields can be selected with `?fields=`, and
+GET responses carry an ETag so clients can revalidate them with
+If-None-Match. Writes accept a single object or, for bulk operations, an array
+of objects applied in one transaction.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.forms import model_to_dict, modelform_factory
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
+
+from inventory import cache, shopping
+from inventory.forms import ItemForm, ListForm
+from inventory.models import DailyStock, Item, List
+from inventory.pagination import InvalidCursor, paginate
+from inventory.search import search
+from jobs.models import Job
+
+from .serializers import (
+    ITEM_DEFAULT_FIELDS, ITEM_FIELDS, LIST_DEFAULT_FIELDS, LIST_FIELDS, LIST_MODEL_FIELDS,
+    LIST_TOTAL_FIELDS, InvalidFields, db_fields, selected_fields, serialize_item, serialize_job, serialize_list,
+    serialize_shopping_list,
+)
+
+# Largest page clients can request with `?limit=`
+MAX_PAGE_SIZE = 500
+
+# Days of stock history returned by default and at most, with `?days=`
+HISTORY_DAYS = 30
+MAX_HISTORY_DAYS = 366
+
+# Lists are created and updated from JSON, without image uploads
+ListJsonForm = modelform_factory(List, form=ListForm, fields=['name', 'description'])
+
+class BadRequest(ValueError):
+    """Raised by views to answer with a 400 and a message."""
+
+def api_view(methods):
+    """
+    Decorator for API views: JSON 401 for anonymous users, JSON 405 for other
+    methods than `methods`, and JSON errors for Http404 and BadRequest.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not request.user.is_authenticated:
+                return JsonResponse({'error': 'Authentication required'}, status=401)
+            if request.method not in methods:
+                response = JsonResponse({'error': 'Method not allowed'}, status=405)
+                response['Allow'] = ', '.join(methods)
+                return response
+            try:
+                return view(request, *args, **kwargs)
+            except Http404:
+                return JsonResponse({'error': 'Not found'}, status=404)
+            except (BadRequest, InvalidCursor, InvalidFields) as exc:
+                return JsonResponse({'error': f'{type(exc).__name__}: {exc}'}, status=400)
+        return wrapper
+    return decorator
+
+def read_json(request):
+    """
+    Returns the decoded JSON body of `request`.
+    """
+    try:
+        return json.loads(request.body)
+    except ValueError as exc:
+        raise BadRequest('Invalid JSON body') from exc
+
+def page_size(request):
+    """
+    Returns the page size requested with `?limit=`.
+    """
+    try:
+        limit = int(request.GET.get('limit', settings.INVENTORY_PAGE_SIZE))
+    except ValueError as exc:
+        raise BadRequest('Invalid limit') from exc
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def history_days(request):
+    """
+    Returns the number of days of stock history requested with `?days=`.
+    """
+    try:
+        days = int(request.GET.get('days', HISTORY_DAYS))
+    except ValueError as exc:
+        raise BadRequest('Invalid days') from exc
+    return max(1, min(days, MAX_HISTORY_DAYS))
+
+def version_etag(version, request):
+    """
+    Returns an ETag for a response derived from data at cache `version`.
+    """
+    return hashlib.md5(f'{version!r}|{request.get_full_path()}'.encode(), usedforsecurity=False).hexdigest()
+
+def lists_etag(request, *args, **kwargs):
+    """
+    ETag of responses built from all lists.
+    """
+    return version_etag(cache.lists_version(), request)
+
+def list_etag(request, pk, *args, **kwargs):
+    """
+    ETag of responses built from one list and its items.
+    """
+    return version_etag(cache.list_version(pk), request)
+
+def conditional_json(request, data):
+    """
+    Returns `data` as JSON with an ETag of its content, or a 304 if it
+    matches the request's If-None-Match.
+    """
+    response = JsonResponse(data)
+    etag = quote_etag(hashlib.md5(response.content, usedforsecurity=False).hexdigest())
+    response['ETag'] = etag
+    return get_conditional_response(request, etag=etag, response=response)
+
+def validation_errors(errors):
+    """
+    Returns a 400 response with form errors.
+    """
+    return JsonResponse({'errors': errors}, status=400)
+
+def paginated(request, queryset, ordering, serialize, fields):
+    """
+    Returns a page of `queryset` as JSON.
+    """
+    page = paginate(queryset, ordering, cursor=request.GET.get('cursor'), page_size=page_size(request))
+    return JsonResponse({
+        'results': [serialize(obj, fields) for obj in page.items],
+        'next_cursor': page.next_cursor,
+    })
+
+def list_queryset(fields):
+    """
+    Returns the queryset loading the `fields` of lists.
+    """
+    return List.objects.only(*db_fields(fields, renamed=LIST_MODEL_FIELDS))
+
+def item_queryset(fields, ordering=()):
+    """
+    Returns the queryset loading the `fields` of items (and the `ordering` ones).
+    """
+    only = db_fields(fields, ('cost_to_complete',)) + [field for field in ordering if field != 'pk']
+    queryset = Item.objects.only(*only)
+    if 'cost_to_complete' in fields:
+        queryset = queryset.with_cost_to_complete()
+    return queryset
+
+def merged_data(instance, form_class, payload):
+    """
+    Returns the form data to partially update `instance` with `payload`.
+    """
+    if not isinstance(payload, dict):
+        raise BadRequest('Expected a JSON object')
+    data = model_to_dict(instance, fields=form_class._meta.fields)
+    data.update(payload)
+    return data
+
+## Lists ##
+
+@api_view(['GET', 'HEAD', 'POST'])
+@condition(etag_func=lists_etag)
+def lists(request):
+    """
+    GET: page of lists, filtered by `?q=`. POST: create one or many lists.
+    """
+    if request.method == 'POST':
+        return create(request, ListJsonForm, serialize_list, LIST_DEFAULT_FIELDS)
+
+    fields = selected_fields(request, LIST_FIELDS, LIST_DEFAULT_FIELDS)
+    queryset = search(list_queryset(fields), request.GET.get('q', ''))
+    return paginated(request, queryset, ('pk',), serialize_list, fields)
+
+@api_view(['GET', 'HEAD', 'PATCH', 'DELETE'])
+@condition(etag_func=list_etag)
+def list_detail(request, pk):
+    """
+    GET: one list. PATCH: update some of its fields. DELETE: delete it and its items.
+    """
+    if request.method in ('GET', 'HEAD'):
+        fields = selected_fields(request, LIST_FIELDS, LIST_DEFAULT_FIELDS)
+        list_obj = get_object_or_404(list_queryset(fields), pk=pk)
+        return JsonResponse(serialize_list(list_obj, fields))
+
+    list_obj = get_object_or_404(List, pk=pk)
+    if request.method == 'DELETE':
+        list_obj.delete()
+        return HttpResponse(status=204)
+
+    form = ListJsonForm(merged_data(list_obj, ListJsonForm, read_json(request)), instance=list_obj)
+    if not form.is_valid():
+        return validation_errors(form.errors)
+    form.save()
+    return JsonResponse(serialize_list(form.instance, LIST_DEFAULT_FIELDS))
+
+@api_view(['GET', 'HEAD'])
+@condition(etag_func=list_etag)
+def list_totals(request, pk):
+    """
+    GET: the totals of a list, kept up to date as its items change.
+    """
+    list_obj = get_object_or_404(list_queryset(('id',) + LIST_TOTAL_FIELDS), pk=pk)
+    return JsonResponse(serialize_list(list_obj, ('id',) + LIST_TOTAL_FIELDS))
+
+@api_view(['GET', 'HEAD', 'POST'])
+@condition(etag_func=list_etag)
+def list_items(request, pk):
+    """
+    GET: page of the items of a list, by amount and filtered by `?q=`.
+    POST: create one or many items in the list.
+    """
+    list_obj = get_object_or_404(List.objects.only('pk'), pk=pk)
+    if request.method == 'POST':
+        return create(request, ItemForm, serialize_item, ITEM_DEFAULT_FIELDS, list=list_obj)
+
+    fields = selected_fields(request, ITEM_FIELDS, ITEM_DEFAULT_FIELDS)
+    ordering = ('amount', 'pk')
+    queryset = search(item_queryset(fields, ordering).filter(list=list_obj), request.GET.get('q', ''))
+    return paginated(request, queryset, ordering, serialize_item, fields)
+
+def create(request, form_class, serialize, fields, **attributes):
+    """
+    Creates one object, or many in one transaction when the body is an array.
+
+    `attributes` are set on every new object (e.g. the list of new items).
+    """
+    payload = read_json(request)
+    many = isinstance(payload, list)
+    rows = payload if many else [payload]
+
+    forms = []
+    errors = {}
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise BadRequest('Expected a JSON object')
+        form = form_class(row)
+        if form.is_valid():
+            for name, value in attributes.items():
+                setattr(form.instance, name, value)
+            forms.append(form)
+        else:
+            errors[index] = form.errors
+    if errors:
+        return validation_errors(errors if many else errors[0])
+
+    model = form_class._meta.model
+    if many:
+        with transaction.atomic():
+            if model is Item:
+                objects = Item.objects.bulk_create([form.instance for form in forms])
+            else:
+                # Lists are few: save them one by one so `post_save` receivers run
+                objects = [form.save() for form in forms]
+        return JsonResponse([serialize(obj, fields) for obj in objects], safe=False, status=201)
+
+    obj = forms[0].save()
+    return JsonResponse(serialize(obj, fields), status=201)
+
+## Items ##
+
+@api_view(['PATCH'])
+def items(request):
+    """
+    PATCH: update many items in one transaction.
+
+    The body is an array of objects with the `id` of the item and the fields
+    to change.
+    """
+    payload = read_json(request)
+    if not isinstance(payload, list) or not all(isinstance(row, dict) for row in payload):
+        raise BadRequest('Expected an array of objects')
+
+    try:
+        ids = [int(row['id']) for row in payload]
+    except (KeyError, TypeError, ValueError) as exc:
+        raise BadRequest('Every object needs an integer id') from exc
+
+    with transaction.atomic():
+        instances = Item.objects.select_for_update().in_bulk(ids)
+        changed_fields = set()
+        errors = {}
+        for index, row in enumerate(payload):
+            item = instances.get(ids[index])
+            if item is None:
+                errors[index] = {'id': ['Not found']}
+                continue
+            data = {key: value for key, value in row.items() if key != 'id'}
+            form = ItemForm(merged_data(item, ItemForm, data), instance=item)
+            if form.is_valid():
+                changed_fields.update(set(data) & set(form.fields))
+            else:
+                errors[index] = form.errors
+        if errors:
+            return validation_errors(errors)
+
+        if changed_fields:
+            Item.objects.bulk_update(instances.values(), sorted(changed_fields))
+
+    updated = item_queryset(ITEM_DEFAULT_FIELDS).in_bulk(ids)
+    return JsonResponse([serialize_item(updated[pk], ITEM_DEFAULT_FIELDS) for pk in ids], safe=False)
+
+@api_view(['GET', 'HEAD', 'PATCH', 'DELETE'])
+def item_detail(request, pk):
+    """
+    GET: one item. PATCH: update some of its fields. DELETE: delete it.
+    """
+    if request.method in ('GET', 'HEAD'):
+        fields = selected_fields(request, ITEM_FIELDS, ITEM_DEFAULT_FIELDS)
+        item = get_object_or_404(item_queryset(fields), pk=pk)
+        return conditional_json(request, serialize_item(item, fields))
+
+    item = get_object_or_404(Item, pk=pk)
+    if request.method == 'DELETE':
+        item.delete()
+        return HttpResponse(status=204)
+
+    form = ItemForm(merged_data(item, ItemForm, read_json(request)), instance=item)
+    if not form.is_valid():
+        return validation_errors(form.errors)
+    form.save()
+    item = item_queryset(ITEM_DEFAULT_FIELDS).get(pk=pk)
+    return JsonResponse(serialize_item(item, ITEM_DEFAULT_FIELDS))
+
+@api_view(['POST'])
+def adjust_items(request):
+    """
+    POST: apply stock deltas in one transaction.
+
+    The body is `{"adjustments": {"<item_id>": <delta>, ...}}`. Returns the
+    updated items and the new totals of their lists.
+    """
+    payload = read_json(request)
+    try:
+        deltas = {int(item_id): int(delta) for item_id, delta in payload['adjustments'].items()}
+    except (KeyError, TypeError, ValueError, AttributeError) as exc:
+        raise BadRequest('Invalid adjustments') from exc
+
+    updated = Item.objects.apply_deltas(deltas)
+    list_ids = {item.list_id for item in updated.values()}
+    totals = list_queryset(('id',) + LIST_TOTAL_FIELDS).filter(pk__in=list_ids)
+    return JsonResponse({
+        'items': [serialize_item(item, ITEM_DEFAULT_FIELDS) for item in updated.values()],
+        'lists': [serialize_list(list_obj, ('id',) + LIST_TOTAL_FIELDS) for list_obj in totals],
+        'missing': sorted(set(deltas) - set(updated)),
+    })
+
+@api_view(['GET', 'HEAD'])
+@condition(etag_func=lists_etag)
+def low_stock_items(request):
+    """
+    GET: page of the items at or below their reorder threshold, across all lists.
+    """
+    fields = selected_fields(request, ITEM_FIELDS, ITEM_DEFAULT_FIELDS)
+    queryset = item_queryset(fields).low_stock()
+    return paginated(request, queryset, ('pk',), serialize_item, fields)
+
+@api_view(['GET', 'HEAD'])
+@condition(etag_func=lists_etag)
+def shopping_list(request):
+    """
+    GET: every item below its target amount, grouped by list, with the list
+    subtotals and the grand total. `?order=cost` sorts by cost instead of name,
+    `?limit=` is the number of items returned per list (`count` has them all).
+    """
+    order = request.GET.get('order', 'list')
+    if order not in shopping.ORDERINGS:
+        raise BadRequest(f'Unknown order, use one of: {", ".join(shopping.ORDERINGS)}')
+    return JsonResponse(serialize_shopping_list(shopping.shopping_list(order, page_size(request))))
+
+@api_view(['GET', 'HEAD'])
+def item_history(request, pk):
+    """
+    GET: the daily stock movements of an item over the last `?days=` days,
+    and its average consumption per day.
+    """
+    item = get_object_or_404(Item.objects.only('pk', 'list_id', 'amount'), pk=pk)
+    days = history_days(request)
+    history = list(
+        DailyStock.objects.since(days).filter(item=item).order_by('date')
+        .values('date', 'added', 'removed', 'movements', 'closing_amount')
+    )
+    return conditional_json(request, {
+        'id': item.pk,
+        'amount': item.amount,
+        'days': history,
+        'consumption_per_day': round(sum(day['removed'] for day in history) / days, 2),
+    })
+
+@api_view(['GET', 'HEAD'])
+def list_history(request, pk):
+    """
+    GET: the daily stock movements of a list over the last `?days=` days, and
+    the `?limit=` items consumed the most, with their consumption per day.
+    """
+    list_obj = get_object_or_404(List.objects.only('pk'), pk=pk)
+    days = history_days(request)
+    rollups = DailyStock.objects.since(days).filter(list=list_obj)
+    consumption = rollups.consumption().filter(removed__gt=0).order_by('-removed', 'item')
+    # Not `list_etag`: the days covered change at midnight, not with the list
+    return conditional_json(request, {
+        'id': list_obj.pk,
+        'days': list(rollups.per_day()),
+        'items': [
+            {
+                'id': row['item'],
+                'added': row['added'],
+                'removed': row['removed'],
+                'consumption_per_day': round(row['removed'] / days, 2),
+            }
+            for row in consumption[:page_size(request)]
+        ],
+    })
+
+@api_view(['GET', 'HEAD'])
+def job_detail(request, pk):
+    """
+    GET: the status of a background job queued by the user (any job for staff),
+    and its result once finished.
+    """
+    job = get_object_or_404(Job.objects.visible_to(request.user), pk=pk)
+    return JsonResponse(serialize_job(job, request.user))
@@ -0,0 +1,32 @@
+"""
+Gunicorn configuration for serving Lima in production.
+
+Every value can be overridden with an environment variable so the container
+can be tuned without rebuilding it. Send SIGHUP to the master process for a
+graceful reload: new workers are started before the old ones are stopped.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Worker processes and threads per worker
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Threaded workers for WSGI. start.sh overrides it with the uvicorn worker for ASGI
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+
+# Seconds to keep idle client connections open
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Seconds a worker may spend on a request, and to finish requests on shutdown or reload
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
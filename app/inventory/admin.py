@@ -2,7 +2,7 @@
 Admin views
 """
 from django.contrib import admin
-from .models import Item, List
+from .models import Item, List, StockMovement
 
 class ItemInline(admin.TabularInline):
     """
@@ -31,3 +31,20 @@ class ItemAdmin(admin.ModelAdmin):
     list_filter = ('amount',)
 
 admin.site.register(Item, ItemAdmin)
+
+class StockMovementAdmin(admin.ModelAdmin):
+    """
+    Admin view: StockMovement, read only as the ledger is append-only.
+    """
+    list_display = ('created_at', 'item', 'delta', 'amount', 'source')
+    list_filter = ('source',)
+    list_select_related = ('item',)
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+admin.site.register(StockMovement, StockMovementAdmin)
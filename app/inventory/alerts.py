@@ -0,0 +1,126 @@
+"""
+Low stock alerts.
+
+An item with a `reorder_threshold` is low on stock when its amount is at or
+below it. `evaluate` sends an alert for every item that crossed its threshold
+since the last run, once per crossing, to the sinks of
+`settings.LOW_STOCK_SINKS`.
+
+Runs are incremental: `Item.low_stock_alerted` marks the items already
+alerted, and three partial indexes hold only the items low on stock, those
+of them not alerted yet, and the ones alerted. A run reads the crossings
+since the previous one from them, never the whole table, so it costs the
+same with a hundred items or a million. Alerted items whose amount went
+back above their threshold (or lost it) are re-armed, and alert again on
+their next crossing.
+
+Alerts are marked as sent once every sink accepted them. A failing sink has
+them sent again on the next run, so sinks may get an alert twice, e.g. from
+concurrent runs, but never miss one.
+
+A sink is any class with a `send(alerts)` method, taking a list of
+`LowStockAlert`. `ConsoleSink` and `FileSink` are meant for development and
+tests; others (email, chat, a webhook) can be plugged in by import path.
+"""
+import json
+import sys
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Item
+
+LowStockAlert = namedtuple(
+    'LowStockAlert', 'item_id name list_id list_name amount reorder_threshold amount_to_buy',
+)
+
+def get_sinks():
+    """
+    Returns instances of the sink classes of `settings.LOW_STOCK_SINKS`.
+    """
+    return [import_string(path)() for path in settings.LOW_STOCK_SINKS]
+
+class ConsoleSink:
+    """
+    Writes alerts to the standard output, one line each.
+    """
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, alerts):
+        """Writes `alerts`."""
+        for alert in alerts:
+            self.stream.write(
+                f'Low stock: {alert.name} ({alert.list_name}), {alert.amount} left, '
+                f'reorder threshold {alert.reorder_threshold}\n'
+            )
+        self.stream.flush()
+
+class FileSink:
+    """
+    Appends alerts to `settings.LOW_STOCK_ALERTS_FILE` as JSON lines.
+    """
+    lock = threading.Lock()
+
+    def __init__(self, path=None):
+        self.path = path or settings.LOW_STOCK_ALERTS_FILE
+
+    def send(self, alerts):
+        """Appends `alerts`."""
+        sent_at = timezone.now().isoformat()
+        lines = ''.join(
+            json.dumps({**alert._asdict(), 'sent_at': sent_at}) + '\n' for alert in alerts
+        )
+        with self.lock, open(self.path, 'a', encoding='utf-8') as alerts_file:
+            alerts_file.write(lines)
+
+def rearm(using=DEFAULT_DB_ALIAS):
+    """
+    Clears the alert of the items no longer low on stock. Returns their number.
+    """
+    return (
+        Item.objects.using(using).filter(low_stock_alerted=True)
+        .exclude(amount__lte=F('reorder_threshold'))
+        .update(low_stock_alerted=False)
+    )
+
+def evaluate(sinks=None, batch_size=500, using=DEFAULT_DB_ALIAS):
+    """
+    Re-arms the restocked items, then sends an alert for every item newly low
+    on stock to `sinks` (by default, those of the settings).
+
+    Returns the number of items alerted and re-armed.
+    """
+    sinks = get_sinks() if sinks is None else sinks
+    items = Item.objects.using(using)
+    rearmed = rearm(using)
+
+    alerted = 0
+    while True:
+        # Alerted items are no longer pending: each batch starts from the first
+        batch = list(
+            items.low_stock(pending=True)
+            .select_related('list').only(
+                'pk', 'name', 'amount', 'amount_to_buy', 'reorder_threshold', 'list__name',
+            ).order_by('pk')[:batch_size]
+        )
+        if not batch:
+            break
+        alerts = [
+            LowStockAlert(
+                item.pk, item.name, item.list_id, item.list.name,
+                item.amount, item.reorder_threshold, item.amount_to_buy,
+            )
+            for item in batch
+        ]
+        for sink in sinks:
+            sink.send(alerts)
+        alerted += items.filter(
+            pk__in=[alert.item_id for alert in alerts], low_stock_alerted=False,
+        ).update(low_stock_alerted=True)
+    return alerted, rearmed
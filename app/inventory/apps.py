@@ -9,3 +9,7 @@ class InventoryConfig(AppConfig):
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'inventory'
+
+    def ready(self):
+        # Connect signal receivers
+        from . import signals  # pylint: disable=C0415,W0611
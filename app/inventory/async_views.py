@@ -0,0 +1,204 @@
+"""
+Async versions of the busiest views of the 'Inventory' app.
+
+Served instead of their counterparts in `inventory.views` when ASYNC_VIEWS
+is on (by default under ASGI, see `inventory.urls`). Reads use the async ORM,
+so a request waiting on the database doesn't hold a thread. Stock changes
+run in transactions, which the async ORM doesn't support: they are applied
+with `sync_to_async`, and only the rest of the request is async.
+
+Responses are the same as those of the sync views, which hold the rest of
+the documentation: both build them with the same helpers, and only the
+database calls differ. `list_events` has no sync counterpart: its streams are
+only served with LIVE_UPDATES.
+"""
+import asyncio
+import json
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render
+from django.template.defaultfilters import floatformat
+from django.utils import translation
+
+from server.decorators import (
+    aget_user, async_cache_control, async_condition, async_login_required, async_require_POST,
+)
+
+from . import cache, events
+from .models import Item, List
+from .pagination import InvalidCursor, apaginate
+from .search import search
+from .views import (
+    ITEMS_ORDER, LISTS_ORDER, StockRequestError, _adjust_redirect, _apply_operations, _list_items,
+    _page_args, _parse_adjustments, _render_list_detail, _render_lists, _stock_response, _totals,
+)
+
+async def _asearch(queryset, query):
+    """
+    Async `search`: finding out if full-text search is available may query
+    the database.
+    """
+    if not query.strip():
+        return queryset
+    return await sync_to_async(search)(queryset, query)
+
+async def _astock_response(request, items, missing, **extra):
+    """
+    Async `_stock_response`.
+    """
+    totals = [list_obj async for list_obj in _totals(items)]
+    return _stock_response(request, items, missing, totals=totals, **extra)
+
+@async_login_required
+@async_cache_control(private=True, no_cache=True)
+@async_condition(etag_func=cache.alists_etag, last_modified_func=cache.alists_last_modified)
+async def lists(request):
+    """
+    Async `inventory.views.lists`.
+    """
+    try:
+        page = await apaginate(
+            await _asearch(List.objects.all(), request.GET.get('q', '')),
+            LISTS_ORDER,
+            **_page_args(request),
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    return _render_lists(request, page, await cache.alists_version())
+
+@async_login_required
+@async_cache_control(private=True, no_cache=True)
+@async_condition(etag_func=cache.alist_detail_etag, last_modified_func=cache.alist_detail_last_modified)
+async def list_detail(request, pk):
+    """
+    Async `inventory.views.list_detail`.
+    """
+    try:
+        list_obj = await List.objects.aget(pk=pk)
+    except List.DoesNotExist as exc:
+        raise Http404('No List matches the given query.') from exc
+
+    try:
+        page = await apaginate(
+            await _asearch(_list_items(list_obj), request.GET.get('q', '')),
+            ITEMS_ORDER,
+            **_page_args(request),
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    return _render_list_detail(request, list_obj, page, await cache.alist_version(list_obj.pk))
+
+async def read_item(request, pk):
+    """
+    Async `inventory.views.ItemReadView`.
+    """
+    try:
+        item = await Item.objects.aget(pk=pk)
+    except Item.DoesNotExist as exc:
+        raise Http404('No Item matches the given query.') from exc
+    # The navbar shows the user, which can't be loaded while rendering
+    await aget_user(request)
+    return render(request, 'crud/read_item.html', {'object': item, 'item': item})
+
+@async_login_required
+async def increase_amount(request, pk):
+    """
+    Async `inventory.views.increase_amount`.
+    """
+    return await _adjust_amount(request, pk, 1)
+
+@async_login_required
+async def decrease_amount(request, pk):
+    """
+    Async `inventory.views.decrease_amount`.
+    """
+    return await _adjust_amount(request, pk, -1)
+
+async def _adjust_amount(request, pk, delta):
+    """
+    Async `inventory.views._adjust_amount`.
+    """
+    items = await sync_to_async(Item.objects.apply_deltas)({pk: delta})
+    return _adjust_redirect(request, pk, items) or await _astock_response(request, items, [])
+
+@async_login_required
+@async_require_POST
+async def adjust_amounts(request):
+    """
+    Async `inventory.views.adjust_amounts`.
+    """
+    try:
+        deltas = _parse_adjustments(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid adjustments'}, status=400)
+
+    items = await sync_to_async(Item.objects.apply_deltas)(deltas)
+    return await _astock_response(request, items, sorted(set(deltas) - set(items)))
+
+@async_login_required
+@async_require_POST
+async def stock_operations(request):
+    """
+    Async `inventory.views.stock_operations`.
+    """
+    try:
+        items, missing, applied = await sync_to_async(_apply_operations)(request.body)
+    except StockRequestError as exc:
+        return JsonResponse({'error': str(exc)}, status=exc.status)
+    return await _astock_response(request, items, missing, applied=applied)
+
+# Seconds between comments sent to keep idle event streams open
+EVENTS_KEEPALIVE = 15
+
+@async_login_required
+async def list_events(request, pk):
+    """
+    Stream the changes of the items of a list as server-sent events.
+
+    Every event is a JSON object with the stock and cost of the changed items,
+    the ids of the deleted ones and the new total of the list (see
+    `events.publish_items`), or `{"reload": true}` if the page fell behind.
+
+    Streams are closed after `settings.EVENTS_STREAM_TIMEOUT` seconds, as Django
+    doesn't notice clients that went away, and browsers reconnect.
+    """
+    if not await List.objects.filter(pk=pk).aexists():
+        raise Http404('No List matches the given query.')
+
+    response = StreamingHttpResponse(
+        _event_stream(events.list_channel(pk), translation.get_language()),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Not buffered by nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+async def _event_stream(channel, language):
+    """
+    Yields the events of `channel`, with the costs formatted in `language`.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.EVENTS_STREAM_TIMEOUT
+    async with events.get_broker().subscribe(channel) as queue:
+        yield 'retry: 1000\n\n'
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                data = await asyncio.wait_for(queue.get(), min(EVENTS_KEEPALIVE, remaining))
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if 'total' in data:
+                with translation.override(language):
+                    data = {
+                        **data,
+                        'items': {
+                            item_id: {**item, 'cost': floatformat(Decimal(item['cost']), 2)}
+                            for item_id, item in data['items'].items()
+                        },
+                        'total': floatformat(Decimal(data['total']), 2),
+                    }
+            yield f'data: {json.dumps(data)}\n\n'
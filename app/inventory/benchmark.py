@@ -0,0 +1,283 @@
+"""
+Benchmarks of the 'inventory' views.
+
+Seeds synthetic lists and items at a given scale, then requests every view
+through the Django test client and records its latency, number of queries and
+peak allocated memory. Used by the `benchmark` management command and by the
+query count regression tests.
+"""
+import json
+import random
+import statistics
+import time
+import tracemalloc
+import uuid
+from collections import namedtuple
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from .models import Item, List
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'benchmark_baseline.json'
+
+# Private caches for the benchmark, the page cache is cleared between requests
+CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'benchmark-{alias}'}
+    for alias in ('default', 'sessions')
+}
+
+# Scale name: (number of lists, items per list)
+SCALES = {
+    'small': (100, 10),
+    'medium': (20, 1000),
+    'large': (5, 100000),
+}
+
+Fixture = namedtuple('Fixture', ['client', 'list', 'items'])
+
+Result = namedtuple('Result', ['queries', 'median_ms', 'max_ms', 'peak_kb'])
+
+def seed(list_count, items_per_list, seed_value=0):
+    """
+    Creates `list_count` lists of `items_per_list` items each and a user to log in
+    with, and returns the fixture the scenarios run against.
+    """
+    rng = random.Random(seed_value)
+    user = get_user_model().objects.create_user('benchmark', password='benchmark')
+    created = List.objects.bulk_create(
+        List(name=f'List {i}', description=f'Synthetic list number {i}') for i in range(list_count)
+    )
+    for list_obj in created:
+        batch = []
+        for i in range(items_per_list):
+            batch.append(Item(
+                list=list_obj,
+                name=f'Item {i}',
+                description=f'Synthetic item number {i}',
+                price=rng.randint(1, 10000) / 100,
+                amount=rng.randint(0, 10),
+                amount_to_buy=10,
+            ))
+            if len(batch) == 1000:
+                Item.objects.bulk_create(batch)
+                batch = []
+        Item.objects.bulk_create(batch)
+
+    client = Client()
+    client.force_login(user)
+    target = created[0]
+    return Fixture(client, target, list(target.items.values_list('pk', flat=True)[:50]))
+
+def item_data(fixture, **overrides):
+    """
+    Returns valid POST data for the item forms.
+    """
+    return {
+        'name': 'Benchmark item',
+        'description': 'Created by the benchmark',
+        'price': '1.50',
+        'amount': 1,
+        'amount_to_buy': 5,
+        'list_pk': fixture.list.pk,
+        **overrides,
+    }
+
+def new_item(fixture):
+    """
+    Creates an item to update or delete in a scenario.
+    """
+    return Item.objects.create(list=fixture.list, name='Disposable', price=1, amount=0, amount_to_buy=1)
+
+## Scenarios ##
+# Each scenario does its setup and returns the request to measure, as a callable
+
+def lists(fixture):
+    """GET the lists overview."""
+    return lambda: fixture.client.get('/inventory/lists/')
+
+def lists_search(fixture):
+    """Search the lists overview."""
+    return lambda: fixture.client.get('/inventory/lists/', {'q': 'list'})
+
+def list_detail(fixture):
+    """GET the items of a list."""
+    return lambda: fixture.client.get(f'/inventory/lists/{fixture.list.pk}/')
+
+def list_detail_search(fixture):
+    """Search the items of a list."""
+    return lambda: fixture.client.get(f'/inventory/lists/{fixture.list.pk}/', {'q': 'item'})
+
+def list_detail_partial(fixture):
+    """GET the item cards of a list only, as the search box does."""
+    return lambda: fixture.client.get(f'/inventory/lists/{fixture.list.pk}/', {'partial': 1})
+
+def shopping_list(fixture):
+    """GET the items to buy across all lists."""
+    return lambda: fixture.client.get('/inventory/shopping-list/', {'order': 'cost'})
+
+def create_item(fixture):
+    """POST the item creation form."""
+    return lambda: fixture.client.post(f'/inventory/item/create/{fixture.list.pk}/', item_data(fixture))
+
+def read_item(fixture):
+    """GET the details of an item."""
+    return lambda: fixture.client.get(f'/inventory/item/read/{fixture.items[0]}')
+
+def update_item(fixture):
+    """POST the item update form."""
+    return lambda: fixture.client.post(
+        f'/inventory/item/update/{fixture.items[0]}', item_data(fixture, name='Updated item'),
+    )
+
+def delete_item(fixture):
+    """POST the item deletion form."""
+    item = new_item(fixture)
+    return lambda: fixture.client.post(f'/inventory/item/delete/{item.pk}')
+
+def create_list(fixture):
+    """POST the list creation form."""
+    return lambda: fixture.client.post(
+        '/inventory/lists/create/', {'name': 'Benchmark list', 'description': 'Created by the benchmark'},
+    )
+
+def update_list(fixture):
+    """POST the list update form."""
+    return lambda: fixture.client.post(
+        f'/inventory/lists/update/{fixture.list.pk}', {'name': fixture.list.name, 'description': 'Updated'},
+    )
+
+def delete_list(fixture):
+    """POST the list deletion form, for a list of ten items."""
+    list_obj = List.objects.create(name='Disposable')
+    Item.objects.bulk_create(Item(list=list_obj, name=f'Item {i}', price=1) for i in range(10))
+    return lambda: fixture.client.post(f'/inventory/lists/delete/{list_obj.pk}')
+
+def increase_amount(fixture):
+    """Tap the + button of an item without JavaScript."""
+    return lambda: fixture.client.get(f'/inventory/item/increase/{fixture.items[0]}/')
+
+def increase_amount_xhr(fixture):
+    """Tap the + button of an item, updating the page in place."""
+    return lambda: fixture.client.get(
+        f'/inventory/item/increase/{fixture.items[0]}/', HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+    )
+
+def adjust_amounts(fixture):
+    """Send a batch of stock adjustments for up to 50 items."""
+    body = json.dumps({'adjustments': {pk: (-1) ** pk for pk in fixture.items}})
+    return lambda: fixture.client.post(
+        '/inventory/item/adjust/', body, content_type='application/json',
+        HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+    )
+
+def stock_operations(fixture):
+    """Send a batch of stock operations for up to 50 items, as the page does."""
+    def send():
+        body = json.dumps({'operations': [
+            {'id': str(uuid.uuid4()), 'item': pk, 'delta': (-1) ** pk} for pk in fixture.items
+        ]})
+        return fixture.client.post(
+            '/inventory/item/operations/', body, content_type='application/json',
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+    return send
+
+SCENARIOS = [
+    lists, lists_search, list_detail, list_detail_search, list_detail_partial, shopping_list,
+    create_item, read_item, update_item, delete_item,
+    create_list, update_list, delete_list,
+    increase_amount, increase_amount_xhr, adjust_amounts, stock_operations,
+]
+
+def measure(scenario, fixture, repeat=5):
+    """
+    Runs `scenario` `repeat` times for its timings, plus once under
+    `tracemalloc` for its query count and peak memory.
+
+    The cache is cleared before every request, so pages are always rendered
+    from scratch.
+    """
+    timings = []
+    for _ in range(repeat):
+        request = scenario(fixture)
+        cache.clear()
+        start = time.perf_counter()
+        check(scenario, request())
+        timings.append((time.perf_counter() - start) * 1000)
+
+    request = scenario(fixture)
+    cache.clear()
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            check(scenario, request())
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        queries=len(queries),
+        median_ms=round(statistics.median(timings), 2),
+        max_ms=round(max(timings), 2),
+        peak_kb=round(peak / 1024, 1),
+    )
+
+def check(scenario, response):
+    """
+    Raises an AssertionError if a scenario's request failed, including forms
+    rendered again because of invalid data.
+    """
+    if response.status_code >= 400:
+        raise AssertionError(f'{scenario.__name__} returned HTTP {response.status_code}')
+    form = response.context and response.context.get('form')
+    if form is not None and form.errors:
+        raise AssertionError(f'{scenario.__name__} submitted an invalid form: {form.errors.as_json()}')
+
+def run(fixture, repeat=5, scenarios=None):
+    """
+    Measures every scenario and returns a dict of results by scenario name.
+    """
+    return {
+        scenario.__name__: measure(scenario, fixture, repeat)._asdict()
+        for scenario in scenarios or SCENARIOS
+    }
+
+def load_baseline(path=BASELINE_PATH):
+    """
+    Returns the stored baseline, a dict of results by scale and scenario.
+    """
+    try:
+        with open(path, encoding='utf-8') as baseline_file:
+            return json.load(baseline_file)
+    except FileNotFoundError:
+        return {}
+
+def save_baseline(results, path=BASELINE_PATH):
+    """
+    Stores `results` as the baseline, keeping the scales not benchmarked.
+    """
+    baseline = load_baseline(path)
+    baseline.update(results)
+    with open(path, 'w', encoding='utf-8') as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        baseline_file.write('\n')
+
+def regressions(results, baseline):
+    """
+    Returns a message for every scenario making more queries than in the
+    baseline.
+    """
+    messages = []
+    for scale, scenarios in results.items():
+        for name, result in scenarios.items():
+            expected = baseline.get(scale, {}).get(name)
+            if expected and result['queries'] > expected['queries']:
+                messages.append(
+                    f'{scale}/{name}: {result["queries"]} queries, {expected["queries"]} in the baseline'
+                )
+    return messages
@@ -0,0 +1,158 @@
+"""
+Cache versioning for the 'inventory' app.
+
+Every list has a version stamp (the time of its last change) in the cache,
+plus one stamp for the lists overview. Rendered fragments are cached under
+keys that include the stamp, so bumping it with `touch_lists` invalidates them
+without deleting any key. The stamps also drive the ETag/Last-Modified headers
+of the views, letting browsers revalidate pages with a 304.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.middleware.csrf import get_token
+from django.utils.translation import get_language
+
+LISTS_KEY = 'inventory:lists:version'
+
+def list_key(pk):
+    """
+    Returns the cache key of the version stamp of list `pk`.
+    """
+    return f'inventory:list:{pk}:version'
+
+def _version(key):
+    """
+    Returns the stamp stored under `key`, creating it if missing.
+    """
+    version = cache.get(key)
+    if version is None:
+        # `add` keeps a concurrently created stamp
+        cache.add(key, time.time(), timeout=None)
+        version = cache.get(key, time.time())
+    return version
+
+def list_version(pk):
+    """
+    Returns the version stamp of list `pk`.
+    """
+    return _version(list_key(pk))
+
+def lists_version():
+    """
+    Returns the version stamp of the lists overview.
+    """
+    return _version(LISTS_KEY)
+
+def touch_lists(*list_pks, using=DEFAULT_DB_ALIAS):
+    """
+    Marks lists `list_pks` (and so the lists overview) as changed, once the
+    transaction of database `using` commits.
+
+    Bumping the stamps before would let a concurrent request cache the rows
+    not committed yet under the new stamps, stale until the next change.
+    """
+    def touch():
+        now = time.time()
+        stamps = {list_key(pk): now for pk in list_pks}
+        stamps[LISTS_KEY] = now
+        cache.set_many(stamps, timeout=None)
+    transaction.on_commit(touch, using=using)
+
+def etag(request, version):
+    """
+    Returns the ETag of a page rendered for `request` at `version`.
+
+    Pages also depend on the user (navbar), the language and the CSRF token
+    embedded in forms, so those are part of the tag.
+    """
+    # Makes sure the CSRF secret exists, so the tag doesn't change once its cookie is set
+    get_token(request)
+    parts = [
+        repr(version),
+        str(request.user.pk),
+        get_language() or '',
+        request.META['CSRF_COOKIE'],
+    ]
+    return hashlib.md5('|'.join(parts).encode(), usedforsecurity=False).hexdigest()
+
+def last_modified(version):
+    """
+    Converts a version stamp into a datetime for the Last-Modified header.
+    """
+    return datetime.fromtimestamp(version, tz=timezone.utc)
+
+def list_detail_etag(request, pk):
+    """
+    `condition` ETag function of `inventory.views.list_detail`.
+    """
+    return etag(request, list_version(pk))
+
+def list_detail_last_modified(request, pk):
+    """
+    `condition` Last-Modified function of `inventory.views.list_detail`.
+    """
+    return last_modified(list_version(pk))
+
+def lists_etag(request):
+    """
+    `condition` ETag function of `inventory.views.lists`.
+    """
+    return etag(request, lists_version())
+
+def lists_last_modified(request):
+    """
+    `condition` Last-Modified function of `inventory.views.lists`.
+    """
+    return last_modified(lists_version())
+
+# Async counterparts, for `inventory.async_views`
+
+async def _aversion(key):
+    """
+    Async `_version`.
+    """
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time(), timeout=None)
+        version = await cache.aget(key, time.time())
+    return version
+
+async def alist_version(pk):
+    """
+    Async `list_version`.
+    """
+    return await _aversion(list_key(pk))
+
+async def alists_version():
+    """
+    Async `lists_version`.
+    """
+    return await _aversion(LISTS_KEY)
+
+async def alist_detail_etag(request, pk):
+    """
+    Async `list_detail_etag`.
+    """
+    return etag(request, await alist_version(pk))
+
+async def alist_detail_last_modified(request, pk):
+    """
+    Async `list_detail_last_modified`.
+    """
+    return last_modified(await alist_version(pk))
+
+async def alists_etag(request):
+    """
+    Async `lists_etag`.
+    """
+    return etag(request, await alists_version())
+
+async def alists_last_modified(request):
+    """
+    Async `lists_last_modified`.
+    """
+    return last_modified(await alists_version())
@@ -0,0 +1,231 @@
+"""
+Live updates of the list pages.
+
+Changes of items are published to a channel per list (`publish_items`) and
+pushed to the pages showing the list as server-sent events (see
+`async_views.list_events`), which patch their cards in place.
+
+A broker fans the events of a channel out to its subscribers, the open
+streams. `LocalBroker` only reaches the streams of its own process.
+`DatabaseBroker` writes events to a table that every worker process polls, so
+a change made through any worker reaches the streams of all of them.
+`settings.EVENTS_BROKER` selects the class, and any class with the same
+methods can be plugged in (e.g. one on Redis or PostgreSQL's LISTEN/NOTIFY).
+
+Events are only published to channels with subscribers, so changes cost
+nothing more while nobody is watching.
+"""
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Event, List
+
+logger = logging.getLogger(__name__)
+
+# Sent instead of the events a subscriber was too slow to read: the page
+# reloads to show the current state
+RELOAD = {'reload': True}
+
+def list_channel(pk):
+    """
+    Returns the channel of the list `pk`.
+    """
+    return f'list-{pk}'
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """
+    Returns the broker of this process, an instance of `settings.EVENTS_BROKER`.
+    """
+    return import_string(settings.EVENTS_BROKER)()
+
+def _put(queue, data):
+    """
+    Queues `data` for a subscriber, or asks it to reload if it fell behind.
+    """
+    try:
+        queue.put_nowait(data)
+    except asyncio.QueueFull:
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RELOAD)
+
+class LocalBroker:
+    """
+    Fans events out to the subscribers of the same process.
+
+    Events can be published from any thread, and are queued for each
+    subscriber in its event loop.
+    """
+    # Events queued for a subscriber before it's asked to reload
+    max_queued = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {channel: {queue: event loop of the subscriber}}
+        self._subscribers = {}
+
+    def listening(self, channel):
+        """
+        Returns True if events published to `channel` may reach a subscriber.
+        """
+        return bool(self._subscribers.get(channel))
+
+    def channels(self):
+        """
+        Returns the channels with subscribers in this process.
+        """
+        with self._lock:
+            return list(self._subscribers)
+
+    def publish(self, channel, data):
+        """
+        Sends `data`, a JSON serializable dict, to the subscribers of `channel`.
+        """
+        self._deliver(channel, data)
+
+    def _deliver(self, channel, data):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, {}).items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(_put, queue, data)
+            except RuntimeError:
+                # The loop of the subscriber was closed
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        """
+        Subscribes to `channel` for the duration of the `async with` block,
+        yielding an `asyncio.Queue` of the published events.
+        """
+        queue = asyncio.Queue(self.max_queued)
+        with self._lock:
+            self._subscribers.setdefault(channel, {})[queue] = asyncio.get_running_loop()
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                subscribers = self._subscribers[channel]
+                del subscribers[queue]
+                if not subscribers:
+                    del self._subscribers[channel]
+
+class DatabaseBroker(LocalBroker):
+    """
+    Shares events between processes through the `Event` table.
+
+    Publishing inserts a row. Every process with subscribers polls the table
+    every `settings.EVENTS_POLL_INTERVAL` seconds, in a single task, and
+    delivers the new rows to its subscribers. The channels with subscribers
+    are marked in the cache, shared by all processes, so nothing is written
+    for channels nobody watches.
+    """
+    # Seconds a channel stays marked after its process last polled
+    listening_timeout = 30
+    # Seconds events are kept, and between deletions of older ones
+    keep_events = 60
+
+    def __init__(self):
+        super().__init__()
+        self._relay = None
+
+    @staticmethod
+    def _listening_key(channel):
+        return f'events:listening:{channel}'
+
+    def listening(self, channel):
+        return super().listening(channel) or cache.get(self._listening_key(channel)) is not None
+
+    def publish(self, channel, data):
+        Event.objects.create(channel=channel, data=data)
+
+    def _relaying(self):
+        return self._relay is not None and not self._relay.done()
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        # Read before the channel is marked, so no event for it is missed
+        last_id = None
+        if not self._relaying():
+            last_id = (await Event.objects.aaggregate(last_id=Max('pk')))['last_id'] or 0
+        await cache.aset(self._listening_key(channel), True, self.listening_timeout)
+        async with super().subscribe(channel) as queue:
+            if not self._relaying():
+                self._relay = asyncio.create_task(self._run_relay(last_id or 0))
+            yield queue
+
+    async def _run_relay(self, last_id):
+        """
+        Polls the events after `last_id` and delivers them while this process
+        has subscribers.
+        """
+        marked = pruned = time.monotonic()
+        while channels := self.channels():
+            try:
+                new_events = Event.objects.filter(pk__gt=last_id, channel__in=channels)
+                async for event in new_events.order_by('pk'):
+                    last_id = event.pk
+                    self._deliver(event.channel, event.data)
+
+                now = time.monotonic()
+                if now - marked > self.listening_timeout / 3:
+                    keys = {self._listening_key(channel): True for channel in channels}
+                    await cache.aset_many(keys, self.listening_timeout)
+                    marked = now
+                if now - pruned > self.keep_events:
+                    await Event.objects.filter(
+                        created_at__lt=timezone.now() - timedelta(seconds=self.keep_events),
+                    ).adelete()
+                    pruned = now
+            except DatabaseError:
+                logger.warning('Could not read live events', exc_info=True)
+            await asyncio.sleep(settings.EVENTS_POLL_INTERVAL)
+
+def publish_items(items=(), deleted=(), using=DEFAULT_DB_ALIAS):
+    """
+    Publishes the changed and deleted `items` to the channels of their lists,
+    once the current transaction commits.
+
+    Each event holds the stock of the changed items, the ids of the deleted
+    ones and the new total cost of the list. Costs are sent as plain decimals,
+    to be formatted in the language of each page.
+    """
+    broker = get_broker()
+    changed, deleted_ids = {}, {}
+    for item in items:
+        changed.setdefault(item.list_id, {})[str(item.pk)] = {
+            'amount': item.amount,
+            'amount_to_buy': item.amount_to_buy,
+            'cost': str(item.total_cost()),
+        }
+    for item in deleted:
+        deleted_ids.setdefault(item.list_id, []).append(item.pk)
+    list_ids = [
+        list_id for list_id in {*changed, *deleted_ids} if broker.listening(list_channel(list_id))
+    ]
+    if not list_ids:
+        return
+
+    def publish():
+        totals = List.objects.using(using).only('pk', 'total_cost_to_complete')
+        for list_obj in totals.filter(pk__in=list_ids):
+            broker.publish(list_channel(list_obj.pk), {
+                'items': changed.get(list_obj.pk, {}),
+                'deleted': deleted_ids.get(list_obj.pk, []),
+                'total': str(list_obj.total_cost_to_complete),
+            })
+    transaction.on_commit(publish, using=using)
@@ -32,7 +32,7 @@ class ItemForm(forms.ModelForm):
         Meta
         """
         model = Item
-        fields = ['name', 'description', 'price', 'amount', 'amount_to_buy']
+        fields = ['name', 'description', 'price', 'amount', 'amount_to_buy', 'reorder_threshold']
 
         widgets = {
             'price': forms.NumberInput(attrs={
@@ -45,6 +45,11 @@ class ItemForm(forms.ModelForm):
                 'placeholder': _('Units'),
                 'min': '0',
             }),
+            'reorder_threshold': forms.NumberInput(attrs={
+                'class': 'form-control',
+                'placeholder': _('Units'),
+                'min': '0',
+            }),
         }
 
         labels = {
@@ -52,5 +57,23 @@ class ItemForm(forms.ModelForm):
             'description': _('Description'),
             'price': _('Price'),
             'amount': _('Amount'),
-            'amount_to_buy': _('Amount to buy')
+            'amount_to_buy': _('Amount to buy'),
+            'reorder_threshold': _('Reorder threshold'),
         }
+
+class ImportForm(forms.Form):
+    """
+    Form for importing the items of a list from a CSV or JSON file.
+    """
+    file = forms.FileField(
+        label=_('File'),
+        help_text=_(
+            'CSV or JSON with the columns id, name, description, price, amount, amount_to_buy '
+            'and reorder_threshold.'
+        ),
+    )
+    dry_run = forms.BooleanField(
+        label=_('Preview the changes without importing them'),
+        required=False,
+        initial=True,
+    )
@@ -0,0 +1,99 @@
+"""
+Image processing for the 'inventory' app.
+
+Uploaded list images are kept as they are, and downscaled renditions are
+generated next to them (`<name>-<width>w.<ext>`) in WebP and JPEG. Templates
+serve the renditions through `srcset`, so browsers download an image sized for
+the card instead of the original photo.
+"""
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+logger = logging.getLogger(__name__)
+
+# Widths (in pixels) of the generated renditions
+RENDITION_WIDTHS = (320, 640, 960)
+
+# Pillow format and file extension of every generated rendition type
+RENDITION_FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+# Encoder options per Pillow format
+SAVE_OPTIONS = {
+    'WEBP': {'quality': 80, 'method': 4},
+    'JPEG': {'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+def rendition_name(name, width, extension):
+    """
+    Returns the storage name of a rendition of the image stored as `name`.
+    """
+    root, _ = os.path.splitext(name)
+    return f'{root}-{width}w.{extension}'
+
+def _available_formats():
+    """
+    Returns the rendition types supported by the installed Pillow.
+    """
+    return [kind for kind in RENDITION_FORMATS if kind != 'webp' or features.check('webp')]
+
+def generate_renditions(image_field):
+    """
+    Generates the renditions of `image_field` (a FieldFile) in its storage.
+
+    The image is rotated according to its EXIF orientation, converted to RGB
+    and re-encoded without metadata, so EXIF data (GPS, camera...) is stripped.
+    Returns the renditions description stored in `List.image_renditions`, or an
+    empty dict if the file is not a readable image.
+    """
+    storage = image_field.storage
+    try:
+        with image_field.open('rb') as file:
+            with Image.open(file) as original:
+                image = ImageOps.exif_transpose(original).convert('RGB')
+    except (OSError, UnidentifiedImageError):
+        logger.warning('Could not generate renditions for %s', image_field.name, exc_info=True)
+        return {}
+
+    # Never upscale: keep the widths smaller than the original, or just the original width
+    widths = [width for width in RENDITION_WIDTHS if width < image.width] or [image.width]
+
+    renditions = {'source': image_field.name}
+    for kind in _available_formats():
+        pil_format, extension = RENDITION_FORMATS[kind]
+        renditions[kind] = []
+        for width in widths:
+            height = round(image.height * width / image.width)
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **SAVE_OPTIONS[pil_format])
+
+            name = rendition_name(image_field.name, width, extension)
+            if storage.exists(name):
+                storage.delete(name)
+            name = storage.save(name, ContentFile(buffer.getvalue()))
+            renditions[kind].append([width, name])
+    return renditions
+
+def delete_renditions(renditions, storage):
+    """
+    Deletes the rendition files described by `renditions` from `storage`.
+    """
+    for kind in RENDITION_FORMATS:
+        for _, name in renditions.get(kind, []):
+            storage.delete(name)
+
+def srcset(renditions, kind, storage):
+    """
+    Returns the `srcset` attribute value for the renditions of type `kind`.
+    """
+    return ', '.join(
+        f'{storage.url(name)} {width}w' for width, name in renditions.get(kind, [])
+    )
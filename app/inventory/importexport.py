@@ -0,0 +1,234 @@
+"""
+CSV and JSON import and export of the items of a list.
+
+Both directions stream: exports are generated row by row from a database
+iterator, and imports parse the uploaded file incrementally and write it in
+chunks, so lists of any size never sit in memory at once.
+
+Files have one row (CSV) or object (JSON) per item with the fields in
+`FIELDS`. Rows whose `id` is an item of the list update it, the rest create
+new items, so an exported file can be edited and imported back.
+"""
+import codecs
+import csv
+import json
+from collections import namedtuple
+
+from django.db import transaction
+
+from .forms import ItemForm
+from .models import Item
+
+FIELDS = ['id', 'name', 'description', 'price', 'amount', 'amount_to_buy', 'reorder_threshold']
+
+FORMATS = {
+    'csv': 'text/csv',
+    'json': 'application/json',
+}
+
+# Fields compared to tell updated items from unchanged ones
+COMPARED_FIELDS = [field for field in FIELDS if field != 'id']
+
+ImportResult = namedtuple('ImportResult', ['created', 'updated', 'unchanged', 'changes'])
+
+class InvalidImport(ValueError):
+    """
+    Raised when rows of an imported file are invalid. Nothing is imported.
+
+    `errors` has the errors of the first invalid rows, `count` the number of
+    invalid rows.
+    """
+    def __init__(self, errors, count):
+        super().__init__(f'{count} invalid row(s)')
+        self.errors = errors
+        self.count = count
+
+class Echo:
+    """
+    A file-like object returning what is written to it, for `csv.writer`.
+    """
+    def write(self, value):
+        """
+        Returns `value` instead of buffering it.
+        """
+        return value
+
+def export_rows(list_obj, chunk_size=2000):
+    """
+    Yields the items of `list_obj` as tuples of `FIELDS`, without loading
+    them all in memory.
+    """
+    return list_obj.items.order_by('pk').values_list(*FIELDS).iterator(chunk_size=chunk_size)
+
+def export_csv(list_obj):
+    """
+    Yields the lines of the CSV export of `list_obj`.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for row in export_rows(list_obj):
+        yield writer.writerow(row)
+
+def export_json(list_obj):
+    """
+    Yields the JSON export of `list_obj`, an array of objects, in pieces.
+    """
+    yield '['
+    separator = '\n'
+    for row in export_rows(list_obj):
+        item = dict(zip(FIELDS, row))
+        item['price'] = str(item['price'])
+        yield separator + json.dumps(item, ensure_ascii=False)
+        separator = ',\n'
+    yield '\n]\n'
+
+def read_csv(file):
+    """
+    Yields the rows of an uploaded CSV file as dicts.
+    """
+    yield from csv.DictReader(codecs.iterdecode(file, 'utf-8-sig'))
+
+def read_json(file, chunk_size=64 * 1024):
+    """
+    Yields the objects of an uploaded JSON file as dicts.
+
+    Accepts an array of objects or one object per line (JSON Lines), decoding
+    one object at a time from a buffer filled in chunks.
+    """
+    decoder = json.JSONDecoder()
+    reader = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = ''
+    position = 0
+    done = False
+    while True:
+        # Skip whitespace and the punctuation of the array
+        while position < len(buffer) and buffer[position] in ' \t\r\n,[]':
+            position += 1
+
+        try:
+            obj, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if done:
+                if position < len(buffer):
+                    raise
+                return
+            # Read more: the next object may be incomplete
+            chunk = file.read(chunk_size)
+            done = not chunk
+            buffer = buffer[position:] + reader.decode(chunk, final=done)
+            position = 0
+            continue
+
+        if not isinstance(obj, dict):
+            raise json.JSONDecodeError('Expected an object', buffer, position)
+        yield obj
+        position = end
+
+READERS = {
+    'csv': read_csv,
+    'json': read_json,
+}
+
+def file_format(name):
+    """
+    Returns the import format of an uploaded file from its name.
+    """
+    return 'json' if name.lower().endswith(('.json', '.jsonl', '.ndjson')) else 'csv'
+
+def chunks(iterable, size):
+    """
+    Yields lists of up to `size` consecutive elements of `iterable`.
+    """
+    chunk = []
+    for element in iterable:
+        chunk.append(element)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def import_items(
+    list_obj, file, file_type='csv', dry_run=False, chunk_size=500, max_changes=100,
+    max_errors=100,
+):
+    """
+    Creates and updates the items of `list_obj` from an uploaded file.
+
+    Every row is validated with `ItemForm`. Rows are then written with
+    `bulk_create`/`bulk_update` in chunks of `chunk_size`, all in a single
+    transaction: if any row is invalid, `InvalidImport` is raised with the
+    number of invalid rows and the errors of the first `max_errors` of them,
+    and nothing is imported. With `dry_run` nothing is
+    written; the result tells what would change.
+
+    Returns an `ImportResult` with the number of created, updated and
+    unchanged items, and the changes of the first `max_changes` of them.
+    """
+    result = ImportResult(created=0, updated=0, unchanged=0, changes=[])
+    errors = []
+    error_count = 0
+    rows = enumerate(READERS[file_type](file), start=1)
+
+    with transaction.atomic():
+        for chunk in chunks(rows, chunk_size):
+            chunk_errors = []
+            to_create, to_update = _validate_chunk(list_obj, chunk, chunk_errors)
+            # The whole file is validated to count the invalid rows, but
+            # only the errors of the first ones are kept
+            error_count += len(chunk_errors)
+            errors += chunk_errors[:max_errors - len(errors)]
+            for item, changes in to_create + to_update:
+                if changes and len(result.changes) < max_changes:
+                    result.changes.append({'name': item.name, 'id': item.pk, 'changes': changes})
+
+            updated = [item for item, changes in to_update if changes]
+            result = result._replace(
+                created=result.created + len(to_create),
+                updated=result.updated + len(updated),
+                unchanged=result.unchanged + len(to_update) - len(updated),
+            )
+            if error_count or dry_run:
+                # Keep validating to count the errors, but stop writing
+                continue
+
+            Item.objects.bulk_create([item for item, changes in to_create])
+            if updated:
+                Item.objects.bulk_update(updated, COMPARED_FIELDS)
+
+        if error_count:
+            raise InvalidImport(errors, error_count)
+
+    return result
+
+def _validate_chunk(list_obj, chunk, errors):
+    """
+    Validates a chunk of `(line, row)` pairs with `ItemForm`.
+
+    Returns the items to create and to update, each paired with a dict of
+    its changed fields as `[old, new]`. Errors are appended to `errors`.
+    """
+    existing = list_obj.items.in_bulk([
+        int(row['id']) for line, row in chunk if str(row.get('id') or '').isdigit()
+    ])
+    to_create, to_update = [], []
+    for line, row in chunk:
+        instance = existing.get(int(row['id'])) if str(row.get('id') or '').isdigit() else None
+        before = {field: getattr(instance, field) for field in COMPARED_FIELDS} if instance else {}
+
+        form = ItemForm(data={field: row.get(field) for field in COMPARED_FIELDS}, instance=instance)
+        if not form.is_valid():
+            errors.append({'line': line, 'errors': form.errors.get_json_data()})
+            continue
+
+        item = form.save(commit=False)
+        if instance is None:
+            item.list = list_obj
+            to_create.append((item, {field: [None, getattr(item, field)] for field in COMPARED_FIELDS}))
+        else:
+            changes = {
+                field: [before[field], getattr(item, field)]
+                for field in COMPARED_FIELDS if before[field] != getattr(item, field)
+            }
+            to_update.append((item, changes))
+    return to_create, to_update
@@ -0,0 +1,94 @@
+"""
+Management command: benchmark the inventory views.
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from inventory import benchmark
+
+class Command(BaseCommand):
+    """
+    Seeds a throwaway test database at one or more scales and measures the
+    latency, query count and peak memory of every inventory view.
+
+    Results can be stored as the new baseline with --save-baseline, compared
+    to it with --check (failing if any view makes more queries than before),
+    or written to a JSON file with --output to compare releases on the same
+    hardware. Only query counts are compared: timings depend on the machine.
+    """
+    help = 'Measure latency, query count and memory of the inventory views.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', action='append', choices=sorted(benchmark.SCALES),
+            help='Data scale to benchmark, can be repeated (default: small and medium).',
+        )
+        parser.add_argument('--lists', type=int, help='Override the number of lists of every scale.')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed requests per view.')
+        parser.add_argument(
+            '--baseline', default=str(benchmark.BASELINE_PATH), help='Baseline JSON file.',
+        )
+        parser.add_argument(
+            '--save-baseline', action='store_true', help='Store the results as the baseline.',
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Fail if any view makes more queries than in the baseline.',
+        )
+        parser.add_argument('--output', help='Also write the results to this JSON file.')
+
+    def handle(self, *args, **options):
+        results = {}
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            for scale in options['scale'] or ['small', 'medium']:
+                lists, items = benchmark.SCALES[scale]
+                lists = options['lists'] or lists
+                self.stdout.write(f'Benchmarking "{scale}": {lists} lists of {items} items')
+                results[scale] = self.run_scale(lists, items, options['repeat'])
+                self.print_results(results[scale])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                json.dump(results, output_file, indent=2, sort_keys=True)
+
+        if options['check']:
+            messages = benchmark.regressions(results, benchmark.load_baseline(options['baseline']))
+            if messages:
+                raise CommandError('Query count regressions:\n' + '\n'.join(messages))
+            self.stdout.write(self.style.SUCCESS('No query count regressions'))
+
+        if options['save_baseline']:
+            benchmark.save_baseline(results, options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f'Baseline saved to {options["baseline"]}'))
+
+    def run_scale(self, lists, items, repeat):
+        """
+        Seeds the test database and measures every scenario against it, then
+        rolls the data back for the next scale.
+        """
+        with override_settings(CACHES=benchmark.CACHES), transaction.atomic():
+            fixture = benchmark.seed(lists, items)
+            results = benchmark.run(fixture, repeat)
+            transaction.set_rollback(True)
+        return results
+
+    def print_results(self, results):
+        """
+        Writes the results of a scale as a table.
+        """
+        self.stdout.write(
+            f'  {"view":<22}{"queries":>8}{"median ms":>12}{"max ms":>10}{"peak KiB":>11}'
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'  {name:<22}{result["queries"]:>8}{result["median_ms"]:>12}'
+                f'{result["max_ms"]:>10}{result["peak_kb"]:>11}'
+            )
@@ -0,0 +1,53 @@
+"""
+Management command: send the low stock alerts.
+"""
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from inventory import alerts
+
+class Command(BaseCommand):
+    """
+    Sends an alert for every item that fell to its reorder threshold since
+    the last run, to the sinks of `settings.LOW_STOCK_SINKS` (see
+    `inventory.alerts`).
+
+    Runs once, e.g. from cron, or every `--every` seconds until stopped with
+    SIGTERM or SIGINT. Each run only reads the items that crossed their
+    threshold, so it can run often on large inventories.
+    """
+    help = 'Send alerts for the items low on stock.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to use.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500, help='Alerts sent to the sinks at once.',
+        )
+        parser.add_argument(
+            '--every', type=float, default=0,
+            help='Seconds between runs, to keep running instead of running once.',
+        )
+
+    def handle(self, *args, **options):
+        if options['every'] < 0:
+            raise CommandError('--every must not be negative')
+        stopped = threading.Event()
+        if options['every']:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(signum, lambda *args: stopped.set())
+
+        sinks = alerts.get_sinks()
+        while True:
+            alerted, rearmed = alerts.evaluate(
+                sinks, batch_size=options['batch_size'], using=options['database'],
+            )
+            if alerted or rearmed or not options['every']:
+                self.stdout.write(self.style.SUCCESS(
+                    f'{alerted} item(s) alerted, {rearmed} restocked'
+                ))
+            if not options['every'] or stopped.wait(options['every']):
+                break
+            close_old_connections()
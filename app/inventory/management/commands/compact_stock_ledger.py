@@ -0,0 +1,77 @@
+"""
+Management command: fold old stock movements into the daily rollups.
+"""
+import time
+from datetime import datetime, time as day_start, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from inventory.models import DailyStock, StockMovement, StockOperation
+
+class Command(BaseCommand):
+    """
+    Deletes the stock movements older than `--days` days, keeping their
+    totals in `DailyStock`.
+
+    Rollups are maintained as movements are recorded; before deleting a
+    day's movements its rollups are rebuilt from them, so they are exact even
+    if they drifted (e.g. rows edited by hand). Whole days are compacted, in
+    batches of items with a pause in between, so the SQLite write lock is
+    never held for long. Meant to run periodically, e.g. from cron.
+
+    The ids of the stock operations applied before are forgotten too: clients
+    replay their queued operations long before that.
+    """
+    help = 'Delete old stock movements, keeping their daily totals.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=90, help='Days whose movements are kept, today included.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=200, help='Items compacted per transaction.',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help='Seconds to wait between batches, letting other writes through.',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days must be at least 1')
+        cutoff_date = timezone.localdate() - timedelta(days=options['days'] - 1)
+        cutoff = timezone.make_aware(datetime.combine(cutoff_date, day_start.min))
+        old = StockMovement.objects.filter(created_at__lt=cutoff)
+
+        deleted = 0
+        last_item = 0
+        while True:
+            item_ids = list(
+                old.filter(item_id__gt=last_item).order_by('item_id')
+                .values_list('item_id', flat=True).distinct()[:options['batch_size']]
+            )
+            if not item_ids:
+                break
+            with transaction.atomic():
+                movements = old.filter(item_id__in=item_ids).order_by('item_id', 'created_at', 'pk')
+                DailyStock.objects.store(DailyStock.aggregate(movements.iterator()), replace=True)
+                deleted += movements.delete()[0]
+            last_item = item_ids[-1]
+            time.sleep(options['pause'])
+
+        forgotten = 0
+        while True:
+            operation_ids = list(
+                StockOperation.objects.filter(applied_at__lt=cutoff)
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not operation_ids:
+                break
+            forgotten += StockOperation.objects.filter(pk__in=operation_ids).delete()[0]
+            time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{deleted} stock movement(s) compacted, {forgotten} operation id(s) forgotten'
+        ))
@@ -0,0 +1,30 @@
+"""
+Management command: generate the image renditions of every list.
+"""
+from django.core.management.base import BaseCommand
+
+from inventory.models import List
+
+class Command(BaseCommand):
+    """
+    Backfills the responsive renditions of list images uploaded before they
+    were generated automatically, or regenerates all of them with --force.
+    """
+    help = 'Generate the downscaled renditions of list images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Regenerate renditions that are already up to date.',
+        )
+
+    def handle(self, *args, **options):
+        generated = 0
+        for list_obj in List.objects.exclude(image='').exclude(image=None).iterator():
+            if list_obj.has_renditions() and not options['force']:
+                continue
+            list_obj.update_renditions(force=options['force'])
+            generated += 1
+            self.stdout.write(f'Generated renditions for "{list_obj}"')
+
+        self.stdout.write(self.style.SUCCESS(f'{generated} list image(s) processed'))
@@ -0,0 +1,27 @@
+"""
+Management command: rebuild the full-text search index.
+"""
+from django.core.management.base import BaseCommand
+
+from inventory import search
+from inventory.models import Item, List
+
+class Command(BaseCommand):
+    """
+    Rebuilds the FTS5 tables of lists and items from the database rows.
+
+    Needed after writes that bypass model signals (raw SQL, bulk operations).
+    """
+    help = 'Rebuild the full-text search index of lists and items.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to use.')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        for model in (List, Item):
+            if not search.fts_available(model, using):
+                self.stdout.write(f'Full-text search is not available for {model.__name__}')
+                continue
+            search.rebuild_index(model, using)
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt search index for {model.__name__}'))
@@ -0,0 +1,66 @@
+"""
+Management command: repair the counters of the lists.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from inventory.models import List
+
+COUNTERS = ('item_count', 'out_of_stock_count', 'total_cost_to_complete')
+
+class Command(BaseCommand):
+    """
+    Compares the counters stored on every list (items, items out of stock and
+    cost to complete) with the values computed from its items, and sets the
+    ones that drifted.
+
+    The counters are updated along with the items, so they only drift after
+    writes that bypass the model signals (raw SQL, `QuerySet.update`, data
+    edited by hand). Lists are checked in batches, each one in its own
+    transaction. `--check` only reports, and fails if any list drifted.
+    """
+    help = 'Recompute the item counters of the lists that drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Database alias to use.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500, help='Lists checked per transaction.',
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Report the lists that drifted without fixing them.',
+        )
+
+    def handle(self, *args, **options):
+        lists = List.objects.using(options['database'])
+        checked = 0
+        drifted = []
+        last_list = 0
+        while True:
+            with transaction.atomic(using=options['database']):
+                batch = list(
+                    lists.filter(pk__gt=last_list).order_by('pk').with_computed_counts()
+                    .only('pk', *COUNTERS)[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                wrong = [
+                    list_obj.pk for list_obj in batch
+                    if any(
+                        getattr(list_obj, counter) != getattr(list_obj, f'computed_{counter}')
+                        for counter in COUNTERS
+                    )
+                ]
+                if wrong and not options['check']:
+                    lists.filter(pk__in=wrong).recount()
+            drifted += wrong
+            checked += len(batch)
+            last_list = batch[-1].pk
+
+        if drifted and options['check']:
+            raise CommandError(
+                f'{len(drifted)} of {checked} list(s) drifted: {", ".join(map(str, drifted))}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{checked} list(s) checked, {len(drifted)} recounted'
+        ))
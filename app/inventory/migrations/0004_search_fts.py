@@ -0,0 +1,49 @@
+# Full-text search tables, only created on SQLite builds with FTS5
+
+from django.db import migrations
+from django.db.utils import OperationalError
+
+
+TABLES = ('inventory_list', 'inventory_item')
+
+
+def create_fts_tables(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        for table in TABLES:
+            try:
+                cursor.execute(
+                    f'CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts '
+                    f'USING fts5(name, description)'
+                )
+            except OperationalError:
+                # SQLite built without FTS5: search falls back to LIKE
+                return
+            cursor.execute(
+                f'INSERT INTO {table}_fts (rowid, name, description) '
+                f'SELECT id, name, COALESCE(description, \'\') FROM {table}'
+            )
+
+
+def drop_fts_tables(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        for table in TABLES:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_tables, drop_fts_tables),
+    ]
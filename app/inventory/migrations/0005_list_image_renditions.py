@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_search_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_list_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('delta', models.IntegerField()),
+                ('amount', models.IntegerField()),
+                ('source', models.CharField(choices=[('adjust', 'Adjustment'), ('create', 'Item created'), ('update', 'Item updated')], max_length=10)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='inventory.item')),
+                ('list', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movements', to='inventory.list')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyStock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('added', models.PositiveIntegerField(default=0)),
+                ('removed', models.PositiveIntegerField(default=0)),
+                ('movements', models.PositiveIntegerField(default=0)),
+                ('closing_amount', models.IntegerField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stock', to='inventory.item')),
+                ('list', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stock', to='inventory.list')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['list', 'date'], name='dailystock_list_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailystock',
+            constraint=models.UniqueConstraint(fields=('item', 'date'), name='dailystock_item_date_uniq'),
+        ),
+    ]
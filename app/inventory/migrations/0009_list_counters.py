@@ -0,0 +1,54 @@
+# Generated by Django 4.2.30 on 2026-10-18 22:40
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+def count_items(apps, schema_editor):
+    List = apps.get_model('inventory', 'List')
+    Item = apps.get_model('inventory', 'Item')
+    items = Item.objects.using(schema_editor.connection.alias).filter(
+        list=OuterRef('pk'),
+    ).order_by().values('list')
+    cost = ExpressionWrapper(
+        Greatest(F('amount_to_buy') - F('amount'), Value(0)) * F('price'),
+        output_field=DecimalField(max_digits=20, decimal_places=2),
+    )
+
+    def total(queryset, aggregate, default):
+        return Coalesce(Subquery(queryset.annotate(total=aggregate).values('total')), default)
+
+    List.objects.using(schema_editor.connection.alias).update(
+        item_count=total(items, Count('pk'), 0),
+        out_of_stock_count=total(items.filter(amount__lte=0), Count('pk'), 0),
+        total_cost_to_complete=total(items, Sum(cost), Value(Decimal('0.00'))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_live_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='list',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='out_of_stock_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='list',
+            name='total_cost_to_complete',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=20),
+        ),
+        migrations.RunPython(count_items, migrations.RunPython.noop),
+    ]
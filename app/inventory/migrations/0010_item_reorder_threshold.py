@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0009_list_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='low_stock_alerted',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='reorder_threshold',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('amount__lte', models.F('reorder_threshold'))), fields=['id'], name='item_low_stock_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('amount__lte', models.F('reorder_threshold')), ('low_stock_alerted', False)), fields=['id'], name='item_low_stock_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(condition=models.Q(('low_stock_alerted', True)), fields=['id'], name='item_low_stock_alerted_idx'),
+        ),
+    ]
@@ -1,13 +1,298 @@
 """
 Models for the 'Inventory' app.
 """
-from django.db import models
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connections, models, router, transaction
+from django.db.models import (
+    Count, DecimalField, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Sum, Value,
+    Window,
+)
+from django.db.models.functions import Coalesce, Greatest, RowNumber
+from django.dispatch import Signal
+from django.utils import timezone
+
+from . import images
+
+# Sent by `ItemQuerySet.apply_deltas` after stock amounts change through plain
+# UPDATEs, which don't send `post_save`. Arguments: `items` (the updated items),
+# `deltas` (`{item_id: requested delta}`) and `using`.
+stock_changed = Signal()
+
+# Sent by `ItemQuerySet.bulk_create`/`bulk_update`, which don't send `post_save`.
+# Arguments: `items` (the saved items), `created` (True for `bulk_create`) and `using`.
+items_bulk_saved = Signal()
+
+def cost_to_complete_expression(prefix=''):
+    """
+    Returns the SQL expression for `max(amount_to_buy - amount, 0) * price`.
+
+    `prefix` allows using it through a relation (e.g. 'items__').
+    """
+    return ExpressionWrapper(
+        Greatest(F(f'{prefix}amount_to_buy') - F(f'{prefix}amount'), Value(0))
+        * F(f'{prefix}price'),
+        output_field=DecimalField(max_digits=20, decimal_places=2),
+    )
+
+def item_counts(amount, amount_to_buy, price, sign=1):
+    """
+    Returns what an item with these values adds to the counters of its list
+    (`sign=-1`: removes): `(items, items out of stock, cost to complete)`.
+    """
+    cost = max(int(amount_to_buy) - int(amount), 0) * Decimal(str(price))
+    return (sign, sign * int(int(amount) <= 0), sign * cost)
+
+class ListQuerySet(models.QuerySet):
+    """QuerySet for inventory lists."""
+
+    def with_computed_counts(self):
+        """
+        Annotates every list with its counters computed from its items, by
+        aggregating them: `computed_item_count`, `computed_out_of_stock_count`
+        and `computed_total_cost_to_complete`.
+        """
+        return self.annotate(
+            computed_total_cost_to_complete=Coalesce(
+                Sum(cost_to_complete_expression('items__')),
+                Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=20, decimal_places=2),
+            ),
+            computed_item_count=Count('items'),
+            computed_out_of_stock_count=Count('items', filter=Q(items__amount__lte=0)),
+        )
+
+    def add_counts(self, changes):
+        """
+        Adds `(list_id, counts)` changes (see `item_counts`) to the counters
+        of the lists, with one UPDATE per list.
+
+        The database does the additions, so concurrent changes are all kept.
+        """
+        totals = {}
+        for list_id, counts in changes:
+            totals[list_id] = tuple(
+                total + count for total, count in zip(totals.get(list_id, (0, 0, 0)), counts)
+            )
+        for list_id, (items, out_of_stock, cost) in totals.items():
+            if items or out_of_stock or cost:
+                self.filter(pk=list_id).update(
+                    item_count=F('item_count') + items,
+                    out_of_stock_count=F('out_of_stock_count') + out_of_stock,
+                    total_cost_to_complete=F('total_cost_to_complete') + cost,
+                )
+
+    def recount(self):
+        """
+        Sets the counters of the lists to the values computed from their
+        items, with a single UPDATE. Returns the number of lists.
+        """
+        items = Item.objects.filter(list=OuterRef('pk')).order_by().values('list')
+
+        def total(queryset, aggregate, default):
+            return Coalesce(Subquery(queryset.annotate(total=aggregate).values('total')), default)
+
+        return self.update(
+            item_count=total(items, Count('pk'), 0),
+            out_of_stock_count=total(items.filter(amount__lte=0), Count('pk'), 0),
+            total_cost_to_complete=total(
+                items, Sum(cost_to_complete_expression()), Value(Decimal('0.00')),
+            ),
+        )
+
+# Items at or below their reorder threshold, and those not alerted yet: the
+# conditions of the partial indexes of `Item`. SQLite only uses a partial index
+# for queries with the same condition, so they filter with these.
+LOW_STOCK = Q(amount__lte=F('reorder_threshold'))
+LOW_STOCK_PENDING = LOW_STOCK & Q(low_stock_alerted=False)
+
+class ItemQuerySet(models.QuerySet):
+    """QuerySet for inventory items."""
+
+    def with_cost_to_complete(self):
+        """
+        Annotates every item with `cost_to_complete`, the SQL equivalent of
+        `Item.total_cost()`.
+        """
+        return self.annotate(cost_to_complete=cost_to_complete_expression())
+
+    def low_stock(self, pending=False):
+        """
+        Filters the items at or below their reorder threshold, or only those
+        not alerted yet with `pending`, with a partial index.
+        """
+        return self.filter(LOW_STOCK_PENDING if pending else LOW_STOCK)
+
+    def to_buy(self, per_list=None, order_by=('name', 'pk')):
+        """
+        Filters the items below their target amount and annotates them with:
+
+        quantity_to_buy: units missing to reach `amount_to_buy`.
+        cost_to_complete: cost of those units.
+        list_name: name of the item's list.
+        list_subtotal: cost to complete all the items to buy of the list.
+        list_to_buy: number of items to buy in the list.
+        grand_total: cost to complete all the items to buy in the queryset.
+
+        The totals are window functions, computed in the same query. With
+        `per_list`, only the first `per_list` items of every list by
+        `order_by` are returned, but the totals still count all of them.
+        """
+        cost = cost_to_complete_expression()
+        queryset = self.filter(amount__lt=F('amount_to_buy')).annotate(
+            quantity_to_buy=ExpressionWrapper(
+                F('amount_to_buy') - F('amount'), output_field=IntegerField(),
+            ),
+            cost_to_complete=cost,
+            list_name=F('list__name'),
+            list_subtotal=Window(Sum(cost), partition_by=[F('list_id')]),
+            list_to_buy=Window(Count('pk'), partition_by=[F('list_id')]),
+            grand_total=Window(Sum(cost)),
+        )
+        if per_list is not None:
+            queryset = queryset.annotate(
+                position=Window(RowNumber(), partition_by=[F('list_id')], order_by=list(order_by)),
+            ).filter(position__lte=per_list)
+        return queryset
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Creates items in bulk and sends `items_bulk_saved`, in the same transaction.
+        """
+        with transaction.atomic(using=self.db, savepoint=False):
+            items = super().bulk_create(objs, *args, **kwargs)
+            items_bulk_saved.send(sender=Item, items=items, created=True, using=self.db)
+        return items
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """
+        Updates items in bulk and sends `items_bulk_saved`, in the same transaction.
+        """
+        objs = list(objs)
+        with transaction.atomic(using=self.db, savepoint=False):
+            updated = super().bulk_update(objs, fields, *args, **kwargs)
+            items_bulk_saved.send(sender=Item, items=objs, created=False, using=self.db)
+        return updated
+
+    def adjust_amount(self, delta):
+        """
+        Adds `delta` (positive or negative) to the stock of every item in the
+        queryset with a single UPDATE, clamping the result at zero in SQL.
+
+        Returns the number of updated rows.
+        """
+        return self.update(amount=Greatest(F('amount') + delta, Value(0)))
+
+    def lock(self):
+        """
+        Takes the write lock of the items, in a transaction that reads them
+        before writing them, with a no-op UPDATE.
+
+        SQLite ignores `select_for_update`: a transaction that reads first
+        fails with "database is locked", without waiting, when it has to write
+        after another one did. Writing first makes it wait for the lock
+        (`busy_timeout`). On PostgreSQL the rows are locked as with
+        `select_for_update`.
+        """
+        return self.update(amount=F('amount'))
+
+    def apply_deltas(self, deltas, locked=False):
+        """
+        Applies many `{item_id: delta}` stock adjustments in one transaction.
+
+        Items sharing the same delta are updated with a single UPDATE. The
+        changes are recorded in the stock ledger and added to the counters of
+        the lists, in the same transaction.
+        Sends `stock_changed`, as these UPDATEs bypass `post_save`.
+        Returns `{item_id: item}` with the updated items that exist, annotated
+        with `cost_to_complete`.
+
+        `locked` skips taking the write lock of the items (see `lock`), when
+        the caller's transaction took it already.
+        """
+        by_delta = {}
+        for item_id, delta in deltas.items():
+            by_delta.setdefault(delta, []).append(item_id)
+
+        with transaction.atomic(using=self.db):
+            if not locked:
+                self.filter(pk__in=deltas.keys()).lock()
+            # The ledger needs the applied deltas, which differ when clamped at zero
+            previous = dict(self.filter(pk__in=deltas.keys()).values_list('pk', 'amount'))
+            for delta, item_ids in by_delta.items():
+                if delta:
+                    self.filter(pk__in=item_ids).adjust_amount(delta)
+            items = {item.pk: item for item in self.filter(pk__in=deltas.keys()).with_cost_to_complete()}
+            StockMovement.objects.using(self.db).record(
+                [(item, item.amount - previous[pk]) for pk, item in items.items()],
+                StockMovement.ADJUST,
+            )
+            List.objects.using(self.db).add_counts(
+                change
+                for pk, item in items.items()
+                for change in (
+                    (item.list_id, item_counts(previous[pk], item.amount_to_buy, item.price, -1)),
+                    (item.list_id, item_counts(item.amount, item.amount_to_buy, item.price)),
+                )
+            )
+
+        if items:
+            stock_changed.send(
+                sender=Item,
+                items=list(items.values()),
+                deltas={pk: deltas[pk] for pk in items},
+                using=self.db,
+            )
+        return items
 
 class List(models.Model):
     """Represents a list of items in the inventory."""
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, db_index=True)
     description = models.TextField()
     image = models.ImageField(upload_to='list_images/', blank=True, null=True)
+    # Downscaled versions of `image`, see `inventory.images.generate_renditions`
+    image_renditions = models.JSONField(default=dict, blank=True, editable=False)
+    # Counters of the items, kept up to date as they change (see `item_counts`)
+    # and repaired by the `recount` command
+    item_count = models.PositiveIntegerField(default=0, editable=False)
+    out_of_stock_count = models.PositiveIntegerField(default=0, editable=False)
+    total_cost_to_complete = models.DecimalField(
+        max_digits=20, decimal_places=2, default=Decimal('0.00'), editable=False,
+    )
+
+    objects = ListQuerySet.as_manager()
+
+    def has_renditions(self):
+        """Returns True if renditions were generated for the current image."""
+        return bool(self.image) and self.image_renditions.get('source') == self.image.name
+
+    def update_renditions(self, force=False):
+        """
+        Generates the renditions of the current image, or removes them if the
+        image was cleared. Does nothing if they are up to date unless `force`.
+        """
+        if self.has_renditions() and not force:
+            return
+
+        if self.image_renditions:
+            images.delete_renditions(self.image_renditions, self.image.storage)
+
+        self.image_renditions = images.generate_renditions(self.image) if self.image else {}
+        # Plain UPDATE: the renditions are derived data and must not trigger `post_save`
+        List.objects.filter(pk=self.pk).update(image_renditions=self.image_renditions)
+
+    def webp_srcset(self):
+        """Returns the `srcset` of the WebP renditions."""
+        return images.srcset(self.image_renditions, 'webp', self.image.storage)
+
+    def jpeg_srcset(self):
+        """Returns the `srcset` of the JPEG renditions."""
+        return images.srcset(self.image_renditions, 'jpeg', self.image.storage)
+
+    def thumbnail_url(self):
+        """Returns the URL of the smallest JPEG rendition."""
+        return self.image.storage.url(self.image_renditions['jpeg'][0][1])
 
     def __str__(self):
         return self.name
@@ -20,6 +305,7 @@ class Item(models.Model):
         description (str, optional): A brief description of the item.
         amount (int): The current stock amount of the item.
         amount_to_buy (int): The desired stock amount of the item.
+        reorder_threshold (int, optional): Amount at or below which the item is low on stock.
         price (Decimal, optional): The price of the item. Can be null or blank.
         list (ForeignKey): The associated list for the item.
 
@@ -28,23 +314,85 @@ class Item(models.Model):
         decrease_amount(amount): Decreases the amount in stock without going below zero.
         total_cost(): Calculates the total cost to reach the desired stock amount.
     """
-    name = models.CharField(max_length=255)
+    name = models.CharField(max_length=255, db_index=True)
     description = models.CharField(max_length=255, null=True, blank=True)
     amount = models.IntegerField(default=0)
     amount_to_buy = models.IntegerField(default=0)
+    reorder_threshold = models.PositiveIntegerField(null=True, blank=True)
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     list = models.ForeignKey(List, on_delete=models.CASCADE, related_name='items')
+    # Whether the current crossing of `reorder_threshold` was alerted, see `inventory.alerts`
+    low_stock_alerted = models.BooleanField(default=False, editable=False)
+
+    objects = ItemQuerySet.as_manager()
+
+    class Meta:
+        """
+        Meta
+        """
+        indexes = [
+            # Serves list_detail, which pages through a list's items by amount
+            models.Index(fields=['list', 'amount', 'id'], name='item_list_amount_idx'),
+            # Only hold the few items low on stock, to alert or alerted,
+            # however many items there are (see `inventory.alerts`)
+            models.Index(fields=['id'], condition=LOW_STOCK, name='item_low_stock_idx'),
+            models.Index(
+                fields=['id'], condition=LOW_STOCK_PENDING, name='item_low_stock_pending_idx',
+            ),
+            models.Index(
+                fields=['id'], condition=Q(low_stock_alerted=True), name='item_low_stock_alerted_idx',
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        item = super().from_db(db, field_names, values)
+        # The stored amount, to record the change in the ledger when saved
+        if 'amount' in field_names:
+            item.loaded_amount = item.amount
+        # What the stored item adds to its list's counters, to update them when saved or deleted
+        if {'list_id', 'amount', 'amount_to_buy', 'price'} <= set(field_names):
+            item.loaded_counts = item.list_counts()
+        return item
+
+    def save(self, *args, **kwargs):
+        # The `post_save` receivers (ledger, list counters) run in the same transaction
+        using = kwargs.get('using') or router.db_for_write(Item, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+    def list_counts(self):
+        """Returns the list of the item and what it adds to its counters."""
+        return self.list_id, item_counts(self.amount, self.amount_to_buy, self.price)
 
     def increase_amount(self, amount):
         """Increases the amount in stock by the given amount."""
-        self.amount += amount
-        self.save()
+        self.refresh_stock(self._apply_delta(amount))
 
     def decrease_amount(self, amount):
         """Decreases the amount in stock by the given amount, ensuring it does not go below zero."""
-        if self.amount > 0:
-            self.amount -= amount
-        self.save()
+        self.refresh_stock(self._apply_delta(-amount))
+
+    def _apply_delta(self, delta):
+        """
+        Applies `delta` to the stock of the item, and returns it as updated.
+
+        Raises `Item.DoesNotExist` if the item was deleted meanwhile.
+        """
+        updated = Item.objects.using(self._state.db).apply_deltas({self.pk: delta})
+        if self.pk not in updated:
+            raise Item.DoesNotExist(f'Item {self.pk} no longer exists.')
+        return updated[self.pk]
+
+    def refresh_stock(self, updated):
+        """
+        Takes the stored amount of `updated`, the same item just adjusted, so
+        saving this one later doesn't count the adjustment again.
+        """
+        # pylint: disable=attribute-defined-outside-init
+        self.amount = updated.amount
+        self.loaded_amount = updated.loaded_amount
+        self.loaded_counts = updated.loaded_counts
 
     def total_cost(self):
         """Calculates the total cost to buy the remaining amount needed to reach `amount_to_buy`."""
@@ -53,3 +401,238 @@ class Item(models.Model):
 
     def __str__(self):
         return self.name
+
+class StockMovementQuerySet(models.QuerySet):
+    """QuerySet for the stock ledger."""
+
+    def record(self, changes, source):
+        """
+        Appends stock movements to the ledger and adds them to the daily
+        rollups, in one transaction.
+
+        `changes` is a list of `(item, delta)` pairs, where `item.amount` is
+        the amount after the movement. Changes with a zero delta are skipped.
+        Returns the created movements.
+        """
+        movements = [
+            StockMovement(
+                item_id=item.pk, list_id=item.list_id, delta=delta, amount=item.amount, source=source,
+            )
+            for item, delta in changes if delta
+        ]
+        if movements:
+            # No savepoint: a failure must roll back the caller's change too
+            with transaction.atomic(using=self.db, savepoint=False):
+                self.bulk_create(movements)
+                DailyStock.objects.using(self.db).add(movements)
+        return movements
+
+class StockMovement(models.Model):
+    """
+    An append-only record of a change to the stock of an item.
+
+    Old movements are folded into `DailyStock` and deleted by the
+    `compact_stock_ledger` command.
+    """
+    ADJUST = 'adjust'
+    CREATE = 'create'
+    UPDATE = 'update'
+    SOURCES = [
+        (ADJUST, 'Adjustment'),
+        (CREATE, 'Item created'),
+        (UPDATE, 'Item updated'),
+    ]
+
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='movements')
+    # Denormalized from the item, for the history of a whole list
+    list = models.ForeignKey(List, on_delete=models.CASCADE, related_name='movements')
+    delta = models.IntegerField()
+    # Stock of the item after the movement
+    amount = models.IntegerField()
+    source = models.CharField(max_length=10, choices=SOURCES)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    objects = StockMovementQuerySet.as_manager()
+
+    def __str__(self):
+        return f'{self.item_id}: {self.delta:+d}'
+
+class DailyStockQuerySet(models.QuerySet):
+    """QuerySet for the daily stock rollups."""
+
+    def add(self, movements):
+        """
+        Adds `movements` to the rollups of their item and day.
+        """
+        self.store(DailyStock.aggregate(movements), replace=False)
+
+    def store(self, rollups, replace=False):
+        """
+        Inserts or updates `rollups` with a single upsert statement.
+
+        By default the counts are added to the existing ones, so concurrent
+        writers never lose an increment; with `replace` they are overwritten.
+        """
+        if not rollups:
+            return
+        connection = connections[self.db]
+        table = connection.ops.quote_name(DailyStock._meta.db_table)
+        columns = ['item_id', 'list_id', 'date', 'added', 'removed', 'movements', 'closing_amount']
+        counts = {
+            column: f'excluded.{column}' if replace else f'{table}.{column} + excluded.{column}'
+            for column in ('added', 'removed', 'movements')
+        }
+        # Supported by SQLite and PostgreSQL
+        placeholders = ', '.join(['%s'] * len(columns))
+        sql = (
+            f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({placeholders}) '
+            f'ON CONFLICT (item_id, date) DO UPDATE SET '
+            f'added = {counts["added"]}, removed = {counts["removed"]}, '
+            f'movements = {counts["movements"]}, closing_amount = excluded.closing_amount'
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, [[rollup[column] for column in columns] for rollup in rollups])
+
+    def since(self, days):
+        """
+        Filters the rollups of the last `days` days, today included.
+        """
+        return self.filter(date__gt=timezone.localdate() - timedelta(days=days))
+
+    def per_day(self):
+        """
+        Sums the rollups of every day, e.g. for the history of a list.
+        """
+        return self.values('date').annotate(
+            added=Sum('added'), removed=Sum('removed'), movements=Sum('movements'),
+        ).order_by('date')
+
+    def consumption(self):
+        """
+        Sums the units removed and added per item.
+        """
+        return self.values('item').annotate(removed=Sum('removed'), added=Sum('added'))
+
+class DailyStock(models.Model):
+    """
+    The stock movements of an item during a day, maintained incrementally
+    as movements are recorded, and the item's stock at the end of the day.
+
+    History and consumption queries read this table instead of the ledger.
+    """
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='daily_stock')
+    list = models.ForeignKey(List, on_delete=models.CASCADE, related_name='daily_stock')
+    date = models.DateField()
+    added = models.PositiveIntegerField(default=0)
+    removed = models.PositiveIntegerField(default=0)
+    movements = models.PositiveIntegerField(default=0)
+    closing_amount = models.IntegerField()
+
+    objects = DailyStockQuerySet.as_manager()
+
+    class Meta:
+        """
+        Meta
+        """
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'date'], name='dailystock_item_date_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['list', 'date'], name='dailystock_list_date_idx'),
+        ]
+
+    @staticmethod
+    def aggregate(movements):
+        """
+        Returns the rollups of `movements`, which must be in chronological
+        order, as dicts of column values.
+        """
+        rollups = {}
+        for movement in movements:
+            date = timezone.localdate(movement.created_at)
+            rollup = rollups.setdefault((movement.item_id, date), {
+                'item_id': movement.item_id,
+                'list_id': movement.list_id,
+                'date': date,
+                'added': 0,
+                'removed': 0,
+                'movements': 0,
+            })
+            rollup['added'] += max(movement.delta, 0)
+            rollup['removed'] += max(-movement.delta, 0)
+            rollup['movements'] += 1
+            rollup['closing_amount'] = movement.amount
+        return list(rollups.values())
+
+    def __str__(self):
+        return f'{self.item_id} on {self.date}'
+
+class StockOperationQuerySet(models.QuerySet):
+    """QuerySet for the applied stock operations."""
+
+    def apply(self, operations):
+        """
+        Applies stock operations at most once each, in one transaction.
+
+        `operations` is a list of `(operation_id, item_id, delta)`, with ids
+        generated by the client. Operations already applied are skipped, so
+        clients can safely send them again after a lost response. Returns the
+        items of all the operations, as `ItemQuerySet.apply_deltas`, and the
+        ids of the operations applied now.
+
+        Raises `IntegrityError` when a concurrent request applies one of the
+        operations first; retrying then skips it.
+        """
+        with transaction.atomic(using=self.db):
+            # Write before reading which operations were applied, see `ItemQuerySet.lock`
+            item_ids = {item_id for operation_id, item_id, delta in operations}
+            Item.objects.using(self.db).filter(pk__in=item_ids).lock()
+            ids = [operation_id for operation_id, item_id, delta in operations]
+            done = set(self.filter(pk__in=ids).values_list('pk', flat=True))
+            new = {}
+            deltas = {}
+            for operation_id, item_id, delta in operations:
+                deltas.setdefault(item_id, 0)
+                if operation_id not in done and operation_id not in new:
+                    new[operation_id] = (item_id, delta)
+                    deltas[item_id] += delta
+
+            # Items whose operations were all applied before get a zero delta, to be returned too
+            items = Item.objects.using(self.db).apply_deltas(deltas, locked=True)
+            applied = [
+                StockOperation(pk=operation_id, item_id=item_id, delta=delta)
+                for operation_id, (item_id, delta) in new.items() if item_id in items
+            ]
+            self.bulk_create(applied)
+        return items, [operation.pk for operation in applied]
+
+class StockOperation(models.Model):
+    """
+    A stock change sent by a client with its own id, remembered to apply it
+    only once when the client retries it (e.g. replays from offline use).
+
+    Forgotten after a while by the `compact_stock_ledger` command.
+    """
+    id = models.CharField(primary_key=True, max_length=64)
+    item = models.ForeignKey(Item, on_delete=models.CASCADE, related_name='operations')
+    delta = models.IntegerField()
+    applied_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    objects = StockOperationQuerySet.as_manager()
+
+    def __str__(self):
+        return self.id
+
+class Event(models.Model):
+    """
+    A live update published through `inventory.events.DatabaseBroker`, read
+    by every worker process to push it to its subscribers.
+
+    Only kept for a minute: the brokers delete older events as they poll.
+    """
+    channel = models.CharField(max_length=64)
+    data = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f'{self.channel} #{self.pk}'
@@ -0,0 +1,123 @@
+"""
+Keyset (cursor) pagination for the 'inventory' app.
+
+Instead of OFFSET, every page filters on the ordering values of the last row
+of the previous page, so fetching a page costs the same no matter how deep it
+is, as long as an index covers the ordering.
+"""
+import base64
+import binascii
+import json
+from collections import namedtuple
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+KeysetPage = namedtuple('KeysetPage', ['items', 'next_cursor'])
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor can't be decoded."""
+
+def encode_cursor(values):
+    """
+    Encodes ordering values into an opaque, URL-safe cursor.
+    """
+    data = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, size):
+    """
+    Decodes a cursor produced by `encode_cursor` holding `size` values.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error) as exc:
+        raise InvalidCursor(cursor) from exc
+
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor(cursor)
+    return values
+
+def _clean_values(model, ordering, values, cursor):
+    """
+    Converts the values of a decoded cursor to the types of their ordering
+    fields, so a forged cursor is an `InvalidCursor` and not a failing query.
+    """
+    cleaned = []
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        if value is None or isinstance(value, (list, dict)):
+            raise InvalidCursor(cursor)
+        try:
+            model_field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        except FieldDoesNotExist:
+            # Annotations, compared as they are
+            cleaned.append(value)
+            continue
+        try:
+            value = model_field.to_python(value)
+        except ValidationError as exc:
+            raise InvalidCursor(cursor) from exc
+        # Out of range integers fail the query on SQLite
+        if isinstance(value, int) and not -2 ** 63 <= value < 2 ** 63:
+            raise InvalidCursor(cursor)
+        cleaned.append(value)
+    return cleaned
+
+def _after(ordering, values):
+    """
+    Builds the filter selecting rows strictly after `values` in `ordering`.
+
+    For ordering (a, b, c) this is:
+    a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+def _page_queryset(queryset, ordering, cursor, page_size):
+    """
+    Returns the rows of the page after `cursor`, plus one to tell if there's more.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = _clean_values(
+            queryset.model, ordering, decode_cursor(cursor, len(ordering)), cursor,
+        )
+        queryset = queryset.filter(_after(ordering, values))
+    return queryset[:page_size + 1]
+
+def _page(items, ordering, page_size):
+    """
+    Builds the `KeysetPage` of the rows fetched by `_page_queryset`.
+    """
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor([getattr(last, field.lstrip('-')) for field in ordering])
+    return KeysetPage(items, next_cursor)
+
+def paginate(queryset, ordering, cursor=None, page_size=50):
+    """
+    Returns the page of `queryset` that follows `cursor`.
+
+    `ordering` must end with a unique field (usually 'pk') so rows are never
+    skipped or repeated.
+    """
+    items = list(_page_queryset(queryset, ordering, cursor, page_size))
+    return _page(items, ordering, page_size)
+
+async def apaginate(queryset, ordering, cursor=None, page_size=50):
+    """
+    Async `paginate`.
+    """
+    items = [obj async for obj in _page_queryset(queryset, ordering, cursor, page_size)]
+    return _page(items, ordering, page_size)
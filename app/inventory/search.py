@@ -0,0 +1,108 @@
+"""
+Search helpers for the 'inventory' app.
+
+Lists and items are searched by name and description. On SQLite builds with
+FTS5, a virtual table per model (`<db_table>_fts`) is kept in sync by the
+signals in `inventory.signals` and used for the lookups; any other setup falls
+back to `icontains` filters.
+"""
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Cache of `{(db alias, fts table): exists}` so introspection runs once per process
+_fts_tables = {}
+
+def fts_table(model):
+    """
+    Returns the name of the FTS5 table backing `model`.
+    """
+    return f'{model._meta.db_table}_fts'
+
+def fts_available(model, using='default'):
+    """
+    Returns True if full-text search can be used for `model`.
+    """
+    if not getattr(settings, 'INVENTORY_SEARCH_FTS', True):
+        return False
+
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+
+    key = (using, fts_table(model))
+    if key not in _fts_tables:
+        with connection.cursor() as cursor:
+            _fts_tables[key] = fts_table(model) in connection.introspection.table_names(cursor)
+    return _fts_tables[key]
+
+def fts_query(query):
+    """
+    Converts free text into an FTS5 query matching every word as a prefix.
+
+    Words are quoted so FTS5 operators typed by users are taken literally.
+    """
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"*' for word in words)
+
+def search(queryset, query):
+    """
+    Filters `queryset` (of List or Item) by `query` on name and description.
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+
+    model = queryset.model
+    match = fts_query(query)
+    if match and fts_available(model, queryset.db):
+        return queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {fts_table(model)} WHERE {fts_table(model)} MATCH %s',
+            (match,),
+        ))
+    return queryset.filter(Q(name__icontains=query) | Q(description__icontains=query))
+
+def index_instance(instance, using='default'):
+    """
+    Adds or refreshes `instance` in its model's FTS table.
+    """
+    model = type(instance)
+    if not fts_available(model, using):
+        return
+
+    table = fts_table(model)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [instance.pk])
+        cursor.execute(
+            f'INSERT INTO {table} (rowid, name, description) VALUES (%s, %s, %s)',
+            [instance.pk, instance.name, instance.description or ''],
+        )
+
+def unindex_instance(instance, using='default'):
+    """
+    Removes `instance` from its model's FTS table.
+    """
+    model = type(instance)
+    if not fts_available(model, using):
+        return
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {fts_table(model)} WHERE rowid = %s', [instance.pk])
+
+def rebuild_index(model, using='default'):
+    """
+    Rebuilds the FTS table of `model` from scratch.
+    """
+    if not fts_available(model, using):
+        return
+
+    table = fts_table(model)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table}')
+        cursor.execute(
+            f'INSERT INTO {table} (rowid, name, description) '
+            f'SELECT id, name, COALESCE(description, \'\') FROM {model._meta.db_table}'
+        )
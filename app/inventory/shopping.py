@@ -0,0 +1,64 @@
+"""
+Shopping list: what needs buying across all the inventory lists.
+
+The list is computed with a single query (see `ItemQuerySet.to_buy`) and
+cached until the stock or the lists change.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache as django_cache
+
+from . import cache
+from .models import Item
+
+# Ordering of the lists, and of the items of each list: by name or by cost
+ORDERINGS = {
+    'list': (('list_name', 'list_id'), ('name', 'pk')),
+    'cost': (('-list_subtotal', 'list_id'), ('-cost_to_complete', 'pk')),
+}
+
+ITEM_FIELDS = ('id', 'name', 'amount', 'amount_to_buy', 'quantity_to_buy', 'price', 'cost_to_complete')
+
+def shopping_list(order='list', per_list=50):
+    """
+    Returns the items to buy grouped by list, with their subtotals and the
+    grand total:
+
+        {'lists': [{'id', 'name', 'subtotal', 'count', 'items': [...]}], 'total': Decimal}
+
+    Only the first `per_list` items of each list are included; `count` is the
+    number of items to buy in the list.
+
+    Cached under the version stamp of the lists overview, which changes with
+    any stock or list change.
+    """
+    key = f'inventory:shopping:{order}:{per_list}:{cache.lists_version()}'
+    result = django_cache.get(key)
+    if result is None:
+        result = build_shopping_list(order, per_list)
+        django_cache.set(key, result)
+    return result
+
+def build_shopping_list(order='list', per_list=50):
+    """
+    Computes the shopping list, see `shopping_list`.
+    """
+    list_ordering, item_ordering = ORDERINGS[order]
+    rows = Item.objects.to_buy(per_list, item_ordering).order_by(*list_ordering, 'position').values(
+        *ITEM_FIELDS, 'list_id', 'list_name', 'list_subtotal', 'list_to_buy', 'grand_total',
+    )
+    groups = []
+    total = Decimal('0.00')
+    for row in rows:
+        # Items of a list are contiguous in both orderings
+        if not groups or groups[-1]['id'] != row['list_id']:
+            groups.append({
+                'id': row['list_id'],
+                'name': row['list_name'],
+                'subtotal': row['list_subtotal'],
+                'count': row['list_to_buy'],
+                'items': [],
+            })
+            total = row['grand_total']
+        groups[-1]['items'].append({field: row[field] for field in ITEM_FIELDS})
+    return {'lists': groups, 'total': total}
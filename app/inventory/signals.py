@@ -0,0 +1,187 @@
+"""
+Signal receivers for the 'inventory' app.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from jobs.queue import enqueue
+
+from . import cache, events, images, search
+from .models import Item, List, StockMovement, items_bulk_saved, stock_changed
+
+@receiver(post_save, sender=List)
+@receiver(post_save, sender=Item)
+def index_for_search(sender, instance, using, **kwargs):
+    """
+    Keeps the full-text search index in sync with saved lists and items.
+    """
+    search.index_instance(instance, using)
+
+@receiver(post_delete, sender=List)
+@receiver(post_delete, sender=Item)
+def unindex_for_search(sender, instance, using, **kwargs):
+    """
+    Removes deleted lists and items from the full-text search index.
+    """
+    search.unindex_instance(instance, using)
+
+@receiver(post_save, sender=List)
+def update_image_renditions(sender, instance, **kwargs):
+    """
+    Queues the generation of the responsive renditions of a list's image
+    after an upload, or their removal after it's cleared.
+    """
+    if (instance.image or instance.image_renditions) and not instance.has_renditions():
+        enqueue('inventory.update_renditions', [instance.pk])
+
+@receiver(post_delete, sender=List)
+def delete_image_renditions(sender, instance, **kwargs):
+    """
+    Removes the renditions of a deleted list's image.
+    """
+    if instance.image_renditions and instance.image:
+        images.delete_renditions(instance.image_renditions, instance.image.storage)
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def invalidate_item_list(sender, instance, using, **kwargs):
+    """
+    Invalidates the cached pages of the list of a saved or deleted item.
+    """
+    cache.touch_lists(instance.list_id, using=using)
+
+@receiver(post_save, sender=List)
+@receiver(post_delete, sender=List)
+def invalidate_list(sender, instance, using, **kwargs):
+    """
+    Invalidates the cached pages of a saved or deleted list.
+    """
+    cache.touch_lists(instance.pk, using=using)
+
+@receiver(stock_changed, sender=Item)
+def invalidate_stock_lists(sender, items, using, **kwargs):
+    """
+    Invalidates the cached pages of the lists whose stock changed.
+    """
+    cache.touch_lists(*{item.list_id for item in items}, using=using)
+
+@receiver(items_bulk_saved, sender=Item)
+def sync_bulk_saved_items(sender, items, using, **kwargs):
+    """
+    Updates the search index and cached pages after items are saved in bulk.
+    """
+    for item in items:
+        # Rows skipped by `ignore_conflicts` have no primary key
+        if item.pk is not None:
+            search.index_instance(item, using)
+    cache.touch_lists(*{item.list_id for item in items}, using=using)
+
+def record_stock_changes(items, created, using):
+    """
+    Records the stock changes of saved items in the ledger.
+
+    The change is the difference with the amount the item was loaded with
+    (see `Item.from_db`); items saved without being loaded are skipped.
+    """
+    changes = []
+    for item in items:
+        previous = 0 if created else getattr(item, 'loaded_amount', None)
+        if item.pk is None or previous is None:
+            continue
+        changes.append((item, item.amount - previous))
+        item.loaded_amount = item.amount
+    source = StockMovement.CREATE if created else StockMovement.UPDATE
+    StockMovement.objects.using(using).record(changes, source)
+
+@receiver(post_save, sender=Item)
+def record_saved_stock(sender, instance, created, raw, using, **kwargs):
+    """
+    Records the stock change of a created or updated item.
+    """
+    if not raw:
+        record_stock_changes([instance], created, using)
+
+@receiver(items_bulk_saved, sender=Item)
+def record_bulk_saved_stock(sender, items, created, using, **kwargs):
+    """
+    Records the stock changes of items saved in bulk.
+    """
+    record_stock_changes(items, created, using)
+
+def count_list_changes(items, using, created=False, deleted=False):
+    """
+    Updates the counters of the lists of saved or deleted items.
+
+    The change is the difference with the values the item was loaded with
+    (see `Item.from_db`); the lists of items saved or deleted without being
+    loaded are recounted instead.
+    """
+    changes = []
+    recount = set()
+    for item in items:
+        if item.pk is None:
+            continue
+        loaded = None if created else getattr(item, 'loaded_counts', None)
+        if not created and loaded is None:
+            recount.add(item.list_id)
+            continue
+        if loaded is not None:
+            list_id, counts = loaded
+            changes.append((list_id, [-count for count in counts]))
+        if not deleted:
+            item.loaded_counts = item.list_counts()
+            changes.append(item.loaded_counts)
+    lists = List.objects.using(using)
+    lists.add_counts(change for change in changes if change[0] not in recount)
+    if recount:
+        lists.filter(pk__in=recount).recount()
+
+@receiver(post_save, sender=Item)
+def count_saved_item(sender, instance, created, raw, using, **kwargs):
+    """
+    Updates the counters of the list of a created or updated item.
+
+    Loaded fixtures carry the counters of their lists already.
+    """
+    if not raw:
+        count_list_changes([instance], using, created=created)
+
+@receiver(post_delete, sender=Item)
+def count_deleted_item(sender, instance, using, origin=None, **kwargs):
+    """
+    Updates the counters of the list of a deleted item, unless it's deleted
+    along with its list.
+    """
+    if isinstance(origin, List) or getattr(origin, 'model', None) is List:
+        return
+    count_list_changes([instance], using, deleted=True)
+
+@receiver(items_bulk_saved, sender=Item)
+def count_bulk_saved_items(sender, items, created, using, **kwargs):
+    """
+    Updates the counters of the lists of items saved in bulk.
+    """
+    count_list_changes(items, using, created=created)
+
+@receiver(post_save, sender=Item)
+def publish_saved_item(sender, instance, raw, using, **kwargs):
+    """
+    Pushes a saved item to the pages showing its list.
+    """
+    if not raw:
+        events.publish_items([instance], using=using)
+
+@receiver(post_delete, sender=Item)
+def publish_deleted_item(sender, instance, using, **kwargs):
+    """
+    Removes a deleted item from the pages showing its list.
+    """
+    events.publish_items(deleted=[instance], using=using)
+
+@receiver(stock_changed, sender=Item)
+@receiver(items_bulk_saved, sender=Item)
+def publish_changed_stock(sender, items, using, **kwargs):
+    """
+    Pushes items adjusted or saved in bulk to the pages showing their lists.
+    """
+    events.publish_items([item for item in items if item.pk is not None], using=using)
@@ -0,0 +1,60 @@
+"""
+Background tasks of the 'inventory' app, run by the job workers (see `jobs.queue`).
+"""
+from csv import Error as CSVError
+
+from django.utils.translation import gettext_lazy as _
+
+from jobs.queue import JobFailed, job_files, task
+
+from . import cache, importexport
+from .models import List
+
+@task('inventory.update_renditions', label=_('Image processing'))
+def update_renditions(list_pk):
+    """
+    Generates the renditions of the image of the list `list_pk`, if it still exists.
+    """
+    list_obj = List.objects.filter(pk=list_pk).first()
+    if list_obj is not None:
+        list_obj.update_renditions()
+        # Renditions are saved with a plain UPDATE, which sends no signal
+        cache.touch_lists(list_pk)
+
+# Imports write everything or nothing: a failure is reported, not retried
+@task(
+    'inventory.import_items', max_attempts=1, label=_('Import items'),
+    result_template='_import_job.html',
+)
+def import_items(list_pk, name, file_type):
+    """
+    Imports the items of the file `name` of `job_files` into the list
+    `list_pk`, and deletes the file.
+
+    Returns the number of created, updated and unchanged items. Fails with
+    the row errors, as `importexport.import_items`, or if the file can't be read.
+    """
+    try:
+        list_obj = List.objects.filter(pk=list_pk).first()
+        if list_obj is None:
+            raise JobFailed('The list was deleted', {'list': None})
+        try:
+            with job_files.open(name, 'rb') as file:
+                result = importexport.import_items(list_obj, file, file_type)
+        except importexport.InvalidImport as exc:
+            raise JobFailed(str(exc), {
+                'list': list_pk, 'row_errors': exc.errors, 'error_count': exc.count,
+            }) from exc
+        except (ValueError, CSVError) as exc:
+            raise JobFailed(f'Unreadable file: {exc}', {
+                'list': list_pk, 'read_error': str(exc),
+            }) from exc
+    finally:
+        job_files.delete(name)
+
+    return {
+        'list': list_pk,
+        'created': result.created,
+        'updated': result.updated,
+        'unchanged': result.unchanged,
+    }
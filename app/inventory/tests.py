@@ -1,6 +1,1004 @@
 """
 Test cases for the 'inventory' app.
 """
-# from django.test import TestCase
+import asyncio
+import importlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache as default_cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import (
+    OperationalError, close_old_connections, connection, connections, transaction,
+)
+from django.db.models import F, Sum
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase, override_settings
+from django.urls import clear_url_caches
+
+from server.testing import TEST_CACHES
+from . import alerts, async_views, benchmark, cache, events, importexport, shopping
+from .models import Event, Item, ItemQuerySet, List, StockMovement, StockOperation
+from .pagination import InvalidCursor, apaginate, encode_cursor, paginate
+
+@override_settings(CACHES=TEST_CACHES)
+class QueryCountTests(TestCase):
+    """
+    Fails when a view makes more queries than in the benchmark baseline.
+
+    Update the baseline with `manage.py benchmark --save-baseline` after an
+    intended change.
+    """
+    def test_query_counts(self):
+        """
+        Runs every benchmark scenario once at the small scale.
+        """
+        lists, items = benchmark.SCALES['small']
+        fixture = benchmark.seed(lists, items)
+        results = {'small': benchmark.run(fixture, repeat=1)}
+        self.assertEqual(benchmark.regressions(results, benchmark.load_baseline()), [])
+
+def run_threads(target, count):
+    """
+    Runs `target(index)` in `count` threads, each with its own connection,
+    and returns the exceptions they raised.
+    """
+    errors = []
+
+    def run(index):
+        try:
+            target(index)
+        except Exception as exc:  # pylint: disable=broad-except
+            errors.append(exc)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    close_old_connections()
+    return errors
+
+@override_settings(CACHES=TEST_CACHES)
+class StockConcurrencyTests(TransactionTestCase):
+    """
+    Stock changes from many requests at once, on the test database file.
+    """
+    def setUp(self):
+        self.list = List.objects.create(name='List')
+        self.items = [
+            Item.objects.create(list=self.list, name=f'Item {index}', amount=50, amount_to_buy=60)
+            for index in range(2)
+        ]
+
+    def assert_ledger_matches(self):
+        """
+        Checks that the movements of every item add up to its amount.
+        """
+        for item in Item.objects.all():
+            total = StockMovement.objects.filter(item=item).aggregate(total=Sum('delta'))['total']
+            self.assertEqual(total, item.amount)
+
+    def test_concurrent_deltas(self):
+        """
+        Concurrent taps wait for each other instead of failing with "database is locked".
+        """
+        def tap(index):
+            for tap_number in range(25):
+                delta = 1 if (index + tap_number) % 3 else -2
+                Item.objects.apply_deltas({item.pk: delta for item in self.items})
+
+        errors = run_threads(tap, 8)
+        self.assertEqual([error for error in errors if isinstance(error, OperationalError)], [])
+        self.assertEqual(errors, [])
+        self.assert_ledger_matches()
+
+    def test_concurrent_replays(self):
+        """
+        A batch of operations sent by many clients at once is applied once.
+        """
+        user = get_user_model().objects.create_user('user', password='password')
+        body = json.dumps({'operations': [
+            {'id': f'op-{item.pk}', 'item': item.pk, 'delta': 3} for item in self.items
+        ]})
+        statuses = []
+
+        def replay(index):
+            client = Client()
+            client.force_login(user)
+            for _ in range(5):
+                response = client.post(
+                    '/inventory/item/operations/', body, content_type='application/json',
+                )
+                statuses.append(response.status_code)
+
+        self.assertEqual(run_threads(replay, 6), [])
+        self.assertEqual(set(statuses), {200})
+        self.assertEqual(sorted(Item.objects.values_list('amount', flat=True)), [53, 53])
+        self.assertEqual(StockOperation.objects.count(), 2)
+        self.assert_ledger_matches()
+
+@override_settings(CACHES=TEST_CACHES)
+class StockOperationTests(TestCase):
+    """
+    Stock operations are applied at most once each.
+    """
+    def setUp(self):
+        self.list = List.objects.create(name='List')
+        self.item = Item.objects.create(list=self.list, name='Item', amount=5, amount_to_buy=10)
+        user = get_user_model().objects.create_user('user', password='password')
+        self.client.force_login(user)
+
+    def send(self, *operations):
+        """
+        POSTs `(operation_id, item_id, delta)` operations.
+        """
+        return self.client.post('/inventory/item/operations/', json.dumps({'operations': [
+            {'id': operation_id, 'item': item_id, 'delta': delta}
+            for operation_id, item_id, delta in operations
+        ]}), content_type='application/json')
+
+    def test_duplicate_ids(self):
+        """
+        Operations sent again, or twice in a batch, are skipped.
+        """
+        response = self.send(('a', self.item.pk, 2), ('a', self.item.pk, 2))
+        self.assertEqual(response.json()['applied'], ['a'])
+        self.assertEqual(response.json()['amounts'], {str(self.item.pk): 7})
+
+        response = self.send(('a', self.item.pk, 2), ('b', self.item.pk, -1))
+        self.assertEqual(response.json()['applied'], ['b'])
+        self.assertEqual(response.json()['amounts'], {str(self.item.pk): 6})
+
+    def test_missing_item(self):
+        """
+        Operations on deleted items are reported and not remembered.
+        """
+        response = self.send(('a', self.item.pk, 1), ('b', 999, 1))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['applied'], ['a'])
+        self.assertEqual(response.json()['missing'], [999])
+        self.assertFalse(StockOperation.objects.filter(pk='b').exists())
+
+    def test_concurrent_duplicate(self):
+        """
+        An operation applied by another request meanwhile is a 409, and the
+        batch is rolled back.
+        """
+        apply_deltas = ItemQuerySet.apply_deltas
+
+        def apply_concurrently(queryset, *args, **kwargs):
+            StockOperation.objects.create(pk='a', item=self.item, delta=2)
+            return apply_deltas(queryset, *args, **kwargs)
+
+        with mock.patch.object(ItemQuerySet, 'apply_deltas', apply_concurrently):
+            response = self.send(('a', self.item.pk, 2))
+        self.assertEqual(response.status_code, 409)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.amount, 5)
+
+@override_settings(CACHES=TEST_CACHES)
+class PaginationTests(TestCase):
+    """
+    Forged cursors are rejected as bad requests.
+    """
+    def setUp(self):
+        self.list = List.objects.create(name='List')
+        Item.objects.create(list=self.list, name='Item', amount=5)
+        user = get_user_model().objects.create_user('user', password='password')
+        self.client.force_login(user)
+
+    def test_forged_cursors(self):
+        """
+        Cursors whose values don't match their ordering fields are a 400.
+        """
+        for url, values in (
+            ('/inventory/lists/', ['abc']),
+            ('/inventory/lists/', [10 ** 30]),
+            (f'/inventory/lists/{self.list.pk}/', [{'a': 1}, 2]),
+            (f'/inventory/lists/{self.list.pk}/', ['abc', 1]),
+            ('/api/lists/', ['abc']),
+            (f'/api/lists/{self.list.pk}/items/', [[1], None]),
+        ):
+            with self.subTest(url=url, values=values):
+                response = self.client.get(url, {'cursor': encode_cursor(values)})
+                self.assertEqual(response.status_code, 400)
+
+    def test_forged_cursors_async(self):
+        """
+        `apaginate` rejects them too, before querying.
+        """
+        for values in (['abc'], [{'a': 1}]):
+            with self.subTest(values=values), self.assertRaises(InvalidCursor):
+                async_to_sync(apaginate)(List.objects.all(), ('pk',), encode_cursor(values))
+
+    def test_cursor(self):
+        """
+        A cursor from a page gives the next one.
+        """
+        item = Item.objects.create(list=self.list, name='Other', amount=7)
+        page = paginate(Item.objects.all(), ('amount', 'pk'), page_size=1)
+        page = paginate(Item.objects.all(), ('amount', 'pk'), page.next_cursor, page_size=1)
+        self.assertEqual(page.items, [item])
+
+@override_settings(CACHES=TEST_CACHES)
+class ListCounterTests(TestCase):
+    """
+    The counters of the lists follow every change of their items.
+    """
+    def setUp(self):
+        self.list = List.objects.create(name='List')
+        self.other = List.objects.create(name='Other')
+        self.item = Item.objects.create(
+            list=self.list, name='Item', amount=2, amount_to_buy=5, price=Decimal('1.50'),
+        )
+
+    def assert_counts(self, list_obj, items, out_of_stock, cost):
+        """
+        Checks the counters of `list_obj`, and that `recount` finds no drift.
+        """
+        list_obj.refresh_from_db()
+        self.assertEqual(
+            (list_obj.item_count, list_obj.out_of_stock_count, list_obj.total_cost_to_complete),
+            (items, out_of_stock, Decimal(cost)),
+        )
+        call_command('recount', check=True, stdout=StringIO())
+
+    def test_create(self):
+        """
+        Created items are counted.
+        """
+        self.assert_counts(self.list, 1, 0, '4.50')
+        Item.objects.create(list=self.list, name='Empty', amount=0, amount_to_buy=1, price=2)
+        self.assert_counts(self.list, 2, 1, '6.50')
+
+    def test_update(self):
+        """
+        Saved changes replace what the item counted for.
+        """
+        self.item.amount = 0
+        self.item.price = Decimal('2.00')
+        self.item.save()
+        self.assert_counts(self.list, 1, 1, '10.00')
+
+        item = Item.objects.get(pk=self.item.pk)
+        item.amount_to_buy = 1
+        item.save()
+        self.assert_counts(self.list, 1, 1, '2.00')
+
+    def test_move(self):
+        """
+        An item moved to another list leaves the counters of the first one.
+        """
+        self.item.list = self.other
+        self.item.save()
+        self.assert_counts(self.list, 0, 0, '0.00')
+        self.assert_counts(self.other, 1, 0, '4.50')
+
+    def test_delete(self):
+        """
+        Deleted items are no longer counted.
+        """
+        Item.objects.create(list=self.list, name='Empty', amount=0, amount_to_buy=1, price=2)
+        self.item.delete()
+        self.assert_counts(self.list, 1, 1, '2.00')
+
+    def test_delete_list(self):
+        """
+        Deleting a list with its items leaves the other lists alone.
+        """
+        Item.objects.create(list=self.other, name='Other', amount=1, amount_to_buy=3, price=1)
+        self.list.delete()
+        self.assertFalse(Item.objects.filter(pk=self.item.pk).exists())
+        self.assert_counts(self.other, 1, 0, '2.00')
+
+    def test_bulk(self):
+        """
+        Items created and updated in bulk are counted.
+        """
+        items = Item.objects.bulk_create([
+            Item(list=self.list, name='Bulk', amount=0, amount_to_buy=2, price=1),
+            Item(list=self.other, name='Bulk', amount=1, amount_to_buy=1, price=1),
+        ])
+        self.assert_counts(self.list, 2, 1, '6.50')
+        self.assert_counts(self.other, 1, 0, '0.00')
+
+        items = list(Item.objects.filter(pk__in=[item.pk for item in items]))
+        for item in items:
+            item.amount_to_buy += 2
+        Item.objects.bulk_update(items, ['amount_to_buy'])
+        self.assert_counts(self.list, 2, 1, '8.50')
+        self.assert_counts(self.other, 1, 0, '2.00')
+
+    def test_adjust_deleted_item(self):
+        """
+        Adjusting the stock of an item deleted meanwhile raises `DoesNotExist`.
+        """
+        item = Item.objects.get(pk=self.item.pk)
+        Item.objects.filter(pk=item.pk).delete()
+        for adjust in (item.increase_amount, item.decrease_amount):
+            with self.subTest(adjust=adjust.__name__), self.assertRaises(Item.DoesNotExist):
+                adjust(1)
+        self.assert_counts(self.list, 0, 0, '0.00')
+
+    def test_apply_deltas_clamped(self):
+        """
+        Amounts clamped at zero count what was applied, not what was asked.
+        """
+        Item.objects.apply_deltas({self.item.pk: -5})
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.amount, 0)
+        self.assert_counts(self.list, 1, 1, '7.50')
+
+        Item.objects.apply_deltas({self.item.pk: 6})
+        self.assert_counts(self.list, 1, 0, '0.00')
+
+class ListSink:
+    """
+    Keeps the alerts sent, or fails with `error`.
+    """
+    def __init__(self, error=None):
+        self.alerts = []
+        self.error = error
+
+    def send(self, sent):
+        """Keeps the `sent` alerts."""
+        if self.error:
+            raise self.error
+        self.alerts += sent
+
+@override_settings(CACHES=TEST_CACHES)
+class LowStockAlertTests(TestCase):
+    """
+    Items are alerted once each time they cross their reorder threshold.
+    """
+    def setUp(self):
+        self.list = List.objects.create(name='List')
+        self.item = Item.objects.create(
+            list=self.list, name='Item', amount=5, amount_to_buy=10, reorder_threshold=3,
+        )
+        Item.objects.create(list=self.list, name='Untracked', amount=0)
+        self.sink = ListSink()
+
+    def evaluate(self, **kwargs):
+        """
+        Runs `alerts.evaluate` into the list sink. Returns the items alerted.
+        """
+        alerted = len(self.sink.alerts)
+        alerts.evaluate([self.sink], **kwargs)
+        return [alert.item_id for alert in self.sink.alerts[alerted:]]
+
+    def test_alert_once(self):
+        """
+        An item is alerted when it crosses its threshold, not on every run.
+        """
+        self.assertEqual(self.evaluate(), [])
+        Item.objects.apply_deltas({self.item.pk: -2})
+        self.assertEqual(self.evaluate(), [self.item.pk])
+        self.assertEqual(self.sink.alerts[0].amount, 3)
+        self.assertEqual(self.evaluate(), [])
+        Item.objects.apply_deltas({self.item.pk: -2})
+        self.assertEqual(self.evaluate(), [])
+
+    def test_rearm(self):
+        """
+        A restocked item is alerted again on its next crossing.
+        """
+        Item.objects.apply_deltas({self.item.pk: -3})
+        self.assertEqual(self.evaluate(), [self.item.pk])
+        Item.objects.apply_deltas({self.item.pk: 5})
+        self.assertEqual(alerts.evaluate([self.sink]), (0, 1))
+        self.assertFalse(Item.objects.get(pk=self.item.pk).low_stock_alerted)
+        Item.objects.apply_deltas({self.item.pk: -5})
+        self.assertEqual(self.evaluate(), [self.item.pk])
+
+    def test_failing_sink(self):
+        """
+        Alerts a sink failed to send are sent again on the next run.
+        """
+        Item.objects.apply_deltas({self.item.pk: -3})
+        with self.assertRaises(ConnectionError):
+            alerts.evaluate([ListSink(), ListSink(ConnectionError('Unreachable'))])
+        self.assertFalse(Item.objects.get(pk=self.item.pk).low_stock_alerted)
+        self.assertEqual(self.evaluate(), [self.item.pk])
+
+    def test_batches(self):
+        """
+        Every pending item is alerted, whatever the batch size.
+        """
+        items = Item.objects.bulk_create([
+            Item(list=self.list, name=f'Low {index}', amount=0, reorder_threshold=1)
+            for index in range(3)
+        ])
+        self.assertEqual(self.evaluate(batch_size=2), [item.pk for item in items])
+
+    def test_file_sink(self):
+        """
+        `FileSink` appends JSON lines.
+        """
+        Item.objects.apply_deltas({self.item.pk: -3})
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'alerts.jsonl')
+            alerts.evaluate([alerts.FileSink(path)])
+            with open(path, encoding='utf-8') as alerts_file:
+                lines = [json.loads(line) for line in alerts_file]
+        self.assertEqual([(line['item_id'], line['amount']) for line in lines], [(self.item.pk, 2)])
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite')
+    def test_query_plans(self):
+        """
+        A run reads the partial indexes, not the whole table.
+        """
+        items = Item.objects.all()
+        for queryset, index in (
+            (items.low_stock(), 'item_low_stock_idx'),
+            (
+                items.low_stock(pending=True).select_related('list').order_by('pk')[:500],
+                'item_low_stock_pending_idx',
+            ),
+            (
+                items.filter(low_stock_alerted=True).exclude(amount__lte=F('reorder_threshold')),
+                'item_low_stock_alerted_idx',
+            ),
+        ):
+            with self.subTest(index=index):
+                self.assertIn(f'inventory_item USING INDEX {index}', queryset.explain())
+
+@override_settings(CACHES=TEST_CACHES)
+class CacheInvalidationTests(TestCase):
+    """
+    Cached pages are revalidated with a 304 until their items change.
+    """
+    def setUp(self):
+        self.list = List.objects.create(name='List')
+        self.item = Item.objects.create(list=self.list, name='Flour', amount=1, amount_to_buy=2)
+        user = get_user_model().objects.create_user('user', password='password')
+        self.client.force_login(user)
+        self.url = f'/inventory/lists/{self.list.pk}/'
+
+    def get(self, etag=None):
+        """
+        GETs the list page, revalidating `etag`.
+        """
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        return self.client.get(self.url, **headers)
+
+    def test_not_modified(self):
+        """
+        A page is a 304 until one of its items changes.
+        """
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.get(etag).status_code, 304)
+        self.assertEqual(self.get(etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.apply_deltas({self.item.pk: 1})
+        self.assertEqual(self.get(etag).status_code, 200)
+
+    def test_touched_on_commit(self):
+        """
+        Stamps change once the change commits, not before.
+        """
+        version = cache.list_version(self.list.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.name = 'Sugar'
+            self.item.save()
+            self.assertEqual(cache.list_version(self.list.pk), version)
+        self.assertNotEqual(cache.list_version(self.list.pk), version)
+
+    def test_save_and_delete(self):
+        """
+        Saving or deleting an item invalidates the cached fragments of its list.
+        """
+        self.assertContains(self.get(), 'Flour')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.name = 'Sugar'
+            self.item.save()
+        response = self.get()
+        self.assertContains(response, 'Sugar')
+        self.assertNotContains(response, 'Flour')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.get(pk=self.item.pk).delete()
+        self.assertNotContains(self.get(), 'Sugar')
+
+@override_settings(CACHES=TEST_CACHES)
+class ImportExportTests(TestCase):
+    """
+    Exported files import back, and invalid files import nothing.
+    """
+    def setUp(self):
+        self.list = List.objects.create(name='List')
+        Item.objects.create(
+            list=self.list, name='Flour', description='Wheat, "00"', price=Decimal('1.25'),
+            amount=2, amount_to_buy=5, reorder_threshold=1,
+        )
+        Item.objects.create(list=self.list, name='Salt', amount=0, amount_to_buy=1)
+        user = get_user_model().objects.create_user('user', password='password')
+        self.client.force_login(user)
+
+    def export(self, file_type):
+        """
+        Returns the export of the list in `file_type`.
+        """
+        response = self.client.get(
+            f'/inventory/lists/{self.list.pk}/export/', {'format': file_type},
+        )
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def items(self, list_obj):
+        """
+        Returns the fields of the items of `list_obj`, but their ids.
+        """
+        return list(list_obj.items.order_by('name').values_list(*importexport.COMPARED_FIELDS))
+
+    def test_round_trip(self):
+        """
+        An export imports back unchanged into its list, and as new items into another.
+        """
+        other = List.objects.create(name='Other')
+        for file_type in importexport.FORMATS:
+            with self.subTest(file_type=file_type):
+                content = self.export(file_type)
+                result = importexport.import_items(self.list, BytesIO(content), file_type)
+                self.assertEqual((result.created, result.updated, result.unchanged), (0, 0, 2))
+
+                other.items.all().delete()
+                result = importexport.import_items(other, BytesIO(content), file_type)
+                self.assertEqual((result.created, result.updated), (2, 0))
+                self.assertEqual(self.items(other), self.items(self.list))
+
+    def test_update(self):
+        """
+        Rows with the id of an item update it.
+        """
+        content = self.export('csv').replace(b'Salt,,0.00,0', b'Salt,,0.00,4')
+        result = importexport.import_items(self.list, BytesIO(content))
+        self.assertEqual((result.created, result.updated, result.unchanged), (0, 1, 1))
+        self.assertEqual(result.changes[0]['changes'], {'amount': [0, 4]})
+        self.assertEqual(self.list.items.get(name='Salt').amount, 4)
+
+    def test_dry_run(self):
+        """
+        A dry run tells what would change, and writes nothing.
+        """
+        content = self.export('csv') + b',Sugar,,2,1,3,\n'
+        result = importexport.import_items(self.list, BytesIO(content), dry_run=True)
+        self.assertEqual((result.created, result.unchanged), (1, 2))
+        self.assertFalse(self.list.items.filter(name='Sugar').exists())
+
+        response = self.client.post(f'/inventory/lists/{self.list.pk}/import/', {
+            'file': SimpleUploadedFile('items.csv', content), 'dry_run': 'on',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].created, 1)
+        self.assertFalse(self.list.items.filter(name='Sugar').exists())
+
+    def test_invalid_rows(self):
+        """
+        Invalid rows roll back the rows written before them, and only the
+        errors of the first ones are kept.
+        """
+        rows = [
+            ','.join(importexport.FIELDS).encode(), b',Sugar,,1,1,2,', b',Rice,,1,2,2,',
+        ] + [b',,,1,x,1,'] * 5
+        with self.assertRaises(importexport.InvalidImport) as raised:
+            importexport.import_items(
+                self.list, BytesIO(b'\n'.join(rows)), chunk_size=2, max_errors=3,
+            )
+        self.assertEqual(raised.exception.count, 5)
+        self.assertEqual([error['line'] for error in raised.exception.errors], [3, 4, 5])
+        self.assertEqual(self.list.items.count(), 2)
+
+def reload_urls():
+    """
+    Imports the URLconf again, as it picks its views from the settings.
+    """
+    for module in ('inventory.urls', 'server.urls'):
+        importlib.reload(sys.modules[module])
+    clear_url_caches()
+
+@override_settings(CACHES=TEST_CACHES)
+class AsyncViewTests(TransactionTestCase):
+    """
+    With ASYNC_VIEWS the async views answer as the sync ones do.
+    """
+    def setUp(self):
+        overrides = override_settings(ASYNC_VIEWS=True)
+        overrides.enable()
+        self.addCleanup(reload_urls)
+        self.addCleanup(overrides.disable)
+        reload_urls()
+
+        self.list = List.objects.create(name='List')
+        self.item = Item.objects.create(
+            list=self.list, name='Flour', amount=3, amount_to_buy=5, price=Decimal('2.00'),
+        )
+        Item.objects.create(list=self.list, name='Sugar', amount=4, amount_to_buy=5)
+        self.user = get_user_model().objects.create_user('user', password='password')
+        self.async_client = AsyncClient()
+        self.async_client.force_login(self.user)
+
+    async def test_login_required(self):
+        """
+        Anonymous users are sent to the login page.
+        """
+        response = await AsyncClient().get('/inventory/lists/')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/users/login/', response['Location'])
+
+    async def test_lists(self):
+        """
+        Lists are paginated, searched and revalidated with a 304.
+        """
+        await List.objects.acreate(name='Other')
+        with self.settings(INVENTORY_PAGE_SIZE=1):
+            response = await self.async_client.get('/inventory/lists/')
+            self.assertIs(response.resolver_match.func, async_views.lists)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['lists'], [self.list])
+            response = await self.async_client.get(
+                '/inventory/lists/', {'cursor': response.context['next_cursor'], 'partial': 1},
+            )
+            self.assertEqual([list_obj.name for list_obj in response.context['lists']], ['Other'])
+            self.assertTemplateUsed(response, '_list_cards.html')
+
+        response = await self.async_client.get('/inventory/lists/', {'q': 'Other'})
+        self.assertEqual([list_obj.name for list_obj in response.context['lists']], ['Other'])
+
+        response = await self.async_client.get('/inventory/lists/')
+        response = await self.async_client.get(
+            '/inventory/lists/', headers={'If-None-Match': response['ETag']},
+        )
+        self.assertEqual(response.status_code, 304)
+        response = await self.async_client.get('/inventory/lists/', {'cursor': 'forged'})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_list_detail(self):
+        """
+        The items of a list come with the total of the list, and a missing
+        list is a 404.
+        """
+        url = f'/inventory/lists/{self.list.pk}/'
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item.name for item in response.context['items']], ['Flour', 'Sugar'])
+        self.assertEqual(response.context['total_global_cost'], Decimal('4.00'))
+
+        response = await self.async_client.get(url, {'q': 'Sugar', 'partial': 1})
+        self.assertEqual([item.name for item in response.context['items']], ['Sugar'])
+        self.assertNotIn('total_global_cost', response.context)
+        self.assertEqual((await self.async_client.get('/inventory/lists/0/')).status_code, 404)
+
+    async def test_adjust_amount(self):
+        """
+        Stock buttons redirect to the list, or answer `fetch` with JSON.
+        """
+        response = await self.async_client.get(f'/inventory/item/increase/{self.item.pk}/')
+        self.assertRedirects(
+            response, f'/inventory/lists/{self.list.pk}/', fetch_redirect_response=False,
+        )
+        response = await self.async_client.get(
+            f'/inventory/item/decrease/{self.item.pk}/',
+            headers={'X-Requested-With': 'XMLHttpRequest'},
+        )
+        data = json.loads(response.content)
+        self.assertEqual(data['amounts'], {str(self.item.pk): 3})
+        self.assertEqual(data['totals'], {str(self.list.pk): '4.00'})
+        response = await self.async_client.get('/inventory/item/increase/0/')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_stock_operations(self):
+        """
+        Operations are applied once, and only POST is accepted.
+        """
+        body = json.dumps({'operations': [{'id': 'op', 'item': self.item.pk, 'delta': 2}]})
+        for applied in (['op'], []):
+            response = await self.async_client.post(
+                '/inventory/item/operations/', body, content_type='application/json',
+            )
+            data = json.loads(response.content)
+            self.assertEqual((data['applied'], data['amounts']), (applied, {str(self.item.pk): 5}))
+
+        response = await self.async_client.post(
+            '/inventory/item/adjust/', json.dumps({'adjustments': {self.item.pk: -1, 0: 1}}),
+            content_type='application/json',
+        )
+        data = json.loads(response.content)
+        self.assertEqual((data['amounts'], data['missing']), ({str(self.item.pk): 4}, [0]))
+        response = await self.async_client.get('/inventory/item/adjust/')
+        self.assertEqual(response.status_code, 405)
+
+@override_settings(CACHES=TEST_CACHES, EVENTS_BROKER='inventory.events.LocalBroker')
+class PublishItemsTests(TestCase):
+    """
+    Changes are published to the channels with subscribers, once committed.
+    """
+    def setUp(self):
+        events.get_broker.cache_clear()
+        self.addCleanup(events.get_broker.cache_clear)
+        self.list = List.objects.create(name='List')
+        self.item = Item.objects.create(
+            list=self.list, name='Flour', amount=1, amount_to_buy=3, price=Decimal('2.00'),
+        )
+        self.unwatched = Item.objects.create(list=List.objects.create(name='Other'), name='Rice')
+
+        broker = events.get_broker()
+        channel = events.list_channel(self.list.pk)
+        for name, patch in (
+            ('listening', lambda listened: listened == channel),
+            ('publish', mock.Mock()),
+        ):
+            patcher = mock.patch.object(broker, name, patch)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.publish = broker.publish
+
+    def test_publish_on_commit(self):
+        """
+        The stock of the changed items and the total of their list are
+        published after the commit.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.apply_deltas({self.item.pk: 1})
+            self.publish.assert_not_called()
+        self.publish.assert_called_once_with(events.list_channel(self.list.pk), {
+            'items': {str(self.item.pk): {'amount': 2, 'amount_to_buy': 3, 'cost': '2.00'}},
+            'deleted': [],
+            'total': '2.00',
+        })
+
+        item_pk = self.item.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.delete()
+        self.assertEqual(self.publish.call_args.args[1]['deleted'], [item_pk])
+
+    def test_rollback(self):
+        """
+        Nothing is published for changes rolled back.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Item.objects.apply_deltas({self.item.pk: 1})
+                transaction.set_rollback(True)
+        self.publish.assert_not_called()
+
+    def test_not_listening(self):
+        """
+        Nothing is published for lists nobody watches.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.apply_deltas({self.unwatched.pk: 1})
+        self.publish.assert_not_called()
+
+@override_settings(CACHES=TEST_CACHES, EVENTS_POLL_INTERVAL=0.01)
+class BrokerTests(TransactionTestCase):
+    """
+    Brokers fan the events of a channel out to its subscribers.
+    """
+    def setUp(self):
+        events.get_broker.cache_clear()
+        self.addCleanup(events.get_broker.cache_clear)
+        # Channels marked as listened to by the previous tests
+        default_cache.clear()
+
+    async def receive(self, queue):
+        """
+        Returns the next event of `queue`, failing after a second.
+        """
+        return await asyncio.wait_for(queue.get(), 1)
+
+    async def assert_fan_out(self, broker):
+        """
+        Events reach every subscriber of their channel, and only them.
+        """
+        async with broker.subscribe('list-1') as first, broker.subscribe('list-1') as second:
+            async with broker.subscribe('list-2') as other:
+                self.assertEqual(sorted(broker.channels()), ['list-1', 'list-2'])
+                self.assertTrue(broker.listening('list-1'))
+                await sync_to_async(broker.publish)('list-1', {'n': 1})
+                self.assertEqual(await self.receive(first), {'n': 1})
+                self.assertEqual(await self.receive(second), {'n': 1})
+                await asyncio.sleep(0.05)
+                self.assertTrue(other.empty())
+        self.assertEqual(broker.channels(), [])
+
+    async def test_local_broker(self):
+        """
+        `LocalBroker` delivers in its process, storing nothing.
+        """
+        broker = events.LocalBroker()
+        await self.assert_fan_out(broker)
+        self.assertFalse(broker.listening('list-1'))
+        self.assertEqual(await Event.objects.acount(), 0)
+
+    async def test_database_broker(self):
+        """
+        `DatabaseBroker` delivers the events stored by any process, and
+        other processes see its channels as listened to.
+        """
+        await self.assert_fan_out(events.DatabaseBroker())
+        self.assertEqual(await Event.objects.acount(), 1)
+        self.assertTrue(events.DatabaseBroker().listening('list-1'))
+        self.assertFalse(events.DatabaseBroker().listening('list-3'))
+
+    async def test_overflow(self):
+        """
+        A subscriber that falls behind gets `RELOAD` instead of the events
+        it missed.
+        """
+        broker = events.LocalBroker()
+        async with broker.subscribe('list-1') as queue:
+            for number in range(broker.max_queued + 1):
+                broker.publish('list-1', {'n': number})
+            await asyncio.sleep(0.05)
+            self.assertEqual(queue.qsize(), 1)
+            self.assertEqual(queue.get_nowait(), events.RELOAD)
+
+    @override_settings(EVENTS_BROKER='inventory.events.DatabaseBroker')
+    async def test_publish_items(self):
+        """
+        Committed changes are only stored for the lists with subscribers.
+        """
+        list_obj = await List.objects.acreate(name='List')
+        item = await Item.objects.acreate(list=list_obj, name='Flour', amount=1)
+        unwatched = await Item.objects.acreate(list=await List.objects.acreate(name='Other'))
+        channel = events.list_channel(list_obj.pk)
+        async with events.get_broker().subscribe(channel) as queue:
+            await sync_to_async(Item.objects.apply_deltas)({item.pk: 1, unwatched.pk: 1})
+            data = await self.receive(queue)
+        self.assertEqual(data['items'][str(item.pk)]['amount'], 2)
+        self.assertEqual([event.channel async for event in Event.objects.all()], [channel])
+
+@override_settings(
+    CACHES=TEST_CACHES,
+    EVENTS_BROKER='inventory.events.LocalBroker',
+    EVENTS_STREAM_TIMEOUT=1,
+)
+class ListEventsTests(TransactionTestCase):
+    """
+    `list_events` streams the events of a list, formatted for the page.
+    """
+    def setUp(self):
+        events.get_broker.cache_clear()
+        self.addCleanup(events.get_broker.cache_clear)
+        overrides = override_settings(ASYNC_VIEWS=True, LIVE_UPDATES=True)
+        overrides.enable()
+        self.addCleanup(reload_urls)
+        self.addCleanup(overrides.disable)
+        reload_urls()
+
+        self.list = List.objects.create(name='List')
+        self.async_client = AsyncClient()
+        self.async_client.force_login(get_user_model().objects.create_user('user'))
+
+    async def test_stream(self):
+        """
+        Costs are formatted in the language of the page.
+        """
+        response = await self.async_client.get(
+            f'/inventory/lists/{self.list.pk}/events/', headers={'Accept-Language': 'es'},
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 1000\n\n')
+
+        events.get_broker().publish(events.list_channel(self.list.pk), {
+            'items': {'1': {'amount': 1, 'amount_to_buy': 2, 'cost': '1.5'}},
+            'deleted': [],
+            'total': '12.5',
+        })
+        data = json.loads((await anext(stream)).removeprefix(b'data: '))
+        self.assertEqual((data['items']['1']['cost'], data['total']), ('1,50', '12,50'))
+        # Only keepalive comments until the stream times out
+        self.assertTrue(all([chunk.startswith(b':') async for chunk in stream]))
+
+    async def test_missing_list(self):
+        """
+        Only existing lists have a stream, and only for logged in users.
+        """
+        response = await self.async_client.get('/inventory/lists/0/events/')
+        self.assertEqual(response.status_code, 404)
+        response = await AsyncClient().get(f'/inventory/lists/{self.list.pk}/events/')
+        self.assertEqual(response.status_code, 302)
+
+@override_settings(CACHES=TEST_CACHES)
+class ShoppingListTests(TestCase):
+    """
+    The shopping list has the items below their target, with the subtotals
+    of their lists and the grand total.
+    """
+    def setUp(self):
+        self.bakery = List.objects.create(name='Bakery')
+        self.flour = Item.objects.create(
+            list=self.bakery, name='Flour', amount=1, amount_to_buy=5, price=Decimal('2.00'),
+        )
+        Item.objects.create(
+            list=self.bakery, name='Sugar', amount=0, amount_to_buy=2, price=Decimal('3.00'),
+        )
+        Item.objects.create(list=self.bakery, name='Salt', amount=5, amount_to_buy=5, price=1)
+        self.dairy = List.objects.create(name='Dairy')
+        Item.objects.create(
+            list=self.dairy, name='Milk', amount=0, amount_to_buy=10, price=Decimal('2.00'),
+        )
+
+    @staticmethod
+    def names(result):
+        """
+        Returns the names of the lists of `result` and of their items.
+        """
+        return [
+            (group['name'], [item['name'] for item in group['items']])
+            for group in result['lists']
+        ]
+
+    def test_rows(self):
+        """
+        Lists and items are sorted by name or by cost, with their totals.
+        """
+        result = shopping.build_shopping_list()
+        self.assertEqual(self.names(result), [('Bakery', ['Flour', 'Sugar']), ('Dairy', ['Milk'])])
+        bakery = result['lists'][0]
+        self.assertEqual(
+            (bakery['id'], bakery['subtotal'], bakery['count']), (self.bakery.pk, 14, 2),
+        )
+        self.assertEqual(bakery['items'][0], {
+            'id': self.flour.pk, 'name': 'Flour', 'amount': 1, 'amount_to_buy': 5,
+            'quantity_to_buy': 4, 'price': Decimal('2.00'), 'cost_to_complete': 8,
+        })
+        self.assertEqual(result['total'], 34)
+
+        result = shopping.build_shopping_list('cost')
+        self.assertEqual(self.names(result), [('Dairy', ['Milk']), ('Bakery', ['Flour', 'Sugar'])])
+
+    def test_per_list(self):
+        """
+        Only the first items of a list are kept, but all of them counted.
+        """
+        result = shopping.build_shopping_list('cost', per_list=1)
+        self.assertEqual(self.names(result), [('Dairy', ['Milk']), ('Bakery', ['Flour'])])
+        self.assertEqual((result['lists'][1]['count'], result['lists'][1]['subtotal']), (2, 14))
+        self.assertEqual(result['total'], 34)
+
+    def test_invalidation(self):
+        """
+        The cached list is served until an item changes.
+        """
+        self.assertEqual(shopping.shopping_list()['total'], 34)
+        with self.assertNumQueries(0):
+            shopping.shopping_list()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.apply_deltas({self.flour.pk: 4})
+        result = shopping.shopping_list()
+        self.assertEqual(self.names(result), [('Bakery', ['Sugar']), ('Dairy', ['Milk'])])
+        self.assertEqual(result['total'], 26)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dairy.delete()
+        self.assertEqual(self.names(shopping.shopping_list()), [('Bakery', ['Sugar'])])
+
+    def test_view(self):
+        """
+        The page shows the list in the order asked for, a known one.
+        """
+        self.client.force_login(get_user_model().objects.create_user('user'))
+        response = self.client.get('/inventory/shopping-list/', {'order': 'cost'})
+        self.assertEqual(self.names(response.context['shopping_list'])[0], ('Dairy', ['Milk']))
+        self.assertContains(response, '34.00')
+        response = self.client.get('/inventory/shopping-list/', {'order': 'price'})
+        self.assertEqual(response.status_code, 400)
@@ -4,20 +4,37 @@ Defines URL patterns for the 'item' application.
 This module maps URL paths to corresponding views in the 'item' app.
 Each path function takes a URL pattern, a view to be called, and an optional name.
 """
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Async versions of the busiest views, for ASGI servers
+fast_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path('', views.redirect_to_lists, name='redirect'),
-    path('item/increase/<int:pk>/', views.increase_amount, name='increase_amount'),
-    path('item/decrease/<int:pk>/', views.decrease_amount, name='decrease_amount'),
+    path('item/increase/<int:pk>/', fast_views.increase_amount, name='increase_amount'),
+    path('item/decrease/<int:pk>/', fast_views.decrease_amount, name='decrease_amount'),
+    path('item/adjust/', fast_views.adjust_amounts, name='adjust_amounts'),
+    path('item/operations/', fast_views.stock_operations, name='stock_operations'),
     path('item/create/<int:pk>/', views.ItemCreateView.as_view(), name='create_item'),
     path('item/update/<int:pk>', views.ItemUpdateView.as_view(), name='update_item'),
-    path('item/read/<int:pk>', views.ItemReadView.as_view(), name='read_item'),
+    path(
+        'item/read/<int:pk>',
+        async_views.read_item if settings.ASYNC_VIEWS else views.ItemReadView.as_view(),
+        name='read_item',
+    ),
     path('item/delete/<int:pk>', views.ItemDeleteView.as_view(), name='delete_item'),
-    path('lists/', views.lists, name='lists'),
-    path('lists/<int:pk>/', views.list_detail, name='list_detail'),
+    path('lists/', fast_views.lists, name='lists'),
+    path('lists/<int:pk>/', fast_views.list_detail, name='list_detail'),
+    path('lists/<int:pk>/export/', views.export_items, name='export_items'),
+    path('lists/<int:pk>/import/', views.import_items, name='import_items'),
+    path('shopping-list/', views.shopping_list, name='shopping_list'),
     path('lists/create/', views.ListCreateView.as_view(), name='create_list'),
     path('lists/update/<int:pk>', views.ListUpdateView.as_view(), name='update_list'),
     path('lists/delete/<int:pk>', views.ListDeleteView.as_view(), name='delete_list'),
 ]
+
+# Server-sent events, only served by async views (see settings.LIVE_UPDATES)
+if settings.LIVE_UPDATES:
+    urlpatterns.append(path('lists/<int:pk>/events/', async_views.list_events, name='list_events'))
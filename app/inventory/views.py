@@ -3,14 +3,31 @@ Views for the 'Inventory' app.
 
 This module handles the logic for managing items in the inventory.
 """
+import json
+from csv import Error as CSVError
+from uuid import uuid4
+
+from django.conf import settings
+from django.db import IntegrityError
 from django.urls import reverse_lazy
+from django.http import Http404, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.template.defaultfilters import floatformat
+from django.template.loader import render_to_string
+from django.utils.translation import gettext as _
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_POST
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
 from django.views.generic.detail import DetailView
 
-from .forms import ItemForm, ListForm
-from .models import Item, List
+from jobs.queue import enqueue, job_files
+
+from . import cache, importexport, shopping
+from .forms import ImportForm, ItemForm, ListForm
+from .models import Item, List, StockOperation
+from .pagination import InvalidCursor, paginate
+from .search import search
 
 def redirect_to_lists(request):
     """
@@ -18,50 +35,327 @@ def redirect_to_lists(request):
     """
     return redirect('/inventory/lists/')
 
+# Keyset orderings of the pages of `lists` and `list_detail`
+LISTS_ORDER = ('pk',)
+ITEMS_ORDER = ('amount', 'pk')
+
+def _list_items(list_obj):
+    """
+    Return the items shown by `list_detail`, with their cost to complete.
+    """
+    return list_obj.items.with_cost_to_complete()
+
+def _page_args(request):
+    """
+    Return the cursor and page size arguments of `paginate` for `request`.
+    """
+    return {'cursor': request.GET.get('cursor'), 'page_size': settings.INVENTORY_PAGE_SIZE}
+
+def _page_context(request, page, cache_version, **context):
+    """
+    Return the template context of a page of results, plus `context`.
+    """
+    return {
+        **context,
+        'next_cursor': page.next_cursor,
+        'query': request.GET.get('q', ''),
+        'first_page': not request.GET.get('cursor'),
+        'cache_version': cache_version,
+    }
+
+def _render_lists(request, page, cache_version):
+    """
+    Render a page of lists, or only their cards with `?partial=1`.
+    """
+    context = _page_context(request, page, cache_version, lists=page.items)
+    template = '_list_cards.html' if request.GET.get('partial') else 'lists.html'
+    return render(request, template, context)
+
+def _render_list_detail(request, list_obj, page, cache_version):
+    """
+    Render a page of the items of `list_obj`, or only their cards with `?partial=1`.
+    """
+    context = _page_context(request, page, cache_version, list=list_obj, items=page.items)
+    if request.GET.get('partial'):
+        return render(request, '_item_cards.html', context)
+
+    context['total_global_cost'] = list_obj.total_cost_to_complete
+    return render(request, 'list_detail.html', context)
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=cache.lists_etag, last_modified_func=cache.lists_last_modified)
 def lists(request):
     """
     Render the list of inventory lists with links to each list's items.
+
+    Supports `?q=` search and `?cursor=` keyset pagination. With `?partial=1`
+    only the cards are rendered, for the search box and "load more" button.
     """
-    lists_obj = List.objects.all()
-    return render(request, 'lists.html', {'lists': lists_obj})
+    try:
+        page = paginate(
+            search(List.objects.all(), request.GET.get('q', '')),
+            LISTS_ORDER,
+            **_page_args(request),
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    return _render_lists(request, page, cache.lists_version())
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=cache.list_detail_etag, last_modified_func=cache.list_detail_last_modified)
 def list_detail(request, pk):
     """
     Render the list of items in a selected inventory list.
+
+    Supports `?q=` search and `?cursor=` keyset pagination. With `?partial=1`
+    only the item cards are rendered, for the search box and "load more" button.
     """
     list_obj = get_object_or_404(List, pk=pk)
-    items = list_obj.items.all().order_by('amount')
+    try:
+        page = paginate(
+            search(_list_items(list_obj), request.GET.get('q', '')),
+            ITEMS_ORDER,
+            **_page_args(request),
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    return _render_list_detail(request, list_obj, page, cache.list_version(list_obj.pk))
 
-    # Calculate the total global cost for items in the list
-    total_global_cost = sum(item.total_cost() for item in items)
+@login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=cache.lists_etag, last_modified_func=cache.lists_last_modified)
+def shopping_list(request):
+    """
+    Render every item below its target amount, grouped by list.
 
-    return render(request, 'list_detail.html', {
-        'list': list_obj,
-        'items': items,
-        'total_global_cost': total_global_cost,
-    })
+    `?order=cost` sorts the lists and their items by cost instead of by name.
+    Long lists show their first items only, with a link to the rest.
+    """
+    order = request.GET.get('order', 'list')
+    if order not in shopping.ORDERINGS:
+        return HttpResponseBadRequest('Unknown order')
+
+    context = {
+        'shopping_list': shopping.shopping_list(order, settings.INVENTORY_PAGE_SIZE),
+        'order': order,
+    }
+    return render(request, 'shopping_list.html', context)
 
 @login_required
 def increase_amount(request, pk):
     """
     Increase the amount of a specific item in the inventory by 1.
     """
-    item = get_object_or_404(Item, pk=pk)
-    list_pk = item.list.pk  # Get the associated List's primary key
-    item.increase_amount(1)
-    return redirect('list_detail', pk=list_pk)
+    return _adjust_amount(request, pk, 1)
 
 @login_required
 def decrease_amount(request, pk):
     """
     Decrease the amount of a specific item in the inventory by 1.
     """
-    item = get_object_or_404(Item, pk=pk)
-    list_pk = item.list.pk  # Get the associated List's primary key
-    item.decrease_amount(1)
-    return redirect('list_detail', pk=list_pk)
+    return _adjust_amount(request, pk, -1)
+
+def _adjust_amount(request, pk, delta):
+    """
+    Apply `delta` to the stock of an item and redirect to its list.
+
+    Requests made with `fetch` (X-Requested-With: XMLHttpRequest) get the
+    updated card and list total instead, see `_stock_response`.
+    """
+    items = Item.objects.apply_deltas({pk: delta})
+    return _adjust_redirect(request, pk, items) or _stock_response(request, items, [])
+
+def _adjust_redirect(request, pk, items):
+    """
+    Return the redirect to the list of the adjusted item `pk`, or None if the
+    request wants the JSON response.
+
+    Raises Http404 if the item doesn't exist.
+    """
+    if pk not in items:
+        raise Http404('No Item matches the given query.')
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return None
+    return redirect('list_detail', pk=items[pk].list_id)
+
+def _totals(items):
+    """
+    Return the lists of `items` with their totals.
+    """
+    list_ids = {item.list_id for item in items.values()}
+    return List.objects.only('pk', 'total_cost_to_complete').filter(pk__in=list_ids)
+
+def _stock_response(request, items, missing, totals=None, **extra):
+    """
+    Return the result of stock adjustments as JSON, for in-place page updates.
+
+    Includes the new amount and rendered card of every item, and the new
+    total cost of their lists (`totals`, queried if not given), plus any
+    `extra` keys.
+    """
+    if totals is None:
+        totals = _totals(items)
+    return JsonResponse({
+        'amounts': {str(item_id): item.amount for item_id, item in items.items()},
+        'cards': {
+            str(item_id): render_to_string('_item_card.html', {'item': item}, request)
+            for item_id, item in items.items()
+        },
+        'totals': {str(list_obj.pk): floatformat(list_obj.total_cost_to_complete, 2) for list_obj in totals},
+        'missing': missing,
+        **extra,
+    })
+
+def _parse_adjustments(body):
+    """
+    Return the `{item_id: delta}` of an `adjust_amounts` request body.
+
+    Raises ValueError if it's invalid.
+    """
+    try:
+        adjustments = json.loads(body)['adjustments']
+        return {int(item_id): int(delta) for item_id, delta in adjustments.items()}
+    except (ValueError, KeyError, TypeError, AttributeError) as exc:
+        raise ValueError('Invalid adjustments') from exc
+
+@login_required
+@require_POST
+def adjust_amounts(request):
+    """
+    Apply many stock adjustments in a single transaction.
+
+    Expects a JSON body like `{"adjustments": {"<item_id>": <delta>, ...}}`
+    and returns the new amount and card of every adjusted item and the new
+    totals of their lists.
+    """
+    try:
+        deltas = _parse_adjustments(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid adjustments'}, status=400)
+
+    items = Item.objects.apply_deltas(deltas)
+    return _stock_response(request, items, sorted(set(deltas) - set(items)))
+
+# Largest batch of operations accepted by `stock_operations`
+MAX_STOCK_OPERATIONS = 1000
+
+def _parse_operations(body):
+    """
+    Return the `(operation_id, item_id, delta)` of a `stock_operations`
+    request body.
+
+    Raises ValueError if it's invalid.
+    """
+    try:
+        operations = [
+            (str(operation['id']), int(operation['item']), int(operation['delta']))
+            for operation in json.loads(body)['operations']
+        ]
+    except (ValueError, KeyError, TypeError) as exc:
+        raise ValueError('Invalid operations') from exc
+    if len(operations) > MAX_STOCK_OPERATIONS or not all(0 < len(op[0]) <= 64 for op in operations):
+        raise ValueError('Invalid operations')
+    return operations
+
+class StockRequestError(ValueError):
+    """
+    A stock request that can't be applied, answered with HTTP `status`.
+    """
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def _apply_operations(body):
+    """
+    Apply the operations of a `stock_operations` request body.
+
+    Returns the adjusted items, the ids of the missing ones and the ids of the
+    operations applied now. Raises StockRequestError if the body is invalid or
+    the operations conflict with a concurrent request.
+    """
+    try:
+        operations = _parse_operations(body)
+    except ValueError as exc:
+        raise StockRequestError('Invalid operations') from exc
+
+    try:
+        items, applied = StockOperation.objects.apply(operations)
+    except IntegrityError as exc:
+        # Applied meanwhile by a concurrent request, retrying skips them
+        raise StockRequestError('Conflicting operations, retry', status=409) from exc
+    missing = sorted({item_id for op_id, item_id, delta in operations} - set(items))
+    return items, missing, applied
+
+@login_required
+@require_POST
+def stock_operations(request):
+    """
+    Apply a batch of stock operations, each at most once.
+
+    Expects a JSON body like
+    `{"operations": [{"id": "<uuid>", "item": <item_id>, "delta": <delta>}, ...]}`
+    where ids are generated by the client, so a batch can be sent again
+    after a lost response or replayed by the service worker after offline
+    use. Returns the same as `adjust_amounts`, plus the ids of the operations
+    applied now (`applied`).
+    """
+    try:
+        items, missing, applied = _apply_operations(request.body)
+    except StockRequestError as exc:
+        return JsonResponse({'error': str(exc)}, status=exc.status)
+    return _stock_response(request, items, missing, applied=applied)
+
+@login_required
+def export_items(request, pk):
+    """
+    Download the items of a list as CSV, or as JSON with `?format=json`.
+
+    The file is streamed as it's generated, so lists of any size can be
+    exported without loading them in memory.
+    """
+    list_obj = get_object_or_404(List, pk=pk)
+    file_type = request.GET.get('format', 'csv')
+    if file_type not in importexport.FORMATS:
+        return HttpResponseBadRequest('Unknown format')
+
+    exporter = importexport.export_json if file_type == 'json' else importexport.export_csv
+    response = StreamingHttpResponse(exporter(list_obj), content_type=importexport.FORMATS[file_type])
+    response['Content-Disposition'] = f'attachment; filename="list-{list_obj.pk}.{file_type}"'
+    return response
+
+@login_required
+def import_items(request, pk):
+    """
+    Create and update the items of a list from an uploaded CSV or JSON file.
+
+    The file is imported by a background job, whose status page the user is
+    sent to. With "dry run" checked the changes are only previewed, right away.
+    """
+    list_obj = get_object_or_404(List, pk=pk)
+    form = ImportForm(request.POST or None, request.FILES or None)
+    context = {'list': list_obj, 'form': form}
+
+    if request.method == 'POST' and form.is_valid():
+        upload = form.cleaned_data['file']
+        file_type = importexport.file_format(upload.name)
+        if not form.cleaned_data['dry_run']:
+            name = job_files.save(f'imports/{uuid4().hex}.{file_type}', upload)
+            job = enqueue(
+                'inventory.import_items', [list_obj.pk, name, file_type], user=request.user,
+            )
+            return redirect('job_detail', pk=job.pk)
+
+        try:
+            context['result'] = importexport.import_items(list_obj, upload, file_type, dry_run=True)
+        except importexport.InvalidImport as exc:
+            context['row_errors'] = exc.errors
+            context['error_count'] = exc.count
+        except (ValueError, CSVError) as exc:
+            form.add_error('file', _('The file could not be read: %(error)s') % {'error': exc})
+
+    return render(request, 'crud/import_items.html', context)
 
 ## CRUD Views for Item ##
 class ItemCreateView(CreateView):
@@ -0,0 +1,22 @@
+"""
+Admin views
+"""
+from django.contrib import admin
+from .models import Job
+
+class JobAdmin(admin.ModelAdmin):
+    """
+    Admin view: Job, read only as jobs are run by the workers.
+    """
+    list_display = ('__str__', 'status', 'attempts', 'created_at', 'finished_at', 'user')
+    list_filter = ('status', 'task')
+    list_select_related = ('user',)
+    date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+admin.site.register(Job, JobAdmin)
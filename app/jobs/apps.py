@@ -0,0 +1,19 @@
+"""
+'jobs' app configuration.
+"""
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+class JobsConfig(AppConfig):
+    """
+    Configuration for the 'jobs' app.
+
+    This app runs slow work (image processing, imports...) in background
+    workers instead of the request. See `jobs.queue`.
+    """
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobs'
+
+    def ready(self):
+        # Register the tasks of every app
+        autodiscover_modules('tasks')
@@ -0,0 +1,42 @@
+"""
+Management command: run the background jobs.
+"""
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+class Command(BaseCommand):
+    """
+    Runs the queued jobs (see `jobs.queue`) in a pool of threads until
+    stopped with SIGTERM or SIGINT, letting the running jobs end.
+
+    Several workers, on one machine or more, can share the queue: run more
+    processes for CPU-bound jobs, or more threads for jobs mostly waiting.
+    """
+    help = 'Run the queued background jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2, help='Jobs run at the same time.')
+        parser.add_argument(
+            '--poll-interval', type=float, default=1, help='Seconds between checks for new jobs.',
+        )
+        parser.add_argument(
+            '--burst', action='store_true', help='Stop once there are no jobs left to run.',
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            threads=options['threads'],
+            poll_interval=options['poll_interval'],
+            timeout=settings.JOBS_TIMEOUT,
+            keep_days=settings.JOBS_KEEP_DAYS,
+        )
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *args: worker.stop())
+
+        self.stdout.write(f'Running jobs with {options["threads"]} thread(s)')
+        count = worker.run(burst=options['burst'])
+        self.stdout.write(self.style.SUCCESS(f'{count} job(s) run'))
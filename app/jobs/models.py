@@ -0,0 +1,120 @@
+"""
+Models for the 'jobs' app.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.db.models import F, Q
+from django.utils import timezone
+
+class JobQuerySet(models.QuerySet):
+    """QuerySet for the background jobs."""
+
+    def visible_to(self, user):
+        """
+        Returns the jobs `user` may see: the ones they queued, or all for staff.
+        """
+        return self if user.is_staff else self.filter(user=user)
+
+    def due(self):
+        """
+        Returns the queued jobs whose time to run has come, oldest first.
+        """
+        return self.filter(status=Job.QUEUED, run_at__lte=timezone.now()).order_by('run_at', 'pk')
+
+    def claim(self, job):
+        """
+        Marks `job` as running, unless another worker claimed it first.
+
+        A conditional UPDATE instead of row locks, which SQLite doesn't have.
+        Returns True if the job was claimed, and updates `job` to match.
+        """
+        now = timezone.now()
+        claimed = self.filter(pk=job.pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, started_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            job.status, job.started_at, job.attempts = Job.RUNNING, now, job.attempts + 1
+        return bool(claimed)
+
+    def claim_due(self, limit):
+        """
+        Claims up to `limit` due jobs. Returns the claimed jobs.
+        """
+        return [job for job in self.due()[:limit] if self.claim(job)]
+
+    def requeue_stale(self, timeout):
+        """
+        Queues again the jobs running for more than `timeout` seconds, whose
+        worker was most likely killed, or fails them after their last attempt.
+        Returns the number of jobs requeued and failed.
+        """
+        cutoff = timezone.now() - timedelta(seconds=timeout)
+        stale = self.filter(status=Job.RUNNING, started_at__lt=cutoff)
+        requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+            status=Job.QUEUED, run_at=timezone.now(),
+        )
+        failed = stale.update(status=Job.FAILED, finished_at=timezone.now(), error='Timed out')
+        return requeued, failed
+
+    def prune(self, days):
+        """
+        Deletes the jobs finished more than `days` days ago.
+        """
+        cutoff = timezone.now() - timedelta(days=days)
+        return self.filter(status__in=[Job.DONE, Job.FAILED], finished_at__lt=cutoff).delete()[0]
+
+class Job(models.Model):
+    """
+    A call of a registered task (`jobs.queue.task`) to run in the background.
+
+    Created by `jobs.queue.enqueue`, claimed and run by the `run_jobs` workers.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    # JSON-serializable positional arguments of the task
+    args = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    # Not run before, set to later times for retries
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # Returned by the task, or given with `JobFailed`
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    # Who queued the job, the only user allowed to see it with staff
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='+',
+    )
+
+    objects = JobQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Polled by every worker: only the queued jobs, a small part of the table
+            models.Index(fields=['run_at'], name='job_queued_run_at', condition=Q(status='queued')),
+            models.Index(fields=['status', 'started_at'], name='job_status_started_at'),
+        ]
+
+    @property
+    def finished(self):
+        """Returns True once the job succeeded or failed for good."""
+        return self.status in (self.DONE, self.FAILED)
+
+    def __str__(self):
+        return f'{self.task} #{self.pk}'
@@ -0,0 +1,99 @@
+"""
+Background jobs.
+
+Apps register their tasks in a `tasks` module with the `task` decorator, and
+queue calls to them with `enqueue`. Jobs are rows of the `Job` table, so a job
+queued in a transaction only exists once it's committed, and nothing but the
+database is needed. Any number of `python manage.py run_jobs` workers (see
+`jobs.worker`) share the queue: each job is claimed with a conditional UPDATE.
+
+A job whose task raises is retried up to `max_attempts` runs in total, after
+`retry_delay` seconds doubled at every attempt. Tasks raise `JobFailed` to fail
+at once, e.g. on invalid input. With `settings.JOBS_EAGER`, jobs run in the
+process that queues them as soon as its transaction commits (development and
+tests, where no worker runs).
+"""
+import logging
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# A registered task.
+#   func: called with the job's arguments, returns its JSON-serializable result
+#   label: name shown on the job's status page
+#   result_template: template showing the result there, with `job` and `result`
+Task = namedtuple('Task', ['func', 'max_attempts', 'retry_delay', 'label', 'result_template'])
+
+TASKS = {}
+
+# Files handed to jobs, e.g. uploads to import. Not in MEDIA_ROOT, which is served
+job_files = FileSystemStorage(location=settings.JOBS_FILES_DIR)
+
+class JobFailed(ValueError):
+    """
+    Raised by a task to fail its job without retrying it. `result` is kept in the job.
+    """
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+def task(name, max_attempts=3, retry_delay=10, label=None, result_template=None):
+    """
+    Registers the decorated function as the task `name`.
+    """
+    def register(func):
+        TASKS[name] = Task(func, max_attempts, retry_delay, label or name, result_template)
+        return func
+    return register
+
+def enqueue(name, args=(), user=None, delay=0):
+    """
+    Queues a call of the task `name` with `args`, in `delay` seconds at the
+    earliest. Returns the job.
+    """
+    if name not in TASKS:
+        raise ValueError(f'Unknown task {name}')
+    job = Job.objects.create(
+        task=name, args=list(args), user=user, max_attempts=TASKS[name].max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    if settings.JOBS_EAGER:
+        transaction.on_commit(lambda: Job.objects.claim(job) and run_job(job))
+    return job
+
+def run_job(job):
+    """
+    Runs a claimed job, and records its result, or its error and whether
+    it's retried.
+    """
+    registered = TASKS.get(job.task)
+    try:
+        if registered is None:
+            raise JobFailed(f'Unknown task {job.task}')
+        job.result = registered.func(*job.args)
+        job.status, job.error = Job.DONE, ''
+    except JobFailed as exc:
+        job.status, job.error, job.result = Job.FAILED, str(exc), exc.result
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.exception('Job %s failed (attempt %d of %d)', job, job.attempts, job.max_attempts)
+        job.error = f'{type(exc).__name__}: {exc}'
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + timedelta(
+                seconds=registered.retry_delay * 2 ** (job.attempts - 1),
+            )
+        else:
+            job.status = Job.FAILED
+
+    if job.finished:
+        job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'run_at', 'finished_at'])
+    return job
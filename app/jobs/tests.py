@@ -0,0 +1,175 @@
+"""
+Test cases for the 'jobs' app.
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .queue import TASKS, JobFailed, Task, enqueue, run_job
+
+def add(first, second):
+    """A task returning the sum of its arguments."""
+    return first + second
+
+def crash():
+    """A task failing on every attempt."""
+    raise RuntimeError('Crashed')
+
+def reject(reason):
+    """A task failing for good."""
+    raise JobFailed(reason, result={'reason': reason})
+
+@override_settings(JOBS_EAGER=False)
+class QueueTests(TestCase):
+    """
+    Jobs are claimed once, retried with a growing delay and cleaned up.
+    """
+    def setUp(self):
+        patcher = mock.patch.dict(TASKS, {
+            'add': Task(add, 3, 10, 'Add', None),
+            'crash': Task(crash, 3, 10, 'Crash', None),
+            'reject': Task(reject, 3, 10, 'Reject', None),
+        })
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_next(self):
+        """
+        Claims and runs the next due job, as a worker does. Returns it.
+        """
+        jobs = Job.objects.claim_due(1)
+        self.assertEqual(len(jobs), 1)
+        return run_job(jobs[0])
+
+    def test_enqueue_unknown_task(self):
+        """
+        Only registered tasks can be queued.
+        """
+        with self.assertRaises(ValueError):
+            enqueue('missing')
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager(self):
+        """
+        Eager jobs run once their transaction commits.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            job = enqueue('add', [2, 3])
+            self.assertEqual(Job.objects.get(pk=job.pk).status, Job.QUEUED)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.attempts), (Job.DONE, 5, 1))
+
+    def test_claim(self):
+        """
+        A job is claimed by one worker only, and not before its time.
+        """
+        job = enqueue('add', [1, 1])
+        later = enqueue('add', [1, 2], delay=60)
+        self.assertTrue(Job.objects.claim(job))
+        self.assertFalse(Job.objects.claim(Job.objects.get(pk=job.pk)))
+        self.assertEqual((job.status, job.attempts), (Job.RUNNING, 1))
+        self.assertEqual(Job.objects.claim_due(10), [])
+
+        Job.objects.filter(pk=later.pk).update(run_at=timezone.now())
+        self.assertEqual(Job.objects.claim_due(10), [later])
+
+    def test_success(self):
+        """
+        The result of the task is kept.
+        """
+        enqueue('add', [2, 2])
+        job = self.run_next()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.error), (Job.DONE, 4, ''))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_retry_backoff(self):
+        """
+        Failing jobs are retried after a delay doubled at every attempt, then failed.
+        """
+        enqueue('crash')
+        for attempt, delay in ((1, 10), (2, 20)):
+            before = timezone.now()
+            with self.assertLogs('jobs.queue', 'ERROR'):
+                job = self.run_next()
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), (Job.QUEUED, attempt))
+            self.assertEqual(job.error, 'RuntimeError: Crashed')
+            self.assertGreaterEqual(job.run_at, before + timedelta(seconds=delay))
+            self.assertLessEqual(job.run_at, timezone.now() + timedelta(seconds=delay))
+            Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            job = self.run_next()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 3))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_job_failed(self):
+        """
+        `JobFailed` fails the job at once, with its result.
+        """
+        enqueue('reject', ['Invalid file'])
+        job = self.run_next()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 1))
+        self.assertEqual((job.error, job.result), ('Invalid file', {'reason': 'Invalid file'}))
+
+    def test_requeue_stale(self):
+        """
+        Jobs running for too long are queued again, or failed after their last attempt.
+        """
+        retried = enqueue('add', [1, 1])
+        last = enqueue('add', [1, 1])
+        running = enqueue('add', [1, 1])
+        for job in (retried, last, running):
+            Job.objects.claim(job)
+        Job.objects.filter(pk=last.pk).update(attempts=3)
+        Job.objects.exclude(pk=running.pk).update(started_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(Job.objects.requeue_stale(600), (1, 1))
+        statuses = dict(Job.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[retried.pk], statuses[last.pk], statuses[running.pk]],
+            [Job.QUEUED, Job.FAILED, Job.RUNNING],
+        )
+        self.assertEqual(Job.objects.get(pk=last.pk).error, 'Timed out')
+
+    def test_prune(self):
+        """
+        Only the jobs finished long enough ago are deleted.
+        """
+        old = timezone.now() - timedelta(days=8)
+        kept = [
+            Job.objects.create(task='add', status=Job.DONE, finished_at=timezone.now()),
+            Job.objects.create(task='add', status=Job.QUEUED, created_at=old),
+        ]
+        Job.objects.create(task='add', status=Job.DONE, finished_at=old)
+        Job.objects.create(task='add', status=Job.FAILED, finished_at=old)
+        self.assertEqual(Job.objects.prune(7), 2)
+        self.assertEqual(list(Job.objects.order_by('pk')), kept)
+
+class JobViewTests(TestCase):
+    """
+    Jobs are only shown to the users who queued them, and to staff.
+    """
+    def setUp(self):
+        users = get_user_model().objects
+        self.owner = users.create_user('owner', password='password')
+        self.other = users.create_user('other', password='password')
+        self.staff = users.create_user('staff', password='password', is_staff=True)
+        self.job = Job.objects.create(task='add', args=[1, 2], user=self.owner)
+
+    def test_visible_to(self):
+        """
+        Other users get a 404 on both the page and the API.
+        """
+        for user, status in ((self.owner, 200), (self.other, 404), (self.staff, 200)):
+            self.client.force_login(user)
+            for url in (f'/jobs/{self.job.pk}/', f'/api/jobs/{self.job.pk}/'):
+                with self.subTest(user=user.username, url=url):
+                    self.assertEqual(self.client.get(url).status_code, status)
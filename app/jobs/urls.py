@@ -0,0 +1,12 @@
+"""
+URL configuration for the 'jobs' app.
+
+Routes:
+    - '<pk>/': Status page of a background job.
+"""
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('<int:pk>/', views.job_detail, name='job_detail'),
+]
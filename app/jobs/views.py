@@ -0,0 +1,23 @@
+"""
+Views for the 'jobs' app.
+"""
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import get_object_or_404, render
+
+from .models import Job
+from .queue import TASKS
+
+@login_required
+def job_detail(request, pk):
+    """
+    Render the status of a background job, and its result once it's finished.
+
+    The page reloads itself until then. Its JSON counterpart is `/api/jobs/<pk>/`.
+    """
+    job = get_object_or_404(Job.objects.visible_to(request.user), pk=pk)
+    context = {
+        'job': job,
+        'task': TASKS.get(job.task),
+        'result': job.result or {},
+    }
+    return render(request, 'job_detail.html', context)
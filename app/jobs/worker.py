@@ -0,0 +1,91 @@
+"""
+Worker running the queued jobs (see `jobs.queue`) in a pool of threads.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.db import close_old_connections
+
+from .models import Job
+from .queue import run_job
+
+logger = logging.getLogger(__name__)
+
+class Worker:
+    """
+    Claims due jobs while it has idle threads, and runs them.
+
+    Every `maintenance_interval` seconds, jobs left running by killed workers
+    for more than `timeout` seconds are queued again, and jobs finished more
+    than `keep_days` days ago are deleted. `stop()` lets the running jobs end
+    and returns from `run()`.
+    """
+    maintenance_interval = 60
+
+    def __init__(self, threads=2, poll_interval=1.0, timeout=600, keep_days=7):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.keep_days = keep_days
+        self.stopping = threading.Event()
+
+    def stop(self):
+        """
+        Asks the worker to stop once its running jobs end.
+        """
+        self.stopping.set()
+
+    def run(self, burst=False):
+        """
+        Runs jobs until stopped, or until the queue is empty with `burst`.
+        Returns the number of jobs run.
+        """
+        running = set()
+        count = 0
+        last_maintenance = 0
+        with ThreadPoolExecutor(self.threads, thread_name_prefix='job') as pool:
+            while not self.stopping.is_set():
+                if time.monotonic() - last_maintenance > self.maintenance_interval:
+                    self.maintain()
+                    last_maintenance = time.monotonic()
+
+                idle = self.threads - len(running)
+                jobs = Job.objects.claim_due(idle) if idle else []
+                for job in jobs:
+                    running.add(pool.submit(self.run_job, job))
+                count += len(jobs)
+                close_old_connections()
+
+                if burst and not jobs and not running:
+                    break
+                # Until a job ends or it's time to poll again
+                if running:
+                    running = wait(running, self.poll_interval, FIRST_COMPLETED).not_done
+                elif not jobs:
+                    self.stopping.wait(self.poll_interval)
+        return count
+
+    @staticmethod
+    def run_job(job):
+        """
+        Runs `job` in a pool thread, with the connection handling of a request.
+        """
+        close_old_connections()
+        try:
+            run_job(job)
+        except Exception:  # pylint: disable=broad-except
+            # Saving the outcome failed: the job is queued again once stale
+            logger.exception('Could not record the outcome of job %s', job)
+        finally:
+            close_old_connections()
+
+    def maintain(self):
+        """
+        Queues the stale jobs again and deletes the old finished ones.
+        """
+        requeued, failed = Job.objects.requeue_stale(self.timeout)
+        if requeued or failed:
+            logger.warning('%d stale job(s) queued again, %d failed', requeued, failed)
+        Job.objects.prune(self.keep_days)
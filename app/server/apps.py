@@ -0,0 +1,18 @@
+"""
+'server' app configuration.
+"""
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+class ServerConfig(AppConfig):
+    """
+    Configuration for the project-level 'server' app.
+
+    Hooks project-wide behaviour that doesn't belong to a feature app, such
+    as the tuning of new database connections.
+    """
+    name = 'server'
+
+    def ready(self):
+        from .db import configure_connection  # pylint: disable=C0415
+        connection_created.connect(configure_connection, dispatch_uid='server.db.configure_connection')
@@ -0,0 +1,139 @@
+"""
+Static asset pipeline: CSS bundles and vendored third-party assets.
+
+Bundles (`settings.STATIC_BUNDLES`) are built by `collectstatic` (see
+`server.storage`): their sources are concatenated and minified into one file,
+which is then hashed and precompressed like any other static file. Pages link
+the bundle, or its sources when static files aren't collected (development).
+
+Third-party stylesheets, scripts and fonts are downloaded into `static/vendor`
+by `python manage.py vendor_static`, so pages don't depend on CDNs and their
+files get hashed names and far-future caching too. Until an asset is vendored,
+pages load it from its CDN.
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+# A third-party asset.
+#   stylesheets, scripts: (vendored path, CDN URL, SRI hash or None) linked by the pages
+#   files: {vendored path: URL} of other files, e.g. fonts referenced by the stylesheets
+#   generated: {vendored path: content} written as is, e.g. a reduced stylesheet
+VendorAsset = namedtuple('VendorAsset', ['stylesheets', 'scripts', 'files', 'generated'])
+
+BOOTSTRAP_CDN = 'https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist'
+FONTAWESOME_CDN = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0'
+FLAG_ICONS_CDN = 'https://cdn.jsdelivr.net/npm/flag-icon-css@4.1.7'
+LOBSTER_CDN = 'https://cdn.jsdelivr.net/npm/@fontsource/lobster@5/files'
+
+# Flags of the languages in the language menu
+FLAGS = ('es', 'gb')
+
+VENDOR_ASSETS = {
+    'bootstrap': VendorAsset(
+        stylesheets=[(
+            'vendor/bootstrap/bootstrap.min.css',
+            f'{BOOTSTRAP_CDN}/css/bootstrap.min.css',
+            'sha384-1BmE4kWBq78iYhFldvKuhfTAU6auU8tT94WrHftjDbrCEXSU1oBoqyl2QvZ6jIW3',
+        )],
+        scripts=[(
+            'vendor/bootstrap/bootstrap.bundle.min.js',
+            f'{BOOTSTRAP_CDN}/js/bootstrap.bundle.min.js',
+            'sha384-ka7Sk0Gln4gmtz2MlQnikT1wXgYsOg+OMhuP+IlRH9sENBO0LRn5q+8nbTov4+1p',
+        )],
+        files={},
+        generated={},
+    ),
+    # Only the solid icons are used
+    'fontawesome': VendorAsset(
+        stylesheets=[
+            ('vendor/fontawesome/css/fontawesome.min.css', f'{FONTAWESOME_CDN}/css/fontawesome.min.css', None),
+            ('vendor/fontawesome/css/solid.min.css', f'{FONTAWESOME_CDN}/css/solid.min.css', None),
+        ],
+        scripts=[],
+        files={
+            'vendor/fontawesome/webfonts/fa-solid-900.woff2': f'{FONTAWESOME_CDN}/webfonts/fa-solid-900.woff2',
+            'vendor/fontawesome/webfonts/fa-solid-900.ttf': f'{FONTAWESOME_CDN}/webfonts/fa-solid-900.ttf',
+        },
+        generated={},
+    ),
+    'lobster': VendorAsset(
+        stylesheets=[(
+            'vendor/lobster/lobster.css', 'https://fonts.googleapis.com/css2?family=Lobster&display=swap', None,
+        )],
+        scripts=[],
+        files={'vendor/lobster/lobster-latin-400-normal.woff2': f'{LOBSTER_CDN}/lobster-latin-400-normal.woff2'},
+        generated={
+            'vendor/lobster/lobster.css': (
+                "@font-face{font-family:'Lobster';font-style:normal;font-weight:400;font-display:swap;"
+                "src:url(lobster-latin-400-normal.woff2) format('woff2')}\n"
+            ),
+        },
+    ),
+    # The rules of flag-icons.css for the flags in use, instead of all of them
+    'flag-icons': VendorAsset(
+        stylesheets=[(
+            'vendor/flag-icons/flag-icons.css', f'{FLAG_ICONS_CDN}/css/flag-icons.min.css', None,
+        )],
+        scripts=[],
+        files={f'vendor/flag-icons/flags/4x3/{flag}.svg': f'{FLAG_ICONS_CDN}/flags/4x3/{flag}.svg' for flag in FLAGS},
+        generated={
+            'vendor/flag-icons/flag-icons.css': (
+                '.flag-icon{background-size:contain;background-position:50%;background-repeat:no-repeat;'
+                'position:relative;display:inline-block;width:1.333333em;line-height:1em}'
+                '.flag-icon:before{content:"\\00a0"}\n'
+                + ''.join(f'.flag-icon-{flag}{{background-image:url(flags/4x3/{flag}.svg)}}\n' for flag in FLAGS)
+            ),
+        },
+    ),
+}
+
+@lru_cache(maxsize=None)
+def is_vendored(name):
+    """
+    Returns True if every file of the asset `name` was downloaded.
+    """
+    asset = VENDOR_ASSETS[name]
+    paths = [path for path, _, _ in asset.stylesheets + asset.scripts]
+    return all(finders.find(path) for path in [*paths, *asset.files, *asset.generated])
+
+def vendored_paths():
+    """
+    Returns the paths of the vendored stylesheets and scripts linked by the pages.
+    """
+    return [
+        path
+        for name, asset in VENDOR_ASSETS.items() if is_vendored(name)
+        for path, _, _ in asset.stylesheets + asset.scripts
+    ]
+
+def bundle_paths(bundle):
+    """
+    Returns the static paths to link for `bundle`: the bundle itself once
+    built by `collectstatic`, else its sources.
+    """
+    if bundle in getattr(staticfiles_storage, 'hashed_files', {}):
+        return [bundle]
+    return settings.STATIC_BUNDLES[bundle]
+
+_COMMENTS = re.compile(r'/\*.*?\*/', re.DOTALL)
+_SPACES = re.compile(r'\s+')
+_PUNCTUATION = re.compile(r'\s*([{};,>])\s*')
+_AFTER_COLON = re.compile(r':\s+')
+
+def minify_css(css):
+    """
+    Removes the comments and the unneeded whitespace of a stylesheet.
+
+    Conservative: spaces before `:` are kept, as they are significant in
+    selectors (`a :hover`).
+    """
+    css = _COMMENTS.sub('', css)
+    css = _SPACES.sub(' ', css)
+    css = _PUNCTUATION.sub(r'\1', css)
+    css = _AFTER_COLON.sub(':', css)
+    return css.replace(';}', '}').strip() + '\n'
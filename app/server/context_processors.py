@@ -0,0 +1,10 @@
+"""
+Context processors, run for every template rendered with a request: keep them cheap.
+"""
+from django.conf import settings
+
+def global_settings(request):
+    """
+    Returns the settings shown on every page: the app version, read once at startup.
+    """
+    return {'APP_VERSION': settings.APP_VERSION}
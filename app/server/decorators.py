@@ -0,0 +1,87 @@
+"""
+View decorators for async views.
+
+Django only supports async views in `login_required`, `condition`,
+`cache_control` and `require_POST` from 5.0 on. These are their async
+counterparts, used by `inventory.async_views`.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpResponseNotAllowed
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+async def aget_user(request):
+    """
+    Returns the user of `request` from async code.
+
+    `request.user` is loaded lazily, reading the session and the database, so
+    it's evaluated in a thread the first time.
+    """
+    if hasattr(request, 'auser'):
+        return await request.auser()
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+def async_login_required(view):
+    """
+    `login_required` for async views.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await aget_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+def async_require_POST(view):  # pylint: disable=invalid-name
+    """
+    `require_POST` for async views.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(['POST'])
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+def async_cache_control(**kwargs):
+    """
+    `cache_control` for async views.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **view_kwargs):
+            response = await view(request, *args, **view_kwargs)
+            patch_cache_control(response, **kwargs)
+            return response
+        return wrapper
+    return decorator
+
+def async_condition(etag_func=None, last_modified_func=None):
+    """
+    `condition` for async views, taking async ETag and Last-Modified functions.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            etag = await etag_func(request, *args, **kwargs) if etag_func else None
+            etag = quote_etag(etag) if etag is not None else None
+            last_modified = await last_modified_func(request, *args, **kwargs) if last_modified_func else None
+            last_modified = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+
+            if request.method in ('GET', 'HEAD'):
+                if last_modified and not response.has_header('Last-Modified'):
+                    response.headers['Last-Modified'] = http_date(last_modified)
+                if etag:
+                    response.headers.setdefault('ETag', etag)
+            return response
+        return wrapper
+    return decorator
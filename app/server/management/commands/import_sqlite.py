@@ -0,0 +1,160 @@
+"""
+Management command: copy the data of a SQLite database into the current one.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+from inventory.models import DailyStock, Item, List, StockMovement, StockOperation
+
+User = get_user_model()
+
+SOURCE_ALIAS = 'sqlite_source'
+
+# Copied in this order so foreign keys always point to copied rows
+MODELS = [Group, User, Session, List, Item, StockMovement, DailyStock, StockOperation]
+
+# Many-to-many tables and the name of their column pointing to a Permission
+M2M_TABLES = [
+    (User.groups.through, None),
+    (Group.permissions.through, 'permission_id'),
+    (User.user_permissions.through, 'permission_id'),
+]
+
+class Command(BaseCommand):
+    """
+    Streams lists, items, their stock ledger, users, groups and sessions from
+    a SQLite file into the database selected by DATABASE_URL (usually
+    PostgreSQL).
+
+    Rows are read in primary key order and written with `bulk_create` in
+    batches, upserting rows that already exist. The site can keep running on
+    SQLite while a first pass copies everything; after switching DATABASE_URL
+    a second pass only has to catch up with the rows changed meanwhile.
+    Rows deleted from the source after the first pass are not removed.
+    """
+    help = 'Copy all data from a SQLite database file into the configured database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Path of the SQLite database file to copy from.')
+        parser.add_argument('--database', default='default', help='Database alias to copy into.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT.')
+
+    def handle(self, *args, **options):
+        target = options['database']
+        batch_size = options['batch_size']
+        if connections[target].vendor == 'sqlite' and \
+                connections[target].settings_dict['NAME'] == options['source']:
+            raise CommandError('The source and the target are the same database')
+
+        # Register the source as an extra database alias
+        connections.settings[SOURCE_ALIAS] = connections.configure_settings({
+            **connections.settings,
+            SOURCE_ALIAS: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': options['source']},
+        })[SOURCE_ALIAS]
+
+        # Tables, content types and permissions of the target
+        call_command('migrate', database=target, interactive=False, verbosity=0)
+
+        with transaction.atomic(using=target):
+            for model in MODELS:
+                self.copy_model(model, target, batch_size)
+
+            permission_ids = self.permission_mapping(target)
+            for through, permission_field in M2M_TABLES:
+                self.copy_m2m(through, permission_field, permission_ids, target, batch_size)
+
+            self.reset_sequences(target)
+
+        # bulk_create bypasses the signals maintaining the search index and the
+        # counters of the lists
+        call_command('rebuild_search_index', database=target)
+        call_command('recount', database=target)
+
+    def copy_model(self, model, target, batch_size):
+        """
+        Copies every row of `model`, updating the rows already in the target.
+        """
+        fields = [field.name for field in model._meta.concrete_fields if not field.primary_key]
+        pk_name = model._meta.pk.name
+        manager = model._base_manager
+        rows = manager.using(SOURCE_ALIAS).order_by('pk').iterator(chunk_size=batch_size)
+
+        copied = 0
+        for batch in self.batches(rows, batch_size):
+            manager.using(target).bulk_create(
+                batch,
+                update_conflicts=True,
+                unique_fields=[pk_name],
+                update_fields=fields,
+            )
+            copied += len(batch)
+            self.stdout.write(f'{model._meta.label}: {copied} rows', ending='\r')
+        self.stdout.write(self.style.SUCCESS(f'{model._meta.label}: {copied} rows'))
+
+    def copy_m2m(self, through, permission_field, permission_ids, target, batch_size):
+        """
+        Copies the rows of a many-to-many table, translating permission ids.
+        """
+        rows = through.objects.using(SOURCE_ALIAS).order_by('pk').iterator(chunk_size=batch_size)
+
+        copied = 0
+        for batch in self.batches(rows, batch_size):
+            if permission_field:
+                batch = [row for row in batch if getattr(row, permission_field) in permission_ids]
+                for row in batch:
+                    setattr(row, permission_field, permission_ids[getattr(row, permission_field)])
+            through.objects.using(target).bulk_create(batch, ignore_conflicts=True)
+            copied += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'{through._meta.label}: {copied} rows'))
+
+    def permission_mapping(self, target):
+        """
+        Returns `{source permission id: target permission id}`.
+
+        Permissions are created by `migrate` on each database, so their ids
+        differ: they are matched by app label, model and codename.
+        """
+        def natural_keys(alias):
+            return {
+                (app_label, model, codename): pk
+                for pk, app_label, model, codename in Permission.objects.using(alias).values_list(
+                    'pk', 'content_type__app_label', 'content_type__model', 'codename',
+                )
+            }
+
+        target_ids = natural_keys(target)
+        return {
+            pk: target_ids[key]
+            for key, pk in natural_keys(SOURCE_ALIAS).items()
+            if key in target_ids
+        }
+
+    def reset_sequences(self, target):
+        """
+        Moves the primary key sequences of the target past the copied rows.
+        """
+        connection = connections[target]
+        models = MODELS + [through for through, _ in M2M_TABLES]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    @staticmethod
+    def batches(rows, batch_size):
+        """
+        Groups an iterator of rows into lists of `batch_size`.
+        """
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -0,0 +1,90 @@
+"""
+Management command: download the third-party static assets.
+"""
+import base64
+import hashlib
+import os
+import re
+from urllib.error import URLError
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from server.assets import VENDOR_ASSETS
+
+# Source map references, whose maps aren't vendored: `collectstatic` would
+# fail to find them
+SOURCE_MAP = re.compile(rb'\n?(/\*# sourceMappingURL=[^*]*\*/|//# sourceMappingURL=\S*)\s*$')
+
+class Command(BaseCommand):
+    """
+    Downloads the stylesheets, scripts and fonts of `server.assets.VENDOR_ASSETS`
+    into the first STATICFILES_DIRS entry, and writes its generated files.
+
+    Files already there are skipped unless `--force` is given. Downloads with
+    a known SRI hash are checked against it. Commit the files: the image is
+    built without network access to the CDNs.
+    """
+    help = 'Download the third-party static assets so pages do not depend on CDNs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('assets', nargs='*', help='Assets to download, all by default.')
+        parser.add_argument('--force', action='store_true', help='Download files that exist too.')
+        parser.add_argument(
+            '--timeout', type=float, default=30, help='Seconds to wait for each download.',
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['assets']) - set(VENDOR_ASSETS)
+        if unknown:
+            raise CommandError(f'Unknown assets: {", ".join(sorted(unknown))}')
+        root = settings.STATICFILES_DIRS[0]
+
+        for name in options['assets'] or VENDOR_ASSETS:
+            asset = VENDOR_ASSETS[name]
+            downloads = {
+                path: (url, integrity) for path, url, integrity in asset.stylesheets + asset.scripts
+            }
+            downloads.update((path, (url, None)) for path, url in asset.files.items())
+
+            for path, content in asset.generated.items():
+                downloads.pop(path, None)
+                self.write(os.path.join(root, path), content.encode())
+            for path, (url, integrity) in downloads.items():
+                target = os.path.join(root, path)
+                if os.path.exists(target) and not options['force']:
+                    continue
+                self.write(target, self.download(url, integrity, options['timeout']))
+                self.stdout.write(f'{path} <- {url}')
+
+        self.stdout.write(self.style.SUCCESS('Vendored assets are up to date.'))
+
+    @staticmethod
+    def download(url, integrity, timeout):
+        """
+        Returns the content at `url`, checked against the SRI hash `integrity`.
+        """
+        try:
+            with urlopen(url, timeout=timeout) as response:
+                content = response.read()
+        except URLError as exc:
+            raise CommandError(f'Could not download {url}: {exc}') from exc
+
+        if integrity:
+            algorithm, expected = integrity.split('-', 1)
+            digest = base64.b64encode(hashlib.new(algorithm, content).digest()).decode()
+            if digest != expected:
+                raise CommandError(f'{url} does not match its integrity hash')
+        return SOURCE_MAP.sub(b'\n', content) if url.endswith(('.css', '.js')) else content
+
+    @staticmethod
+    def write(target, content):
+        """
+        Writes `content` to `target` atomically, so an interrupted run leaves no partial file.
+        """
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        partial = f'{target}.part'
+        with open(partial, 'wb') as partial_file:
+            partial_file.write(content)
+        os.replace(partial, target)
@@ -0,0 +1,139 @@
+"""
+In-process request metrics, exposed in the Prometheus text format.
+
+`MetricsMiddleware` records, for every request, the latency, the number and
+duration of database queries, the template render time and the response size
+in histograms labelled by view. Each worker process keeps its own registry:
+the scraper sees the worker that answers, like the default mode of the
+official Prometheus client.
+"""
+import threading
+import time
+from contextvars import ContextVar
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024)
+
+# Measurements of the request being handled, see `RequestStats`
+current_request = ContextVar('current_request', default=None)
+
+class RequestStats:
+    """
+    Measurements accumulated while handling a single request.
+    """
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.template_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+        Database execute wrapper counting and timing the queries.
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.query_seconds += time.perf_counter() - start
+
+class Histogram:
+    """
+    A Prometheus histogram with one series per view.
+    """
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, view, value):
+        """
+        Records `value` in the series of `view`.
+        """
+        with self.lock:
+            buckets, total, count = self.series.get(view, ([0] * len(self.buckets), 0, 0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    buckets[i] += 1
+            self.series[view] = (buckets, total + value, count + 1)
+
+    def samples(self):
+        """
+        Yields the lines of the histogram in the Prometheus text format.
+        """
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        with self.lock:
+            series = sorted(
+                (view, list(buckets), total, count)
+                for view, (buckets, total, count) in self.series.items()
+            )
+
+        for view, buckets, total, count in series:
+            for bound, bucket in zip(self.buckets, buckets):
+                yield f'{self.name}_bucket{{view="{view}",le="{bound}"}} {bucket}'
+            yield f'{self.name}_bucket{{view="{view}",le="+Inf"}} {count}'
+            yield f'{self.name}_sum{{view="{view}"}} {total:.6f}'
+            yield f'{self.name}_count{{view="{view}"}} {count}'
+
+    def reset(self):
+        """
+        Forgets every observation.
+        """
+        with self.lock:
+            self.series.clear()
+
+REQUEST_DURATION = Histogram(
+    'lima_request_duration_seconds', 'Time spent handling requests.', LATENCY_BUCKETS,
+)
+DB_QUERIES = Histogram(
+    'lima_db_queries', 'Database queries made per request.', QUERY_BUCKETS,
+)
+DB_DURATION = Histogram(
+    'lima_db_query_duration_seconds', 'Time spent in database queries per request.',
+    LATENCY_BUCKETS,
+)
+TEMPLATE_DURATION = Histogram(
+    'lima_template_render_seconds', 'Time spent rendering templates per request.', LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    'lima_response_size_bytes', 'Size of the response bodies.', SIZE_BUCKETS,
+)
+
+HISTOGRAMS = [REQUEST_DURATION, DB_QUERIES, DB_DURATION, TEMPLATE_DURATION, RESPONSE_SIZE]
+
+def record(view, duration, stats, size):
+    """
+    Records the measurements of a finished request made to `view`.
+    """
+    observations = [
+        (REQUEST_DURATION, duration),
+        (DB_QUERIES, stats.queries),
+        (DB_DURATION, stats.query_seconds),
+        (TEMPLATE_DURATION, stats.template_seconds),
+    ]
+    # Streaming responses have no known size
+    if size is not None:
+        observations.append((RESPONSE_SIZE, size))
+
+    for histogram, value in observations:
+        histogram.observe(view, value)
+
+def render():
+    """
+    Returns every metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.samples())
+    return '\n'.join(lines) + '\n'
+
+def reset():
+    """
+    Forgets every measurement.
+    """
+    for histogram in HISTOGRAMS:
+        histogram.reset()
@@ -0,0 +1,183 @@
+"""
+Instrumentation middleware: request metrics and on-demand profiling, plus
+an async capable WhiteNoise.
+
+Metrics and profiling are opt-in, see METRICS_ENABLED and PROFILER_ENABLED
+in the settings.
+"""
+import cProfile
+import io
+import os
+import pstats
+import time
+import uuid
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from . import metrics
+
+def view_name(request):
+    """
+    Returns the label of the view that handled `request`.
+
+    Unresolved URLs share a single label, so scanners can't create series.
+    """
+    if request.resolver_match is None:
+        return 'unmatched'
+    return request.resolver_match.view_name
+
+def wrap_queries(stats):
+    """
+    Returns an ExitStack counting the queries of this thread in `stats`.
+
+    Connections belong to a thread: under ASGI the queries of a request run in
+    its `sync_to_async` thread, so this must be called from there too.
+    """
+    stack = ExitStack()
+    for alias in connections:
+        stack.enter_context(connections[alias].execute_wrapper(stats))
+    return stack
+
+class MetricsMiddleware:
+    """
+    Records the latency, database queries, template render time and response
+    size of every request in `server.metrics`.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        stats = metrics.RequestStats()
+        token = metrics.current_request.set(stats)
+        start = time.perf_counter()
+        try:
+            with wrap_queries(stats):
+                response = self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = metrics.RequestStats()
+        token = metrics.current_request.set(stats)
+        start = time.perf_counter()
+        stack = await sync_to_async(wrap_queries)(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            metrics.current_request.reset(token)
+
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    @staticmethod
+    def record(request, response, duration, stats):
+        """
+        Records the metrics of a finished request.
+        """
+        size = None if response.streaming else len(response.content)
+        metrics.record(view_name(request), duration, stats, size)
+
+class ProfilerMiddleware:
+    """
+    Profiles a single request of a staff user with cProfile.
+
+    Requests sending `X-Profile: 1` get the profile written to PROFILER_DIR,
+    named in the `X-Profile-File` response header, for tools like snakeviz.
+    With `X-Profile: text` the most expensive calls are returned as plain
+    text instead of the page.
+
+    Must come last in MIDDLEWARE, so the other middleware (CSRF checks in
+    particular) still run for profiled requests. Async views aren't profiled:
+    cProfile only follows the thread it runs in. Being sync only, under ASGI
+    it makes every request hold a thread: only enable it while profiling.
+    """
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Runs and renders the view under the profiler when asked to.
+        """
+        mode = request.headers.get('X-Profile')
+        if not mode or iscoroutinefunction(view_func) or not request.user.is_staff:
+            return None
+
+        profiler = cProfile.Profile()
+        response = profiler.runcall(self.render_view, request, view_func, view_args, view_kwargs)
+
+        if mode == 'text':
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(50)
+            return HttpResponse(stream.getvalue(), content_type='text/plain; charset=utf-8')
+
+        os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+        view = view_name(request).replace(':', '-')
+        name = f'{time.strftime("%Y%m%d-%H%M%S")}-{view}-{uuid.uuid4().hex[:8]}.prof'
+        profiler.dump_stats(os.path.join(settings.PROFILER_DIR, name))
+        response['X-Profile-File'] = name
+        return response
+
+    @staticmethod
+    def render_view(request, view_func, view_args, view_kwargs):
+        """
+        Calls the view and renders its response, if it's a TemplateResponse.
+        """
+        response = view_func(request, *view_args, **view_kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response = response.render()
+        return response
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise, also running in the async middleware chain of ASGI servers.
+
+    WhiteNoise only has a sync `__call__`: under ASGI, Django would run it and
+    everything after it (the views included) in a thread for every request.
+    Here only the static files are served from a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):  # pylint: disable=redefined-outer-name
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,29 @@
+"""
+Static files storage building the CSS bundles on `collectstatic`.
+"""
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from .assets import minify_css
+
+class BundledStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    WhiteNoise's storage (hashed names, gzip/brotli copies) that first writes
+    the bundles of `settings.STATIC_BUNDLES`, minified.
+
+    Bundles are processed like the collected files, so their `url()`s are
+    rewritten to hashed names: sources must be in the bundle's directory.
+    """
+    def post_process(self, paths, *args, **kwargs):
+        if not kwargs.get('dry_run'):
+            for bundle, sources in settings.STATIC_BUNDLES.items():
+                content = []
+                for source in sources:
+                    with self.open(source) as source_file:
+                        content.append(minify_css(source_file.read().decode()))
+                if self.exists(bundle):
+                    self.delete(bundle)
+                self._save(bundle, ContentFile(''.join(content).encode()))
+                paths[bundle] = (self, bundle)
+        yield from super().post_process(paths, *args, **kwargs)
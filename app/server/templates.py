@@ -0,0 +1,33 @@
+"""
+Template backend timing template renders for the request metrics.
+"""
+import time
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from .metrics import current_request
+
+class TimedTemplate(Template):
+    """
+    A Django template adding its render time to the current request's stats.
+    """
+    def render(self, context=None, request=None):
+        stats = current_request.get()
+        if stats is None:
+            return super().render(context, request)
+
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.template_seconds += time.perf_counter() - start
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, returning templates that time their renders.
+    """
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
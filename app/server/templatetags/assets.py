@@ -0,0 +1,54 @@
+"""
+Template tags linking the static assets of `server.assets`.
+"""
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import mark_safe
+
+from ..assets import VENDOR_ASSETS, bundle_paths, is_vendored
+
+register = template.Library()
+
+@register.simple_tag
+def stylesheet_bundle(bundle):
+    """
+    Links the stylesheet `bundle` (see `settings.STATIC_BUNDLES`).
+    """
+    paths = bundle_paths(bundle)
+    return format_html_join('\n', '<link rel="stylesheet" href="{}">', ((static(path),) for path in paths))
+
+def _vendor_urls(names, kind):
+    """
+    Yields the URL and SRI attributes of the `kind` files of the assets `names`,
+    vendored or from their CDN.
+    """
+    for name in names:
+        vendored = is_vendored(name)
+        for path, url, integrity in getattr(VENDOR_ASSETS[name], kind):
+            if vendored:
+                yield static(path), ''
+            elif integrity:
+                yield url, format_html(' integrity="{}" crossorigin="anonymous"', integrity)
+            else:
+                yield url, ''
+
+@register.simple_tag
+def vendor_stylesheets(*names):
+    """
+    Links the stylesheets of the third-party assets `names`.
+    """
+    return format_html_join(
+        '\n', '<link rel="stylesheet" href="{}"{}>',
+        ((url, mark_safe(attributes)) for url, attributes in _vendor_urls(names, 'stylesheets')),
+    )
+
+@register.simple_tag
+def vendor_scripts(*names):
+    """
+    Loads the scripts of the third-party assets `names`.
+    """
+    return format_html_join(
+        '\n', '<script src="{}"{}></script>',
+        ((url, mark_safe(attributes)) for url, attributes in _vendor_urls(names, 'scripts')),
+    )
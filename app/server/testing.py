@@ -0,0 +1,10 @@
+"""
+Settings shared by the test cases of every app, applied with `override_settings`.
+"""
+
+# In-memory caches, so tests neither read nor leave entries in the configured
+# ones (files under data/ by default)
+TEST_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': f'test-{alias}'}
+    for alias in ('default', 'sessions')
+}
@@ -17,14 +17,20 @@ Including another URLconf
 from django.contrib import admin
 from django.conf import settings
 from django.conf.urls.static import static
-from django.urls import path, include
-from .views import redirect_to_inventory
+from django.urls import path, include, re_path
+from django.views.static import serve
+from .views import offline, prometheus_metrics, redirect_to_inventory, service_worker
 
 urlpatterns = [
     path('', redirect_to_inventory, name='redirect'),
     path('inventory/', include('inventory.urls')),
     path('users/', include('users.urls')),
+    path('api/', include('api.urls')),
+    path('jobs/', include('jobs.urls')),
     path('admin/', admin.site.urls),
+    path('metrics', prometheus_metrics, name='metrics'),
+    path('sw.js', service_worker, name='service_worker'),
+    path('offline/', offline, name='offline'),
 
     # URLs de internacionalización
     path('i18n/', include('django.conf.urls.i18n')),
@@ -32,3 +38,11 @@ urlpatterns = [
 
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+elif settings.SERVE_MEDIA:
+    urlpatterns += [
+        re_path(
+            rf'^{settings.MEDIA_URL.lstrip("/")}(?P<path>.*)$',
+            serve,
+            {'document_root': settings.MEDIA_ROOT},
+        ),
+    ]
@@ -1,7 +1,17 @@
 """
 General server views
 """
-from django.shortcuts import redirect
+import hashlib
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.shortcuts import redirect, render
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import cache_control
+
+from . import assets, metrics
 
 
 def redirect_to_inventory(request):
@@ -9,3 +19,61 @@ def redirect_to_inventory(request):
     Redirects any request to /inventory/
     """
     return redirect('/inventory/')
+
+def prometheus_metrics(request):
+    """
+    Exposes the request metrics in the Prometheus text format.
+
+    Readable by staff users and by scrapers sending
+    `Authorization: Bearer <METRICS_TOKEN>`.
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404('Metrics are disabled')
+
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get('Authorization', '')
+    scraper = token and constant_time_compare(authorization, f'Bearer {token}')
+    if not (request.user.is_staff or scraper):
+        return HttpResponseForbidden()
+
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Static files cached when the service worker is installed, with the stylesheet
+# bundle and the vendored assets
+SHELL_STATIC_FILES = [
+    'js/cards.js',
+    'js/stock.js',
+    'js/stock-queue.js',
+    'assets/icons/favicon.svg',
+    'assets/icons/favicon-48x48.png',
+    'assets/icons/web-app-manifest-192x192.png',
+]
+
+@cache_control(no_cache=True)
+def service_worker(request):
+    """
+    Serves the service worker from the root, so it controls the whole site.
+
+    Rendered to know the hashed names of the static files: their names
+    change with their content, and so do the worker and its cache version.
+    """
+    paths = assets.bundle_paths('css/lima.css') + assets.vendored_paths() + SHELL_STATIC_FILES
+    shell = [static(path) for path in paths] + [reverse('offline')]
+    version = hashlib.md5(
+        '|'.join([settings.APP_VERSION] + shell).encode(), usedforsecurity=False,
+    ).hexdigest()[:12]
+    context = {
+        'version': version,
+        'shell': shell,
+        'queue_script': static('js/stock-queue.js'),
+        'static_url': settings.STATIC_URL,
+        # Without hashed names (development) static files are revalidated
+        'hashed_static': not settings.DEBUG,
+    }
+    return render(request, 'sw.js', context, content_type='text/javascript')
+
+def offline(request):
+    """
+    Page shown by the service worker for pages that aren't cached offline.
+    """
+    return render(request, 'offline.html')
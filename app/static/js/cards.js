@@ -0,0 +1,198 @@
+// Server-side search and infinite scrolling for card grids.
+//
+// The views render only the first page of cards. Typing in the search box
+// replaces the grid with the first page of results, and the next page is
+// appended when the "Load more" button comes near the viewport (or is
+// clicked), both fetched as partial HTML (`?partial=1`).
+//
+// Each page of cards is a `.card-page`. Pages far from the viewport are
+// emptied, keeping their height, and refilled when they come back, so long
+// lists keep a bounded number of cards in the DOM. `findCard` also looks in
+// the emptied pages.
+//
+// Cards carry the URLs of their actions in data attributes, and open a single
+// modal shared by the whole page (`_action_modal.html`) instead of one each.
+
+function fetchCards(params, signal) {
+    const url = new URL(window.location.href);
+    url.search = '';
+    Object.entries(params).forEach(([key, value]) => {
+        if (value) {
+            url.searchParams.set(key, value);
+        }
+    });
+    url.searchParams.set('partial', '1');
+
+    return fetch(url, { signal: signal, credentials: 'same-origin' })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(response.statusText);
+            }
+            return response.text();
+        });
+}
+
+// Moves the cards of a page out of the DOM, keeping its height
+function detachPage(page) {
+    if (page.cards) {
+        return;
+    }
+    page.style.height = page.offsetHeight + 'px';
+    page.cards = document.createDocumentFragment();
+    page.cards.append(...page.childNodes);
+}
+
+function attachPage(page) {
+    if (!page.cards) {
+        return;
+    }
+    page.append(page.cards);
+    page.cards = null;
+    page.style.height = '';
+}
+
+// Returns the card with the id `id` in the grid `container`, in the DOM or not
+function findCard(container, id) {
+    const card = document.getElementById(id);
+    if (card && container.contains(card)) {
+        return card;
+    }
+    for (const page of container.querySelectorAll('.card-page')) {
+        if (page.cards) {
+            const detached = page.cards.getElementById(id);
+            if (detached) {
+                return detached;
+            }
+        }
+    }
+    return null;
+}
+
+// Keeps the pages of cards within `margin` of the viewport in the DOM
+function initCardWindow(container, margin = '200% 0px') {
+    if (!window.IntersectionObserver) {
+        return () => null;
+    }
+    const observer = new IntersectionObserver(entries => {
+        entries.forEach(entry => {
+            entry.isIntersecting ? attachPage(entry.target) : detachPage(entry.target);
+        });
+    }, { rootMargin: margin });
+
+    // Heights change with the width: measure the emptied pages again
+    let resizeTimeout;
+    window.addEventListener('resize', () => {
+        clearTimeout(resizeTimeout);
+        resizeTimeout = setTimeout(() => {
+            container.querySelectorAll('.card-page').forEach(page => {
+                if (page.cards) {
+                    attachPage(page);
+                    observer.unobserve(page);
+                    observer.observe(page);
+                }
+            });
+        }, 200);
+    });
+
+    // Watches the pages added to the grid, and forgets the ones removed
+    let watched = new Set();
+    return () => {
+        const pages = new Set(container.querySelectorAll('.card-page'));
+        watched.forEach(page => pages.has(page) || observer.unobserve(page));
+        pages.forEach(page => watched.has(page) || observer.observe(page));
+        watched = pages;
+    };
+}
+
+function initCardSearch(inputId, containerId) {
+    const input = document.getElementById(inputId);
+    const container = document.getElementById(containerId);
+    const watchPages = initCardWindow(container);
+    let debounceTimeout;
+    let controller;
+
+    function loadMore(button) {
+        if (button.disabled) {
+            return;
+        }
+        button.disabled = true;
+        fetchCards({ q: input.value.trim(), cursor: button.dataset.cursor })
+            .then(html => {
+                button.closest('.load-more').remove();
+                container.insertAdjacentHTML('beforeend', html);
+                watchGrid();
+            })
+            .catch(error => {
+                button.disabled = false;
+                console.error(error);
+            });
+    }
+
+    // Loads the next page before the user reaches the end of the grid
+    const loader = window.IntersectionObserver && new IntersectionObserver(entries => {
+        entries.forEach(entry => {
+            if (entry.isIntersecting) {
+                loader.unobserve(entry.target);
+                loadMore(entry.target.querySelector('button'));
+            }
+        });
+    }, { rootMargin: '100% 0px' });
+
+    function watchGrid() {
+        watchPages();
+        if (loader) {
+            const next = container.querySelector('.load-more');
+            loader.disconnect();
+            if (next) {
+                loader.observe(next);
+            }
+        }
+    }
+
+    // Replaces the grid with the first page of results
+    input.addEventListener('input', () => {
+        clearTimeout(debounceTimeout);
+        debounceTimeout = setTimeout(() => {
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+
+            const query = input.value.trim();
+            fetchCards({ q: query }, controller.signal)
+                .then(html => {
+                    container.innerHTML = html;
+                    watchGrid();
+                    const url = new URL(window.location.href);
+                    query ? url.searchParams.set('q', query) : url.searchParams.delete('q');
+                    window.history.replaceState(null, '', url);
+                })
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        console.error(error);
+                    }
+                });
+        }, 300);
+    });
+
+    // Appends the next page of results
+    container.addEventListener('click', event => {
+        const button = event.target.closest('.load-more button');
+        if (button) {
+            loadMore(button);
+        }
+    });
+
+    watchGrid();
+}
+
+// Fills the shared actions modal with the card whose menu opened it
+function initActionModal(modalId) {
+    const modal = document.getElementById(modalId);
+    modal.addEventListener('show.bs.modal', event => {
+        const trigger = event.relatedTarget;
+        modal.querySelector('.modal-title').textContent = trigger.dataset.name;
+        modal.querySelector('[data-action="edit"]').href = trigger.dataset.editUrl;
+        modal.querySelector('[data-action="delete"]').href = trigger.dataset.deleteUrl;
+    });
+}
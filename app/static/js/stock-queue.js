@@ -0,0 +1,59 @@
+// Queue of the stock operations waiting to be sent to the server.
+//
+// Kept in IndexedDB, so operations made offline survive closing the page.
+// Shared by the pages, which show the queued changes, and the service worker,
+// which queues operations when offline and replays them (see `sw.js`).
+
+const StockQueue = (() => {
+    const DB_NAME = 'lima';
+    const STORE = 'stock-operations';
+
+    function open() {
+        return new Promise((resolve, reject) => {
+            const request = indexedDB.open(DB_NAME, 1);
+            request.onupgradeneeded = () => {
+                request.result.createObjectStore(STORE, { keyPath: 'seq', autoIncrement: true });
+            };
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+
+    // Runs `callback(store)` in a transaction and resolves with its result
+    // once the transaction is complete
+    function withStore(mode, callback) {
+        return open().then(db => new Promise((resolve, reject) => {
+            const transaction = db.transaction(STORE, mode);
+            const request = callback(transaction.objectStore(STORE));
+            transaction.oncomplete = () => {
+                db.close();
+                resolve(request ? request.result : undefined);
+            };
+            transaction.onerror = () => {
+                db.close();
+                reject(transaction.error);
+            };
+        }));
+    }
+
+    return {
+        // Queues `{id, item, delta}` operations, with the CSRF token to send them
+        add(operations, csrfToken) {
+            return withStore('readwrite', store => {
+                operations.forEach(operation => store.add({ ...operation, csrfToken: csrfToken }));
+            });
+        },
+
+        // Resolves with the queued operations, oldest first
+        all() {
+            return withStore('readonly', store => store.getAll());
+        },
+
+        // Removes queued operations by their `seq`
+        remove(seqs) {
+            return withStore('readwrite', store => {
+                seqs.forEach(seq => store.delete(seq));
+            });
+        },
+    };
+})();
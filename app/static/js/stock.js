@@ -0,0 +1,177 @@
+// In-place stock updates for the item cards of a list.
+//
+// Taps on the +/- buttons update the amount on screen right away and are
+// accumulated per item. Once the user stops tapping for a moment, all pending
+// deltas are sent in a single request as operations with their own ids, and
+// the cards and the list total are replaced with the server's response.
+//
+// Offline, the service worker queues the operations and answers 202 (see
+// `sw.js`): the page keeps the expected amounts, shows the queued operations
+// again when reloaded, and is updated once the worker has replayed them.
+//
+// Changes made elsewhere (other people, other tabs) are pushed by the server
+// as events when it supports it (`data-events-url`, see `inventory/events.py`)
+// and patched into the cards, including the ones scrolled out of the DOM
+// (`findCard` in `cards.js`).
+
+function getCookie(name) {
+    const match = document.cookie.match(new RegExp('(?:^|; )' + name + '=([^;]*)'));
+    return match ? decodeURIComponent(match[1]) : null;
+}
+
+// Random id of an operation, so the server applies it only once
+function operationId() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return Date.now().toString(36) + '-' + Math.random().toString(36).slice(2) + Math.random().toString(36).slice(2);
+}
+
+function initStockButtons(containerId, totalId, delay = 400) {
+    const container = document.getElementById(containerId);
+    const total = document.getElementById(totalId);
+    const url = container.dataset.operationsUrl;
+    let pending = {};
+    let flushTimeout;
+    let inFlight = false;
+    // Items of the request in flight
+    let sent = new Set();
+
+    function setAmount(card, amount) {
+        card.querySelector('.amount-value').textContent = amount;
+        card.querySelector('[data-delta="-1"]').classList.toggle('disabled', amount === 0);
+        card.querySelector('.card').classList.toggle('out-of-stock', amount === 0);
+    }
+
+    // Shows the expected amount while the request is pending
+    function updateCard(card, delta) {
+        const value = card.querySelector('.amount-value');
+        setAmount(card, Math.max(parseInt(value.textContent, 10) + delta, 0));
+    }
+
+    // Replaces the cards and the total with the server's
+    function showResponse(data) {
+        Object.entries(data.cards).forEach(([itemId, html]) => {
+            // Cards with newer taps keep their optimistic amount until the next response
+            const card = findCard(container, 'item-card-' + itemId);
+            if (card && !(itemId in pending)) {
+                card.outerHTML = html;
+            }
+        });
+        Object.values(data.totals).forEach(value => {
+            total.textContent = value;
+        });
+    }
+
+    // Patches the cards and the total with an event pushed by the server
+    function showEvent(data) {
+        if (data.reload) {
+            window.location.reload();
+            return;
+        }
+        Object.entries(data.items).forEach(([itemId, item]) => {
+            // Cards with newer taps are updated by the response to them
+            const card = findCard(container, 'item-card-' + itemId);
+            if (card && !(itemId in pending) && !sent.has(itemId)) {
+                setAmount(card, item.amount);
+                card.querySelector('.amount-to-buy').textContent = item.amount_to_buy;
+                card.querySelector('.cost-value').textContent = item.cost;
+            }
+        });
+        data.deleted.forEach(itemId => {
+            const card = findCard(container, 'item-card-' + itemId);
+            if (card) {
+                card.remove();
+            }
+        });
+        if (!inFlight && Object.keys(pending).length === 0) {
+            total.textContent = data.total;
+        }
+    }
+
+    function flush() {
+        if (inFlight || Object.keys(pending).length === 0) {
+            return;
+        }
+        const operations = Object.entries(pending).map(([itemId, delta]) => (
+            { id: operationId(), item: parseInt(itemId, 10), delta: delta }
+        ));
+        sent = new Set(Object.keys(pending));
+        pending = {};
+        inFlight = true;
+
+        fetch(url, {
+            method: 'POST',
+            credentials: 'same-origin',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCookie('csrftoken'),
+                'X-Requested-With': 'XMLHttpRequest',
+            },
+            body: JSON.stringify({ operations: operations }),
+        })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(response.statusText);
+                }
+                return response.json();
+            })
+            .then(data => {
+                // Queued by the service worker: keep the expected amounts
+                if (!data.queued) {
+                    showResponse(data);
+                }
+            })
+            .catch(() => {
+                // Show the real state if anything went wrong
+                window.location.reload();
+            })
+            .finally(() => {
+                inFlight = false;
+                sent = new Set();
+                flush();
+            });
+    }
+
+    container.addEventListener('click', event => {
+        const button = event.target.closest('a[data-delta]');
+        if (!button) {
+            return;
+        }
+        event.preventDefault();
+
+        const card = button.closest('[data-item-id]');
+        const itemId = card.dataset.itemId;
+        const delta = parseInt(button.dataset.delta, 10);
+        pending[itemId] = (pending[itemId] || 0) + delta;
+        updateCard(card, delta);
+
+        clearTimeout(flushTimeout);
+        flushTimeout = setTimeout(flush, delay);
+    });
+
+    // Operations still queued offline are not in the page yet
+    if (typeof StockQueue !== 'undefined' && 'serviceWorker' in navigator) {
+        StockQueue.all().then(operations => {
+            operations.forEach(operation => {
+                const card = findCard(container, 'item-card-' + operation.item);
+                if (card) {
+                    updateCard(card, operation.delta);
+                }
+            });
+        }).catch(() => null);
+
+        navigator.serviceWorker.addEventListener('message', event => {
+            if (event.data && event.data.type === 'stock-synced') {
+                showResponse(event.data.data);
+            }
+        });
+    }
+
+    if (container.dataset.eventsUrl && window.EventSource) {
+        const events = new EventSource(container.dataset.eventsUrl);
+        events.addEventListener('message', event => showEvent(JSON.parse(event.data)));
+        // Frees the connection, browsers only open 6 per server over HTTP/1.1
+        window.addEventListener('pagehide', () => events.close());
+    }
+}
@@ -0,0 +1,228 @@
+// Service worker of Lima, rendered by `server.views.service_worker`.
+//
+// - The app shell (static files and the offline page) is cached on install.
+// - Static files are served from the cache, CDN stylesheets and fonts too.
+// - The lists and list pages are served stale-while-revalidate: the cached
+//   copy right away, refreshed in the background for the next visit.
+// - Stock operations that can't be sent are queued in IndexedDB (see
+//   `stock-queue.js`) and replayed in batches when connectivity returns. Each
+//   operation has an id generated by the page, and the server applies each id
+//   once, so replaying a batch whose response was lost is safe.
+
+importScripts('{{ queue_script|escapejs }}');
+
+const VERSION = '{{ version }}';
+const SHELL_CACHE = 'lima-shell-' + VERSION;
+const STATIC_CACHE = 'lima-static-' + VERSION;
+const PAGES_CACHE = 'lima-pages';
+const SHELL = [{% for url in shell %}'{{ url|escapejs }}'{% if not forloop.last %}, {% endif %}{% endfor %}];
+const HASHED_STATIC = {{ hashed_static|yesno:"true,false" }};
+
+const STATIC_URL = '{{ static_url|escapejs }}';
+const OPERATIONS_URL = '{% url "stock_operations" %}';
+const LISTS_URL = '{% url "lists" %}';
+const LOGIN_URL = '{% url "login" %}';
+const LOGOUT_URL = '{% url "logout" %}';
+const OFFLINE_URL = '{% url "offline" %}';
+// The lists page and the page of each list
+const PAGES = new RegExp('^' + LISTS_URL.replace(/[.*+?^${}()|[\]\\]/g, '\\$&') + '(\\d+/)?$');
+
+// Operations sent per request when replaying the queue
+const REPLAY_BATCH = 200;
+const SYNC_TAG = 'stock-operations';
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(SHELL_CACHE)
+            .then(cache => cache.addAll(SHELL))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(
+                // Static files of the previous version have other names
+                keys.filter(key => key.startsWith('lima-') && ![SHELL_CACHE, STATIC_CACHE, PAGES_CACHE].includes(key))
+                    .map(key => caches.delete(key))
+            ))
+            .then(() => self.clients.claim())
+            .then(() => replay())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+
+    if (url.origin !== self.location.origin) {
+        // Stylesheets, fonts and scripts from CDNs
+        if (request.method === 'GET' && ['style', 'font', 'script'].includes(request.destination)) {
+            event.respondWith(cacheFirst(request, STATIC_CACHE));
+        }
+        return;
+    }
+
+    if (request.method === 'POST' && url.pathname === OPERATIONS_URL) {
+        event.respondWith(sendOperations(event));
+    } else if (request.method !== 'GET') {
+        return;
+    } else if (url.pathname === LOGOUT_URL || url.pathname === LOGIN_URL) {
+        // Pages of the previous user must not be shown to the next one
+        event.waitUntil(caches.delete(PAGES_CACHE));
+    } else if (request.mode === 'navigate' && PAGES.test(url.pathname) && !url.search) {
+        event.respondWith(staleWhileRevalidate(event));
+    } else if (request.mode === 'navigate') {
+        event.respondWith(fetch(request).catch(() => caches.match(OFFLINE_URL)));
+    } else if (url.pathname.startsWith(STATIC_URL)) {
+        event.respondWith(HASHED_STATIC ? cacheFirst(request, STATIC_CACHE) : networkFirst(request));
+    }
+});
+
+// Replays the queue when the browser reports connectivity (Background Sync)
+self.addEventListener('sync', event => {
+    if (event.tag === SYNC_TAG) {
+        event.waitUntil(replay());
+    }
+});
+
+// Pages ask for a replay when they load and when they go back online, for
+// browsers without Background Sync. They send their current CSRF token, which
+// replaces the one of the queued operations if it changed since (new login).
+self.addEventListener('message', event => {
+    if (event.data && event.data.type === 'replay') {
+        event.waitUntil(replay(event.data.csrfToken));
+    }
+});
+
+function cacheFirst(request, cacheName) {
+    return caches.match(request).then(cached => cached || fetch(request).then(response => {
+        if (response.ok || response.type === 'opaque') {
+            const copy = response.clone();
+            caches.open(cacheName).then(cache => cache.put(request, copy));
+        }
+        return response;
+    }));
+}
+
+function networkFirst(request) {
+    return fetch(request).catch(() => caches.match(request));
+}
+
+function staleWhileRevalidate(event) {
+    const request = event.request;
+    return caches.open(PAGES_CACHE).then(cache => cache.match(request).then(cached => {
+        const network = fetch(request).then(response => {
+            if (response.redirected) {
+                // Sent to the login page: the session ended
+                cache.keys().then(keys => keys.forEach(key => cache.delete(key)));
+            } else if (response.ok) {
+                cache.put(request, response.clone());
+            }
+            return response;
+        });
+
+        if (cached) {
+            event.waitUntil(network.catch(() => null));
+            return cached;
+        }
+        return network.catch(() => caches.match(OFFLINE_URL));
+    }));
+}
+
+function sendOperations(event) {
+    const request = event.request;
+    const queued = request.clone().json();
+    return fetch(request)
+        .then(response => {
+            if (response.ok && !response.redirected) {
+                // The page the change was made from, for its next visit
+                event.waitUntil(
+                    refreshPages([request.referrer]).then(() => replay(request.headers.get('X-CSRFToken')))
+                );
+            }
+            return response;
+        })
+        .catch(() => queued.then(body => {
+            return StockQueue.add(body.operations, request.headers.get('X-CSRFToken'))
+                .then(() => registerSync())
+                .then(() => new Response(
+                    JSON.stringify({ queued: body.operations.map(operation => operation.id) }),
+                    { status: 202, headers: { 'Content-Type': 'application/json' } }
+                ));
+        }));
+}
+
+function registerSync() {
+    if (self.registration.sync) {
+        return self.registration.sync.register(SYNC_TAG).catch(() => null);
+    }
+    return Promise.resolve();
+}
+
+// Fetches the cached pages among `urls` again
+function refreshPages(urls) {
+    return caches.open(PAGES_CACHE).then(cache => Promise.all(urls.map(url => {
+        return cache.match(url).then(cached => cached && fetch(url, { credentials: 'same-origin' })
+            .then(response => response.ok && !response.redirected ? cache.put(url, response) : null))
+            .catch(() => null);
+    })));
+}
+
+let replaying = null;
+
+// Sends the queued operations in batches, oldest first. Stops at the first
+// failure, keeping the rest queued for the next replay.
+function replay(csrfToken) {
+    if (!replaying) {
+        replaying = StockQueue.all()
+            .then(operations => sendBatches(operations, csrfToken, false))
+            .finally(() => {
+                replaying = null;
+            });
+    }
+    return replaying;
+}
+
+function sendBatches(operations, csrfToken, sent) {
+    if (operations.length === 0) {
+        if (!sent) {
+            return null;
+        }
+        return caches.open(PAGES_CACHE)
+            .then(cache => cache.keys())
+            .then(keys => refreshPages(keys.map(key => key.url)));
+    }
+
+    const batch = operations.slice(0, REPLAY_BATCH);
+    return fetch(OPERATIONS_URL, {
+        method: 'POST',
+        credentials: 'same-origin',
+        headers: {
+            'Content-Type': 'application/json',
+            'X-CSRFToken': csrfToken || batch[batch.length - 1].csrfToken,
+            'X-Requested-With': 'XMLHttpRequest',
+        },
+        body: JSON.stringify({
+            operations: batch.map(operation => ({ id: operation.id, item: operation.item, delta: operation.delta })),
+        }),
+    }).then(response => {
+        // Invalid batches would fail forever: they are dropped. Logged out
+        // (redirected to the login page), conflicts and server errors keep
+        // them for the next replay.
+        if (response.redirected || (!response.ok && response.status !== 400)) {
+            return null;
+        }
+        return StockQueue.remove(batch.map(operation => operation.seq))
+            .then(() => response.ok ? response.json().then(notifyClients) : null)
+            .then(() => sendBatches(operations.slice(REPLAY_BATCH), csrfToken, true));
+    }).catch(() => null);
+}
+
+// Lets open pages update the cards of the replayed operations
+function notifyClients(data) {
+    return self.clients.matchAll({ type: 'window' }).then(clients => {
+        clients.forEach(client => client.postMessage({ type: 'stock-synced', data: data }));
+    });
+}
@@ -12,3 +12,7 @@ class UsersConfig(AppConfig):
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        # Connect signal receivers
+        from . import signals  # pylint: disable=C0415,W0611
@@ -0,0 +1,68 @@
+"""
+Authentication backends for the 'users' app.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import router
+
+UserModel = get_user_model()
+
+def user_cache_key(user_id):
+    """
+    Returns the cache key of the cached user `user_id`.
+    """
+    return f'users:user-fields:{user_id}'
+
+def forget_user(user_id):
+    """
+    Removes user `user_id` from the cache, after it changed.
+    """
+    caches[settings.SESSION_CACHE_ALIAS].delete(user_cache_key(user_id))
+
+def session_auth_hash(user, cached_hash):
+    """
+    Returns the session hash of a cached user: the one cached with it, until
+    its password is loaded or changed.
+    """
+    if 'password' in user.get_deferred_fields():
+        return cached_hash
+    return UserModel.get_session_auth_hash(user)
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend reading the logged in user from the sessions cache.
+
+    `AuthenticationMiddleware` loads the user of every request; this saves the
+    database query. Cached users are removed when saved or deleted (see
+    `users.signals`), so password changes still end other sessions at once.
+
+    The password hash isn't cached, only the other fields and the session
+    hash derived from it, which every session stores already. Cached users
+    have their password deferred: it's loaded when used, and saving them
+    leaves it alone.
+    """
+    def get_user(self, user_id):
+        cache = caches[settings.SESSION_CACHE_ALIAS]
+        key = user_cache_key(user_id)
+        cached = cache.get(key)
+        if cached is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            cache.set(key, {
+                'fields': {
+                    field.attname: getattr(user, field.attname)
+                    for field in UserModel._meta.concrete_fields if field.attname != 'password'
+                },
+                'session_auth_hash': user.get_session_auth_hash(),
+            }, settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+
+        fields = cached['fields']
+        user = UserModel.from_db(router.db_for_read(UserModel), list(fields), list(fields.values()))
+        user.get_session_auth_hash = partial(session_auth_hash, user, cached['session_auth_hash'])
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,64 @@
+"""
+Test cases for the 'users' app.
+"""
+import pickle
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from server.testing import TEST_CACHES
+from .backends import CachedModelBackend, user_cache_key
+
+@override_settings(CACHES=TEST_CACHES)
+class CachedModelBackendTests(TestCase):
+    """
+    Logged in users are cached without their password hash.
+    """
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('user', password='password')
+        self.client.login(username='user', password='password')
+
+    def test_cached_user(self):
+        """
+        The cache holds the user without the password hash, and serves the
+        next requests.
+        """
+        self.assertEqual(self.client.get('/inventory/lists/').status_code, 200)
+        cached = caches[settings.SESSION_CACHE_ALIAS].get(user_cache_key(self.user.pk))
+        self.assertNotIn('password', cached['fields'])
+        self.assertNotIn(self.user.password.encode(), pickle.dumps(cached))
+
+        with self.assertNumQueries(0):
+            user = CachedModelBackend().get_user(self.user.pk)
+        self.assertEqual((user.pk, user.username), (self.user.pk, 'user'))
+        self.assertEqual(self.client.get('/inventory/lists/').status_code, 200)
+
+    def test_save_cached_user(self):
+        """
+        Saving a cached user keeps its password, and its session hash follows
+        a new one.
+        """
+        backend = CachedModelBackend()
+        backend.get_user(self.user.pk)
+        user = backend.get_user(self.user.pk)
+        self.assertEqual(user.get_session_auth_hash(), self.user.get_session_auth_hash())
+        user.first_name = 'Name'
+        user.save()
+        self.assertTrue(get_user_model().objects.get(pk=self.user.pk).check_password('password'))
+
+        backend.get_user(self.user.pk)
+        user = backend.get_user(self.user.pk)
+        cached_hash = user.get_session_auth_hash()
+        user.set_password('changed')
+        self.assertNotEqual(user.get_session_auth_hash(), cached_hash)
+
+    def test_password_change(self):
+        """
+        Changing the password ends the other sessions at once.
+        """
+        self.assertEqual(self.client.get('/inventory/lists/').status_code, 200)
+        self.user.set_password('changed')
+        self.user.save()
+        self.assertEqual(self.client.get('/inventory/lists/').status_code, 302)
@@ -7,6 +7,7 @@ This module handles user authentication, including login and logout functionalit
 from django.contrib.auth import authenticate, login, logout
 from django.shortcuts import render, redirect
 from django.contrib import messages
+from django.utils.http import url_has_allowed_host_and_scheme
 
 def login_view(request):
     """
@@ -14,7 +15,7 @@ def login_view(request):
 
     If the request method is POST, authenticate the user with the provided
     username and password. If authentication is successful, log the user in
-    and redirect to the 'next' URL if provided, otherwise redirect to the home page.
+    and redirect to the 'next' URL if provided and safe, otherwise redirect to the lists.
 
     Args:
         request: The HTTP request object.
@@ -29,7 +30,9 @@ def login_view(request):
         if user is not None:
             login(request, user)
             next_url = request.GET.get('next', '')
-            return redirect(next_url or 'home')  # Redirect to 'home' if no 'next' URL
+            if not url_has_allowed_host_and_scheme(next_url, {request.get_host()}, request.is_secure()):
+                next_url = ''
+            return redirect(next_url or 'lists')  # Redirect to the lists if no 'next' URL
         messages.error(request, 'Credenciales incorrectas')
 
     return render(request, 'login.html')  # Render the login page for GET requests
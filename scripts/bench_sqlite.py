@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+Concurrent read/write benchmark for the SQLite connection tuning.
+
+Runs reader threads (the list_detail query) and writer threads (stock taps)
+against a scratch database, first with SQLite's defaults and then with the
+pragmas applied by `server.db.configure_connection`, and prints the throughput
+and the number of "database is locked" errors of each run:
+
+    python scripts/bench_sqlite.py --readers 8 --writers 4 --duration 10
+
+Only the standard library is required.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'DELETE',
+    'synchronous': 'FULL',
+}
+
+TUNED_PRAGMAS = {
+    'busy_timeout': 5000,
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -20000,
+}
+
+READ_QUERY = (
+    'SELECT id, name, amount, MAX(amount_to_buy - amount, 0) * price '
+    'FROM item WHERE list_id = ? ORDER BY amount, id LIMIT 60'
+)
+WRITE_QUERY = 'UPDATE item SET amount = MAX(amount + ?, 0) WHERE id = ?'
+
+
+def parse_args():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=8, help='Number of reader threads.')
+    parser.add_argument('--writers', type=int, default=4, help='Number of writer threads.')
+    parser.add_argument('--duration', type=float, default=5, help='Seconds per run.')
+    parser.add_argument('--lists', type=int, default=50, help='Lists in the scratch database.')
+    parser.add_argument('--items', type=int, default=1000, help='Items per list.')
+    parser.add_argument(
+        '--timeout', type=float, default=5,
+        help="Python-level lock timeout in seconds, Django's default is 5.",
+    )
+    return parser.parse_args()
+
+
+def create_database(path, pragmas, lists, items):
+    """Create and fill the scratch database."""
+    connection = sqlite3.connect(path)
+    # The journal mode is stored in the file: set it before any concurrent access
+    connection.execute(f'PRAGMA journal_mode = {pragmas["journal_mode"]}')
+    connection.execute(
+        'CREATE TABLE item (id INTEGER PRIMARY KEY, name TEXT, amount INTEGER, '
+        'amount_to_buy INTEGER, price NUMERIC, list_id INTEGER)'
+    )
+    connection.execute('CREATE INDEX item_list_amount_idx ON item (list_id, amount, id)')
+    connection.executemany(
+        'INSERT INTO item (name, amount, amount_to_buy, price, list_id) VALUES (?, ?, ?, ?, ?)',
+        (
+            (f'item {i}', random.randint(0, 10), 10, random.randint(1, 1000) / 100, i % lists)
+            for i in range(lists * items)
+        ),
+    )
+    connection.commit()
+    connection.close()
+
+
+def connect(path, pragmas, timeout):
+    """Open a connection with the given pragmas, like Django would."""
+    connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+    return connection
+
+
+def run(path, pragmas, args):
+    """Run readers and writers for `args.duration` seconds and return the counters."""
+    counters = {'reads': 0, 'writes': 0, 'locked': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+    max_id = args.lists * args.items
+
+    def reader():
+        connection = connect(path, pragmas, args.timeout)
+        reads = locked = 0
+        while time.perf_counter() < deadline:
+            try:
+                connection.execute(READ_QUERY, (random.randrange(args.lists),)).fetchall()
+                reads += 1
+            except sqlite3.OperationalError:
+                locked += 1
+        with lock:
+            counters['reads'] += reads
+            counters['locked'] += locked
+
+    def writer():
+        connection = connect(path, pragmas, args.timeout)
+        writes = locked = 0
+        while time.perf_counter() < deadline:
+            try:
+                with connection:
+                    connection.execute(WRITE_QUERY, (random.choice((-1, 1)), random.randint(1, max_id)))
+                writes += 1
+            except sqlite3.OperationalError:
+                locked += 1
+        with lock:
+            counters['writes'] += writes
+            counters['locked'] += locked
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer) for _ in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counters
+
+
+def main():
+    """Benchmark default and tuned settings and print a comparison."""
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        for label, pragmas in (('default', DEFAULT_PRAGMAS), ('tuned', TUNED_PRAGMAS)):
+            path = os.path.join(directory, f'{label}.sqlite3')
+            create_database(path, pragmas, args.lists, args.items)
+            counters = run(path, pragmas, args)
+            print(
+                f'{label:>8}: {counters["reads"] / args.duration:9.1f} reads/s '
+                f'{counters["writes"] / args.duration:9.1f} writes/s '
+                f'{counters["locked"]:6d} "database is locked" errors'
+            )
+
+
+if __name__ == '__main__':
+    main()
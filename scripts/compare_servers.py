@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""
+Compares the throughput of Lima under WSGI and ASGI.
+
+Seeds a scratch database, then starts the app with Gunicorn's threaded
+workers (sync views) and with uvicorn workers (async views, ASYNC_VIEWS=true),
+as `start.sh` does, with the same number of workers. Each server is load
+tested with `loadtest.py` at every concurrency, and a table of throughput and
+latency percentiles is printed:
+
+    python scripts/compare_servers.py --workers 2 --threads 4 \\
+        --concurrency 1 10 50 --requests 2000
+
+Requires the app's dependencies (gunicorn, uvicorn-worker) to be installed.
+"""
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import loadtest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+
+# Name: (application, extra Gunicorn arguments, ASYNC_VIEWS)
+SERVERS = {
+    'wsgi': ('server.wsgi:application', [], 'false'),
+    'asgi': ('server.asgi:application', ['-k', 'uvicorn_worker.UvicornWorker'], 'true'),
+}
+
+SEED = 'from inventory.benchmark import seed; seed({lists}, {items})'
+
+
+def parse_args():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        'paths', nargs='*', default=['/inventory/lists/', '/inventory/lists/1/', '/inventory/item/read/1'],
+        help='Paths to request in turn.',
+    )
+    parser.add_argument('--servers', nargs='+', choices=SERVERS, default=list(SERVERS), help='Servers to test.')
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 10, 50], help='Concurrent clients.')
+    parser.add_argument('--requests', type=int, default=2000, help='Requests per run.')
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes of each server.')
+    parser.add_argument('--threads', type=int, default=4, help='Threads per WSGI worker.')
+    parser.add_argument('--lists', type=int, default=20, help='Lists in the scratch database.')
+    parser.add_argument('--items', type=int, default=200, help='Items per list.')
+    parser.add_argument('--port', type=int, default=8765, help='Port to serve on.')
+    parser.add_argument('--timeout', type=float, default=30, help='Socket timeout in seconds.')
+    return parser.parse_args()
+
+
+def manage(env, *args):
+    """Run a management command against the scratch database."""
+    subprocess.run([sys.executable, 'manage.py', *args], cwd=APP_DIR, env=env, check=True)
+
+
+def wait_for_port(port, process, timeout=30):
+    """Wait until the server accepts connections."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit('The server exited on startup')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit('The server did not start')
+
+
+def serve(name, args, env):
+    """Start the server `name` and return its process."""
+    application, extra, async_views = SERVERS[name]
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'gunicorn', application, '-c', 'gunicorn.conf.py', *extra,
+            '--bind', f'127.0.0.1:{args.port}', '--workers', str(args.workers),
+            '--threads', str(args.threads),
+        ],
+        cwd=APP_DIR,
+        env={**env, 'ASYNC_VIEWS': async_views, 'SERVER_MODE': name},
+        stdout=subprocess.DEVNULL,
+    )
+    wait_for_port(args.port, process)
+    return process
+
+
+def main():
+    """Run the comparison and print a table."""
+    args = parse_args()
+    base_url = f'http://127.0.0.1:{args.port}'
+    scratch = tempfile.mkdtemp(prefix='lima-servers-')
+    env = {
+        **os.environ,
+        'DATABASE_URL': f'sqlite:///{os.path.join(scratch, "db.sqlite3")}',
+        'CACHE_LOCATION': os.path.join(scratch, 'cache'),
+        'SESSION_CACHE_LOCATION': os.path.join(scratch, 'sessions'),
+        'DJANGO_DEBUG': 'False',
+        'DJANGO_SECRET_KEY': os.getenv('DJANGO_SECRET_KEY', 'compare-servers'),
+    }
+
+    results = []
+    try:
+        manage(env, 'migrate', '--noinput', '--verbosity', '0')
+        manage(env, 'collectstatic', '--noinput', '--verbosity', '0')
+        manage(env, 'shell', '-c', SEED.format(lists=args.lists, items=args.items))
+
+        for name in args.servers:
+            process = serve(name, args, env)
+            try:
+                cookie = loadtest.login(base_url, 'benchmark', 'benchmark', args.timeout)
+                # Warm up connections, caches and lazily loaded modules
+                loadtest.run(base_url, args.paths, cookie, args.workers * 20, args.workers, args.timeout)
+                for concurrency in args.concurrency:
+                    result = loadtest.run(base_url, args.paths, cookie, args.requests, concurrency, args.timeout)
+                    results.append((name, result))
+            finally:
+                process.terminate()
+                process.wait()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    print(f'{"server":<8}{"clients":>8}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"errors":>8}')
+    for name, result in results:
+        print(
+            f'{name:<8}{result["concurrency"]:>8}{result["throughput"]:>10.1f}{result["p50"]:>10.1f}'
+            f'{result["p95"]:>10.1f}{result["p99"]:>10.1f}{result["errors"]:>8}'
+        )
+
+
+if __name__ == '__main__':
+    main()
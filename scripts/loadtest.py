@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+"""
+Simple HTTP load test for Lima.
+
+Logs in once, then requests the given paths from several threads over
+keep-alive connections and prints throughput and latency percentiles. Use it
+to compare serving modes, e.g. `SERVER_MODE=dev` against the default WSGI mode:
+
+    python scripts/loadtest.py --base-url http://localhost:32500 \\
+        --username admin --password admin --requests 2000 --concurrency 20 \\
+        /inventory/lists/ /inventory/lists/1/
+
+Only the standard library is required.
+"""
+import argparse
+import http.client
+import re
+import statistics
+import threading
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+
+def parse_args():
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', default=['/inventory/lists/'], help='Paths to request in turn.')
+    parser.add_argument('--base-url', default='http://localhost:8000', help='Server to test.')
+    parser.add_argument('--username', help='User to log in with (pages require login).')
+    parser.add_argument('--password', help='Password of --username.')
+    parser.add_argument('--requests', type=int, default=1000, help='Total number of requests.')
+    parser.add_argument('--concurrency', type=int, default=10, help='Number of concurrent clients.')
+    parser.add_argument('--timeout', type=float, default=30, help='Socket timeout in seconds.')
+    return parser.parse_args()
+
+
+def connect(base_url, timeout):
+    """Open a keep-alive connection to the server."""
+    url = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+    return connection_class(url.hostname, url.port, timeout=timeout)
+
+
+def login(base_url, username, password, timeout):
+    """Log in through the login form and return the cookie header to reuse."""
+    connection = connect(base_url, timeout)
+    connection.request('GET', '/users/login/')
+    response = connection.getresponse()
+    body = response.read().decode()
+    cookies = SimpleCookie(response.getheader('Set-Cookie', ''))
+    token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', body).group(1)
+
+    connection.request('POST', '/users/login/?next=/', body=urlencode({
+        'username': username,
+        'password': password,
+        'csrfmiddlewaretoken': token,
+    }), headers={
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'Cookie': f'csrftoken={cookies["csrftoken"].value}',
+        'Referer': f'{base_url}/users/login/',
+    })
+    response = connection.getresponse()
+    response.read()
+    cookies.load(response.getheader('Set-Cookie', ''))
+    if 'sessionid' not in cookies:
+        raise SystemExit('Login failed')
+    return '; '.join(f'{key}={morsel.value}' for key, morsel in cookies.items())
+
+
+def worker(base_url, paths, timeout, cookie, count, latencies, errors, lock):
+    """Issue `count` requests over one connection, recording latencies."""
+    connection = connect(base_url, timeout)
+    headers = {'Cookie': cookie} if cookie else {}
+    local_latencies = []
+    local_errors = 0
+    for index in range(count):
+        path = paths[index % len(paths)]
+        start = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                local_errors += 1
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            connection.close()
+            connection = connect(base_url, timeout)
+            continue
+        local_latencies.append(time.perf_counter() - start)
+
+    with lock:
+        latencies.extend(local_latencies)
+        errors.append(local_errors)
+
+
+def run(base_url, paths, cookie, requests, concurrency, timeout):
+    """Run one load test and return its summary as a dict."""
+    latencies, errors, lock = [], [], threading.Lock()
+    per_worker, extra = divmod(requests, concurrency)
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(base_url, paths, timeout, cookie, per_worker + (i < extra), latencies, errors, lock),
+        )
+        for i in range(concurrency)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    if not latencies:
+        raise SystemExit('No request succeeded')
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        'ok': len(latencies),
+        'errors': sum(errors),
+        'concurrency': concurrency,
+        'elapsed': elapsed,
+        'throughput': len(latencies) / elapsed,
+        'p50': percentiles[49] * 1000,
+        'p95': percentiles[94] * 1000,
+        'p99': percentiles[98] * 1000,
+    }
+
+
+def main():
+    """Run the load test and print a summary."""
+    args = parse_args()
+    cookie = None
+    if args.username:
+        cookie = login(args.base_url, args.username, args.password, args.timeout)
+
+    result = run(args.base_url, args.paths, cookie, args.requests, args.concurrency, args.timeout)
+    print(f'Requests:     {result["ok"]} ok, {result["errors"]} errors')
+    print(f'Concurrency:  {result["concurrency"]}')
+    print(f'Elapsed:      {result["elapsed"]:.2f} s')
+    print(f'Throughput:   {result["throughput"]:.1f} req/s')
+    print(f'Latency p50:  {result["p50"]:.1f} ms')
+    print(f'Latency p95:  {result["p95"]:.1f} ms')
+    print(f'Latency p99:  {result["p99"]:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
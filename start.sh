@@ -1,9 +1,8 @@
 #!/bin/bash
-echo "Making migrations..."
-python /app/manage.py makemigrations
+set -e
 
 echo "Aplying migrations..."
-python /app/manage.py migrate
+python /app/manage.py migrate --noinput
 
 echo "Creating superuser..."
 python manage.py shell <<EOF
@@ -18,5 +17,57 @@ else:
     print("Superuser already exists")
 EOF
 
-echo "Starting Django server..."
-python /app/manage.py runserver 0.0.0.0:8000
\ No newline at end of file
+# Processes run next to the web server. They are supervised together: when any
+# of them exits the others are stopped, and the container exits with its status
+# so that it's restarted
+pids=()
+
+stop_all() {
+    kill -TERM "${pids[@]}" 2>/dev/null || true
+    wait
+}
+trap 'stop_all; exit 143' TERM INT
+
+# Background jobs (app/jobs), run next to the web server unless JOBS_WORKER=false,
+# e.g. when workers run in containers of their own
+if [ "${JOBS_WORKER:-true}" = "true" ]; then
+    echo "Starting background jobs worker..."
+    python /app/manage.py run_jobs --threads "${JOBS_THREADS:-2}" &
+    pids+=($!)
+fi
+
+# Low stock alerts (inventory/alerts.py), every LOW_STOCK_INTERVAL seconds, 0 disables them
+if [ "${LOW_STOCK_INTERVAL:-60}" != "0" ]; then
+    echo "Starting low stock alerts..."
+    python /app/manage.py check_low_stock --every "${LOW_STOCK_INTERVAL:-60}" &
+    pids+=($!)
+fi
+
+# SERVER_MODE: 'wsgi' (default), 'asgi' or 'dev' (Django development server)
+case "${SERVER_MODE:-wsgi}" in
+    dev)
+        echo "Starting Django development server..."
+        server=(python /app/manage.py runserver 0.0.0.0:8000)
+        ;;
+    asgi)
+        echo "Starting ASGI server..."
+        server=(gunicorn server.asgi:application -c /app/gunicorn.conf.py -k uvicorn_worker.UvicornWorker)
+        ;;
+    *)
+        echo "Starting WSGI server..."
+        server=(gunicorn server.wsgi:application -c /app/gunicorn.conf.py)
+        ;;
+esac
+
+# Alone, the server replaces this shell
+if [ ${#pids[@]} -eq 0 ]; then
+    exec "${server[@]}"
+fi
+"${server[@]}" &
+pids+=($!)
+
+status=0
+wait -n || status=$?
+echo "A process exited with status $status, stopping the others..."
+stop_all
+exit "$status"